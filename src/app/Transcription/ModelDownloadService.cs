@@ -2,7 +2,7 @@ using System;
 using System.Diagnostics;
 using System.IO;
 using System.Text;
-using System.Text.RegularExpressions;
+using System.Text.Json;
 using System.Threading;
 using System.Threading.Tasks;
 
@@ -13,11 +13,14 @@ public class ModelDownloadProgress
     public string ModelName { get; init; } = string.Empty;
     public int Percentage { get; init; }
     public string Status { get; init; } = string.Empty;
+    public long DownloadedBytes { get; init; }
+    public long TotalBytes { get; init; }
 }
 
 public class ModelDownloadService
 {
     private readonly string _pythonPath;
+    private readonly string _transcribeScriptPath;
     private static readonly string[] RequiredModels = { "large-v2", "large-v3-turbo" };
 
     public event EventHandler<ModelDownloadProgress>? ProgressChanged;
@@ -25,6 +28,7 @@ public class ModelDownloadService
     public ModelDownloadService()
     {
         _pythonPath = PythonFinder.Find();
+        _transcribeScriptPath = TranscriptionService.FindTranscribeScript();
         Console.WriteLine($"[ModelDownload] Python: {_pythonPath}");
     }
 
@@ -84,7 +88,7 @@ public class ModelDownloadService
                 Status = $"Downloading {model}..."
             });
 
-            await DownloadModelAsync(model, cancellationToken);
+            await DownloadModelAsync(model, i, missing.Length, cancellationToken);
 
             ProgressChanged?.Invoke(this, new ModelDownloadProgress
             {
@@ -95,114 +99,145 @@ public class ModelDownloadService
         }
     }
 
-    private async Task DownloadModelAsync(string modelName, CancellationToken cancellationToken)
+    /// <summary>
+    /// Download one model with the worker's --download-model mode: parallel ranged fetches
+    /// that resume after a dropped connection and are verified before they are moved into the cache.
+    /// </summary>
+    private async Task DownloadModelAsync(string modelName, int index, int count, CancellationToken cancellationToken)
     {
-        var scriptPath = Path.Combine(Path.GetTempPath(), $"voicepaste-download-{Guid.NewGuid():N}.py");
-
-        try
+        var psi = new ProcessStartInfo
         {
-            var script = @"
-import sys
-model = sys.argv[1]
-
-print(f'Downloading model: {model}', flush=True)
+            FileName = _pythonPath,
+            ArgumentList = { _transcribeScriptPath, "--download-model", "--model", modelName },
+            UseShellExecute = false,
+            RedirectStandardOutput = true,
+            RedirectStandardError = true,
+            CreateNoWindow = true,
+            StandardOutputEncoding = Encoding.UTF8,
+            StandardErrorEncoding = Encoding.UTF8
+        };
+
+        psi.Environment["PYTHONUTF8"] = "1";
+        psi.Environment["PYTHONIOENCODING"] = "utf-8";
+        psi.Environment["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1";
+        if (Environment.GetEnvironmentVariable("VOICEPASTE_DEBUG") == "1")
+        {
+            psi.Environment["VOICEPASTE_DEBUG"] = "1";
+        }
 
-try:
-    from faster_whisper import WhisperModel
-    # Download to default HF cache by loading the model
-    WhisperModel(model, device='cpu', compute_type='int8')
-    print('DONE', flush=True)
-except Exception as e:
-    print(f'ERROR: {e}', file=sys.stderr, flush=True)
-    sys.exit(1)
-";
+        // Set PYTHONHOME if bundled Python exists
+        var exeDir = AppDomain.CurrentDomain.BaseDirectory;
+        var pythonDir = Path.GetFullPath(Path.Combine(exeDir, "python"));
+        if (Directory.Exists(pythonDir))
+        {
+            var existingPath = psi.Environment["PATH"] ?? Environment.GetEnvironmentVariable("PATH") ?? string.Empty;
+            psi.Environment["PATH"] = pythonDir + ";" + existingPath;
+            psi.Environment["PYTHONHOME"] = pythonDir;
+        }
 
-            await File.WriteAllTextAsync(scriptPath, script, Encoding.UTF8, cancellationToken);
+        using var process = new Process { StartInfo = psi };
 
-            var psi = new ProcessStartInfo
-            {
-                FileName = _pythonPath,
-                ArgumentList = { scriptPath, modelName },
-                UseShellExecute = false,
-                RedirectStandardOutput = true,
-                RedirectStandardError = true,
-                CreateNoWindow = true,
-                StandardOutputEncoding = Encoding.UTF8,
-                StandardErrorEncoding = Encoding.UTF8
-            };
+        var completed = false;
+        var error = new StringBuilder();
 
-            psi.Environment["PYTHONUTF8"] = "1";
-            psi.Environment["PYTHONIOENCODING"] = "utf-8";
-            psi.Environment["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1";
-            if (Environment.GetEnvironmentVariable("VOICEPASTE_DEBUG") == "1")
+        process.OutputDataReceived += (_, args) =>
+        {
+            if (args.Data == null) return;
+            if (TryParseProgress(args.Data, modelName, index, count, out var progress))
             {
-                psi.Environment["VOICEPASTE_DEBUG"] = "1";
+                ProgressChanged?.Invoke(this, progress);
+                return;
             }
-
-            // Set PYTHONHOME if bundled Python exists
-            var exeDir = AppDomain.CurrentDomain.BaseDirectory;
-            var pythonDir = Path.GetFullPath(Path.Combine(exeDir, "python"));
-            if (Directory.Exists(pythonDir))
+            if (args.Data.Trim() == "DOWNLOAD_COMPLETE")
             {
-                var existingPath = psi.Environment["PATH"] ?? Environment.GetEnvironmentVariable("PATH") ?? string.Empty;
-                psi.Environment["PATH"] = pythonDir + ";" + existingPath;
-                psi.Environment["PYTHONHOME"] = pythonDir;
+                completed = true;
             }
+            Console.WriteLine($"[ModelDownload] {args.Data}");
+        };
 
-            using var process = new Process { StartInfo = psi };
-
-            var output = new StringBuilder();
-            var error = new StringBuilder();
-
-            process.OutputDataReceived += (_, args) =>
+        process.ErrorDataReceived += (_, args) =>
+        {
+            if (args.Data == null) return;
+            if (IsBenignHubWarning(args.Data))
             {
-                if (args.Data == null) return;
-                output.AppendLine(args.Data);
                 Console.WriteLine($"[ModelDownload] {args.Data}");
-            };
-
-            process.ErrorDataReceived += (_, args) =>
-            {
-                if (args.Data == null) return;
-                if (IsBenignHubWarning(args.Data))
-                {
-                    Console.WriteLine($"[ModelDownload] {args.Data}");
-                    return;
-                }
+                return;
+            }
 
-                error.AppendLine(args.Data);
-                Console.WriteLine($"[ModelDownload ERROR] {args.Data}");
-            };
+            error.AppendLine(args.Data);
+            Console.WriteLine($"[ModelDownload ERROR] {args.Data}");
+        };
 
-            process.Start();
-            process.BeginOutputReadLine();
-            process.BeginErrorReadLine();
+        process.Start();
+        process.BeginOutputReadLine();
+        process.BeginErrorReadLine();
 
+        try
+        {
             // Wait for completion with cancellation support
             await process.WaitForExitAsync(cancellationToken);
+        }
+        catch (OperationCanceledException)
+        {
+            // Finished chunks stay on disk; the next download resumes from them
+            try { process.Kill(entireProcessTree: true); } catch { }
+            throw;
+        }
 
-            if (process.ExitCode != 0)
-            {
-                throw new ModelDownloadException($"Failed to download model '{modelName}': {error}");
-            }
+        if (process.ExitCode != 0)
+        {
+            throw new ModelDownloadException($"Failed to download model '{modelName}': {error}");
+        }
 
-            if (!output.ToString().Contains("DONE"))
-            {
-                throw new ModelDownloadException($"Model download incomplete for '{modelName}'");
-            }
+        if (!completed)
+        {
+            throw new ModelDownloadException($"Model download incomplete for '{modelName}'");
         }
-        finally
+    }
+
+    /// <summary>
+    /// Parse a worker "PROGRESS {json}" line into a progress event for model `index` of `count`.
+    /// Returns false for any other line.
+    /// </summary>
+    public static bool TryParseProgress(string line, string modelName, int index, int count,
+        out ModelDownloadProgress progress)
+    {
+        progress = new ModelDownloadProgress();
+        const string prefix = "PROGRESS ";
+        if (string.IsNullOrEmpty(line) || !line.StartsWith(prefix, StringComparison.Ordinal))
+            return false;
+
+        try
         {
-            try
+            using var doc = JsonDocument.Parse(line.Substring(prefix.Length));
+            var root = doc.RootElement;
+            var downloaded = root.GetProperty("overall_downloaded").GetInt64();
+            var total = root.GetProperty("overall_total").GetInt64();
+            var file = root.TryGetProperty("file", out var f) ? f.GetString() : null;
+            var fraction = total > 0 ? Math.Clamp((double)downloaded / total, 0.0, 1.0) : 1.0;
+            count = Math.Max(count, 1);
+
+            progress = new ModelDownloadProgress
             {
-                if (File.Exists(scriptPath))
-                    File.Delete(scriptPath);
-            }
-            catch
-            {
-                // Ignore cleanup errors
-            }
+                ModelName = modelName,
+                Percentage = (int)((index + fraction) * 100 / count),
+                Status = $"Downloading {modelName}: {FormatMegabytes(downloaded)} / {FormatMegabytes(total)}"
+                    + (string.IsNullOrEmpty(file) ? string.Empty : $" ({file})"),
+                DownloadedBytes = downloaded,
+                TotalBytes = total
+            };
+            return true;
         }
+        catch (Exception ex) when (ex is JsonException or KeyNotFoundException or InvalidOperationException
+            or FormatException)
+        {
+            return false;
+        }
+    }
+
+    private static string FormatMegabytes(long bytes)
+    {
+        return $"{bytes / (1024.0 * 1024.0):F0} MB";
     }
 
     private static bool IsModelCached(string hfCacheDir, string modelName)
@@ -1,7 +1,9 @@
 using System;
+using System.Collections.Concurrent;
 using System.Diagnostics;
 using System.IO;
 using System.Text;
+using System.Threading;
 using System.Threading.Tasks;
 
 namespace VoicePaste.Transcription;
@@ -25,8 +27,12 @@ public class TranscriptionService : IDisposable
 
     private Process? _activeProcess;
     private TaskCompletionSource<bool>? _readyTcs;
-    private TaskCompletionSource<string>? _resultTcs;
     private StringBuilder _errorBuffer = new();
+    private int _nextRequestId;
+
+    // Requests sent to the resident worker, completed when their "end" message arrives.
+    private readonly ConcurrentDictionary<string, TaskCompletionSource<WorkerMessage>> _pending = new();
+    private readonly ConcurrentDictionary<string, WorkerMessage> _results = new();
 
     /// <summary>
     /// Fires when CUDA fallback to CPU occurs.
@@ -60,18 +66,23 @@ public class TranscriptionService : IDisposable
     /// <summary>
     /// Starts the Python process and loads the model in the background.
     /// Call this when recording starts to hide the model loading time.
+    /// The worker stays resident between dictations, so this is a no-op while it is alive.
     /// </summary>
     public void StartPreloading()
     {
-        // Cancel any existing process
+        if (_activeProcess != null && !_activeProcess.HasExited)
+            return;
+
+        // Drop any dead process
         CleanupProcess();
 
         _readyTcs = new TaskCompletionSource<bool>(TaskCreationOptions.RunContinuationsAsynchronously);
-        _resultTcs = new TaskCompletionSource<string>(TaskCreationOptions.RunContinuationsAsynchronously);
         _errorBuffer.Clear();
 
         _activeProcess = CreateProcess(_device, waitMode: true);
-        
+        _activeProcess.EnableRaisingEvents = true;
+        var readyTcs = _readyTcs;
+
         _activeProcess.OutputDataReceived += (s, e) =>
         {
             if (e.Data == null) return;
@@ -79,11 +90,11 @@ public class TranscriptionService : IDisposable
 
             if (e.Data == "READY")
             {
-                _readyTcs.TrySetResult(true);
+                readyTcs.TrySetResult(true);
             }
-            else if (!string.IsNullOrWhiteSpace(e.Data))
+            else if (WorkerProtocol.TryParseMessage(e.Data, out var message) && message.Id != null)
             {
-                _resultTcs.TrySetResult(e.Data);
+                HandleWorkerMessage(message);
             }
         };
 
@@ -92,12 +103,12 @@ public class TranscriptionService : IDisposable
             if (e.Data == null) return;
             Console.WriteLine($"[Transcribe stderr] {e.Data}");
             _errorBuffer.AppendLine(e.Data);
+        };
 
-            if (e.Data.Contains("CUDA failed") && _device == "cuda" && _cudaAutoFallback)
-            {
-                // We'll handle fallback by killing and restarting with CPU if needed,
-                // but usually the process will print an error or READY eventually.
-            }
+        _activeProcess.Exited += (s, e) =>
+        {
+            readyTcs.TrySetResult(false);
+            FailPending("Transcription worker exited unexpectedly.");
         };
 
         try
@@ -109,7 +120,6 @@ public class TranscriptionService : IDisposable
         catch (Exception ex)
         {
             _readyTcs.TrySetException(ex);
-            _resultTcs.TrySetException(ex);
         }
     }
 
@@ -121,6 +131,7 @@ public class TranscriptionService : IDisposable
     /// <summary>
     /// Transcribe audio file to text. 
     /// If preloading was started, it waits for the model to be ready.
+    /// The worker is kept alive afterwards so the next dictation reuses the loaded model.
     /// </summary>
     public async Task<string> TranscribeAsync(string audioFilePath)
     {
@@ -134,6 +145,7 @@ public class TranscriptionService : IDisposable
             return await TranscribeOneOffAsync(audioFilePath, _device);
         }
 
+        string? requestId = null;
         try
         {
             // Wait for model to be READY (up to 30s)
@@ -147,29 +159,40 @@ public class TranscriptionService : IDisposable
                 return await TranscribeOneOffAsync(audioFilePath, _device);
             }
 
-            // Send filename to stdin
-            Console.WriteLine($"[Transcribe] Model ready. Sending file for transcription: {audioFilePath}");
+            requestId = Interlocked.Increment(ref _nextRequestId).ToString();
+            var resultTcs = new TaskCompletionSource<WorkerMessage>(TaskCreationOptions.RunContinuationsAsynchronously);
+            _pending[requestId] = resultTcs;
+            _errorBuffer.Clear();
+
+            // Send request to stdin
+            Console.WriteLine($"[Transcribe] Model ready. Sending request {requestId} for transcription: {audioFilePath}");
             var startTime = DateTime.Now;
-            await _activeProcess.StandardInput.WriteLineAsync(audioFilePath);
+            await _activeProcess.StandardInput.WriteLineAsync(
+                WorkerProtocol.BuildTranscribeRequest(requestId, audioFilePath, BuildRequestOptions()));
             await _activeProcess.StandardInput.FlushAsync();
 
             // Wait for result
-            var resultTask = _resultTcs!.Task;
+            var resultTask = resultTcs.Task;
             var timeoutTask = Task.Delay(60000);
             var finishedTask = await Task.WhenAny(resultTask, timeoutTask);
 
             if (finishedTask == timeoutTask)
             {
+                CleanupProcess();
                 throw new TranscriptionException("Transcription timed out after 60 seconds.");
             }
 
-            var transcript = await resultTask;
+            var result = await resultTask;
             var duration = DateTime.Now - startTime;
             Console.WriteLine($"[Transcribe] Transcription total time (including IPC): {duration.TotalMilliseconds:F0}ms");
-            
-            if (string.IsNullOrWhiteSpace(transcript) && _errorBuffer.Length > 0)
+            foreach (var (stage, ms) in result.Timings)
             {
-                var error = _errorBuffer.ToString();
+                Console.WriteLine($"[Transcribe] Worker timing {stage}: {ms:F0}ms");
+            }
+
+            if (!result.IsOk)
+            {
+                var error = result.Error ?? _errorBuffer.ToString();
                 if (IsCudaError(error) && _device == "cuda" && _cudaAutoFallback)
                 {
                     var fallbackMessage = "GPU acceleration failed, falling back to CPU.";
@@ -180,14 +203,67 @@ public class TranscriptionService : IDisposable
                 throw new TranscriptionException($"Transcription failed: {error}");
             }
 
-            return transcript.Trim();
+            return result.Text.Trim();
         }
-        finally
+        catch (IOException ex)
         {
+            // Broken pipe: the worker died between requests
             CleanupProcess();
+            throw new TranscriptionException("Lost connection to the transcription worker.", ex);
+        }
+        finally
+        {
+            if (requestId != null)
+            {
+                _pending.TryRemove(requestId, out _);
+                _results.TryRemove(requestId, out _);
+            }
         }
     }
 
+    private void HandleWorkerMessage(WorkerMessage message)
+    {
+        var id = message.Id!;
+        if (message.Type == "result")
+        {
+            _results[id] = message;
+        }
+        else if (message.Type == "end" && _pending.TryRemove(id, out var tcs))
+        {
+            tcs.TrySetResult(_results.TryRemove(id, out var result)
+                ? result
+                : new WorkerMessage { Type = "result", Id = id, Status = "error", Error = "Worker ended request without a result." });
+        }
+    }
+
+    private void FailPending(string error)
+    {
+        foreach (var id in _pending.Keys)
+        {
+            if (_pending.TryRemove(id, out var tcs))
+            {
+                tcs.TrySetResult(new WorkerMessage
+                {
+                    Type = "result",
+                    Id = id,
+                    Status = "error",
+                    Error = $"{error} {_errorBuffer}".Trim()
+                });
+            }
+        }
+    }
+
+    private WorkerRequestOptions BuildRequestOptions()
+    {
+        return new WorkerRequestOptions
+        {
+            LanguageMode = ToLanguageModeArg(_languageMode),
+            BeamSize = _beamSize,
+            InitialPrompt = _initialPrompt,
+            Vad = _enableVad
+        };
+    }
+
     private async Task<string> TranscribeOneOffAsync(string audioFilePath, string device)
     {
         var startTime = DateTime.Now;
@@ -306,7 +382,7 @@ public class TranscriptionService : IDisposable
             {
                 if (!_activeProcess.HasExited)
                 {
-                    _activeProcess.StandardInput.WriteLine("QUIT");
+                    _activeProcess.StandardInput.WriteLine(WorkerProtocol.BuildQuitRequest());
                     if (!_activeProcess.WaitForExit(500))
                         _activeProcess.Kill();
                 }
@@ -338,7 +414,7 @@ public class TranscriptionService : IDisposable
         };
     }
 
-    private static string FindTranscribeScript()
+    internal static string FindTranscribeScript()
     {
         var exeDir = AppDomain.CurrentDomain.BaseDirectory;
         var candidates = new[]
@@ -0,0 +1,121 @@
+using System;
+using System.Collections.Generic;
+using System.Text.Json;
+
+namespace VoicePaste.Transcription;
+
+/// <summary>
+/// Per-request options sent to the resident worker.
+/// Overrides the defaults the worker was started with.
+/// </summary>
+public sealed record WorkerRequestOptions
+{
+    public string LanguageMode { get; init; } = "auto";
+    public int BeamSize { get; init; } = 5;
+    public string InitialPrompt { get; init; } = string.Empty;
+    public bool Vad { get; init; }
+}
+
+/// <summary>
+/// One message received from the worker (a JSON line on its stdout).
+/// </summary>
+public sealed record WorkerMessage
+{
+    public string Type { get; init; } = string.Empty;
+    public string? Id { get; init; }
+    public string? Status { get; init; }
+    public string Text { get; init; } = string.Empty;
+    public string? Error { get; init; }
+    public string? Language { get; init; }
+    public double LanguageProb { get; init; }
+    public IReadOnlyDictionary<string, double> Timings { get; init; } = new Dictionary<string, double>();
+
+    public bool IsOk => Status == "ok";
+}
+
+/// <summary>
+/// JSON-lines protocol spoken with transcribe.py in --wait mode.
+/// See src/transcribe/worker_protocol.py for the worker side.
+/// </summary>
+public static class WorkerProtocol
+{
+    public const int Version = 1;
+
+    public static string BuildTranscribeRequest(string id, string audioFilePath, WorkerRequestOptions options)
+    {
+        var request = new Dictionary<string, object>
+        {
+            ["v"] = Version,
+            ["id"] = id,
+            ["op"] = "transcribe",
+            ["path"] = audioFilePath,
+            ["options"] = new Dictionary<string, object>
+            {
+                ["language_mode"] = options.LanguageMode,
+                ["beam_size"] = options.BeamSize,
+                ["initial_prompt"] = options.InitialPrompt,
+                ["vad"] = options.Vad
+            }
+        };
+        return JsonSerializer.Serialize(request);
+    }
+
+    public static string BuildQuitRequest()
+    {
+        return JsonSerializer.Serialize(new Dictionary<string, object> { ["v"] = Version, ["op"] = "quit" });
+    }
+
+    /// <summary>
+    /// Parse one stdout line. Returns false for non-protocol lines (e.g. READY).
+    /// </summary>
+    public static bool TryParseMessage(string line, out WorkerMessage message)
+    {
+        message = new WorkerMessage();
+        if (string.IsNullOrWhiteSpace(line) || !line.TrimStart().StartsWith('{'))
+            return false;
+
+        try
+        {
+            using var doc = JsonDocument.Parse(line);
+            var root = doc.RootElement;
+            if (root.ValueKind != JsonValueKind.Object || !root.TryGetProperty("type", out var type))
+                return false;
+
+            var timings = new Dictionary<string, double>();
+            if (root.TryGetProperty("timings", out var timingsElement) && timingsElement.ValueKind == JsonValueKind.Object)
+            {
+                foreach (var prop in timingsElement.EnumerateObject())
+                {
+                    if (prop.Value.ValueKind == JsonValueKind.Number)
+                        timings[prop.Name] = prop.Value.GetDouble();
+                }
+            }
+
+            message = new WorkerMessage
+            {
+                Type = type.GetString() ?? string.Empty,
+                Id = GetString(root, "id"),
+                Status = GetString(root, "status"),
+                Text = GetString(root, "text") ?? string.Empty,
+                Error = GetString(root, "error"),
+                Language = GetString(root, "language"),
+                LanguageProb = root.TryGetProperty("language_prob", out var prob) && prob.ValueKind == JsonValueKind.Number
+                    ? prob.GetDouble()
+                    : 0,
+                Timings = timings
+            };
+            return true;
+        }
+        catch (JsonException)
+        {
+            return false;
+        }
+    }
+
+    private static string? GetString(JsonElement root, string name)
+    {
+        return root.TryGetProperty(name, out var value) && value.ValueKind == JsonValueKind.String
+            ? value.GetString()
+            : null;
+    }
+}
@@ -288,6 +288,8 @@ public class VoicePasteController : IDisposable
         _clipboardPaster = CreateClipboardPaster(_settings);
 
         // Transcription changes apply for next transcription.
+        // The old worker is resident, so shut it down instead of leaking the loaded model.
+        _transcriptionService.Dispose();
         _transcriptionService = CreateTranscriptionService(_settings);
         _transcriptionService.CudaFallbackOccurred += (s, message) => 
         {
@@ -345,5 +347,6 @@ public class VoicePasteController : IDisposable
     {
         _audioRecorder?.Dispose();
         _hotkeyManager?.Dispose();
+        _transcriptionService?.Dispose();
     }
 }
@@ -0,0 +1,175 @@
+"""
+VoicePaste - Adaptive Beam
+Greedy search first, beam search only where it is needed (--adaptive-beam).
+
+Clear speech decodes the same with greedy search as with a beam of 5, at a
+fraction of the cost on CPU. In adaptive mode the whole clip is decoded
+greedily, and every segment that fails the fast path's confidence checks
+(fast_path.py: avg_logprob, no_speech_prob, compression ratio) is decoded
+again with the request's beam size. Neighbouring low-confidence segments are
+re-decoded together, over their span plus SPAN_PAD_SECONDS on each side
+(never into a kept segment), and the greedy segments are replaced by the
+beam search ones.
+
+- Segments come out in order and as they are decoded: a confident segment
+  goes straight through, unless one before it is still waiting for its
+  re-decode
+- Each segment carries 'beam' (1 or the beam size)
+- Time saved is an estimate: the greedy decode time scaled by the cost of
+  beam search relative to greedy, as measured on this worker's re-decodes
+  (per audio second, averaged over requests; DEFAULT_BEAM_COST until the
+  first one)
+"""
+import threading
+import time
+from types import SimpleNamespace
+
+from fast_path import MAX_COMPRESSION_RATIO, MAX_NO_SPEECH_PROB, MIN_AVG_LOGPROB
+
+# Audio added around a re-decoded span (seconds), so its first and last words aren't cut
+SPAN_PAD_SECONDS = 0.3
+
+# Beam search cost relative to greedy, per audio second, before any re-decode was measured
+DEFAULT_BEAM_COST = 2.0
+
+# Weight of the latest measurement in the running beam cost
+BEAM_COST_WEIGHT = 0.2
+
+
+def needs_beam(segment) -> bool:
+    """Whether a greedy segment (faster-whisper Segment) fails the confidence checks."""
+    return (
+        not segment.text.strip()
+        or segment.avg_logprob < MIN_AVG_LOGPROB
+        or segment.no_speech_prob > MAX_NO_SPEECH_PROB
+        or segment.compression_ratio > MAX_COMPRESSION_RATIO
+    )
+
+
+class BeamCost:
+    """Running ratio of beam search to greedy decode time per audio second."""
+
+    def __init__(self, default: float = DEFAULT_BEAM_COST, weight: float = BEAM_COST_WEIGHT):
+        self.ratio = default
+        self.measured = False
+        self._weight = weight
+        self._lock = threading.Lock()
+
+    def record(self, ratio: float) -> None:
+        with self._lock:
+            self.ratio = ratio if not self.measured else self.ratio + self._weight * (ratio - self.ratio)
+            self.measured = True
+
+
+# Shared by every request of the worker
+BEAM_COST = BeamCost()
+
+
+class AdaptiveDecode:
+    """
+    Segments of a greedy decode, low-confidence runs replaced by their beam
+    search re-decode; iterate it like model.transcribe()'s segments.
+
+    Args:
+        segments: Greedy segments (lazy generator from model.transcribe())
+        redecode: Callable (start_s, end_s) -> segments decoded with beam
+            search over that part of the audio, times relative to start_s
+        beam_size: Beam size of the re-decodes
+        audio_seconds: Length of the decoded audio
+    """
+
+    def __init__(self, segments, redecode, beam_size: int, audio_seconds: float, cost: BeamCost = BEAM_COST):
+        self._segments = segments
+        self._redecode = redecode
+        self.beam_size = beam_size
+        self.audio_seconds = audio_seconds
+        self._cost = cost
+        self.greedy_ms = 0.0
+        self.redecode_ms = 0.0
+        self.redecoded_seconds = 0.0
+        self.greedy_segments = 0
+        self.redecoded_segments = 0
+
+    def __iter__(self):
+        pending = []
+        kept_end = 0.0
+        segments = iter(self._segments)
+        while True:
+            start = time.perf_counter()
+            segment = next(segments, None)
+            self.greedy_ms += (time.perf_counter() - start) * 1000
+            if segment is None:
+                break
+            self.greedy_segments += 1
+            if needs_beam(segment):
+                pending.append(segment)
+                continue
+            if pending:
+                yield from self._replace(pending, kept_end, segment.start)
+                pending = []
+            kept_end = segment.end
+            yield _with_beam(segment, 1)
+        if pending:
+            yield from self._replace(pending, kept_end, self.audio_seconds)
+
+    def _replace(self, pending: list, floor: float, ceiling: float):
+        """Beam search segments for a run of low-confidence ones, within (floor, ceiling)."""
+        start = max(floor, pending[0].start - SPAN_PAD_SECONDS)
+        end = min(ceiling, pending[-1].end + SPAN_PAD_SECONDS)
+        if end <= start:
+            for segment in pending:
+                yield _with_beam(segment, 1)
+            return
+        decode_start = time.perf_counter()
+        segments = [
+            _with_beam(segment, self.beam_size, min(end, start + segment.start), min(end, start + segment.end))
+            for segment in self._redecode(start, end)
+        ]
+        self.redecode_ms += (time.perf_counter() - decode_start) * 1000
+        self.redecoded_seconds += end - start
+        self.redecoded_segments += len(pending)
+        yield from segments
+
+    def report(self) -> dict:
+        """The result's 'adaptive_beam' field; also updates the running beam cost."""
+        greedy_rate = self.greedy_ms / self.audio_seconds if self.audio_seconds else 0.0
+        if self.redecoded_seconds and greedy_rate:
+            self._cost.record((self.redecode_ms / self.redecoded_seconds) / greedy_rate)
+        estimated_ms = self.greedy_ms * self._cost.ratio
+        return {
+            "beam_size": self.beam_size,
+            "segments": self.greedy_segments,
+            "redecoded_segments": self.redecoded_segments,
+            "redecoded_seconds": round(self.redecoded_seconds, 3),
+            "greedy_ms": round(self.greedy_ms, 2),
+            "redecode_ms": round(self.redecode_ms, 2),
+            "estimated_beam_ms": round(estimated_ms, 2),
+            "saved_ms": round(estimated_ms - self.greedy_ms - self.redecode_ms, 2),
+            "beam_cost": round(self._cost.ratio, 3),
+        }
+
+
+def _with_beam(segment, beam: int, start: float | None = None, end: float | None = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        start=segment.start if start is None else start,
+        end=segment.end if end is None else end,
+        text=segment.text,
+        avg_logprob=segment.avg_logprob,
+        no_speech_prob=segment.no_speech_prob,
+        compression_ratio=segment.compression_ratio,
+        beam=beam,
+    )
+
+
+def combine_beam_reports(reports) -> dict | None:
+    """One 'adaptive_beam' result field for a recording decoded in parts: counts and times summed."""
+    reports = [report for report in reports if report is not None]
+    if not reports:
+        return None
+    combined = dict(reports[-1])
+    for key in (
+        "segments", "redecoded_segments", "redecoded_seconds", "greedy_ms", "redecode_ms", "estimated_beam_ms",
+        "saved_ms",
+    ):
+        combined[key] = round(sum(report[key] for report in reports), 3)
+    return combined
@@ -0,0 +1,57 @@
+"""
+VoicePaste - Audio Input
+In-memory PCM ingest for the worker: 16 kHz mono int16 little-endian PCM,
+as recorded by AudioRecorder, converted to the float32 samples Whisper expects.
+
+The conversion matches faster_whisper.decode_audio() bit for bit
+(int16 / 32768 in float32), so a PCM request decodes exactly like the
+same audio sent as a WAV path.
+"""
+import numpy as np
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+# Two hours of audio; larger frames are rejected (and skipped) by the worker.
+MAX_FRAME_BYTES = SAMPLE_RATE * BYTES_PER_SAMPLE * 60 * 60 * 2
+
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def pcm16_to_float32(pcm) -> np.ndarray:
+    """
+    Convert int16 PCM to float32 samples in [-1, 1).
+
+    `pcm` may be bytes, bytearray or memoryview. The int16 view shares its
+    memory; the float32 result is the only allocation.
+    """
+    samples = np.frombuffer(pcm, dtype="<i2")
+    return np.multiply(samples, _INT16_SCALE, dtype=np.float32)
+
+
+def read_frame(stream, size: int) -> bytearray:
+    """
+    Read exactly `size` payload bytes from a binary stream into one buffer.
+
+    Raises:
+        EOFError: The stream ended before the frame was complete
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = stream.readinto(view[received:])
+        if not count:
+            raise EOFError(f"Frame truncated: got {received} of {size} bytes")
+        received += count
+    return buffer
+
+
+def skip_frame(stream, size: int, chunk_size: int = 1 << 20) -> None:
+    """Discard `size` bytes without holding them in memory (keeps the stream in sync)."""
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(min(chunk_size, remaining))
+        if not chunk:
+            raise EOFError(f"Frame truncated: {remaining} bytes missing")
+        remaining -= len(chunk)
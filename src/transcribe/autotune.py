@@ -0,0 +1,228 @@
+"""
+VoicePaste - Compute-Type Auto-Tuning
+`--autotune CLIP` times every compute type the device supports, at a few
+cpu_threads settings, on a short reference clip, and saves the fastest one
+whose transcript still agrees with the most precise compute type into a
+per-machine profile. The worker loads that profile at startup unless
+--compute-type is given.
+
+Agreement is word-level similarity (difflib) between a candidate's text and
+the reference text; candidates below MIN_AGREEMENT are never picked.
+
+num_workers stays 1: the worker decodes one request at a time (batches go
+through one BatchedInferencePipeline call), so more workers would only hold
+more memory.
+
+Profile file (autotune.json in the worker cache dir):
+    {"version": 1, "profiles": {"<machine>|<model>|<device>": {
+        "compute_type": "int8", "cpu_threads": 8, "num_workers": 1,
+        "median_ms": 412.0, "agreement": 1.0, "created": "...", "candidates": [...]}}}
+"""
+import difflib
+import hashlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from cpu_config import available_cpus, default_cpu_threads, physical_cores
+from model_pool import default_compute_type
+
+PROFILE_VERSION = 1
+PROFILE_NAME = "autotune.json"
+
+# Candidate transcripts must match the reference this closely (0..1).
+MIN_AGREEMENT = 0.9
+
+# Most precise first; the first supported one is the accuracy reference.
+COMPUTE_TYPES = {
+    "cuda": ("float32", "float16", "bfloat16", "int8_float16", "int8_bfloat16", "int8_float32", "int8"),
+    "cpu": ("float32", "int8_float32", "int8"),
+}
+
+
+def machine_id() -> str:
+    """Short hash identifying this machine's CPU/OS and CTranslate2 build."""
+    try:
+        from importlib import metadata
+
+        ct2 = metadata.version("ctranslate2")
+    except Exception:
+        ct2 = "unknown"
+    parts = (platform.node(), platform.machine(), platform.processor(), str(os.cpu_count()), ct2)
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def profile_key(model: str, device: str) -> str:
+    return f"{machine_id()}|{model}|{device}"
+
+
+def load_profile(path: Path, model: str, device: str) -> dict | None:
+    """Tuned settings for this machine, model and device, or None."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != PROFILE_VERSION:
+        return None
+    entry = data.get("profiles", {}).get(profile_key(model, device))
+    if not isinstance(entry, dict) or not isinstance(entry.get("compute_type"), str):
+        return None
+    return entry
+
+
+def save_profile(path: Path, model: str, device: str, entry: dict) -> None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != PROFILE_VERSION:
+            raise ValueError("old version")
+    except (OSError, ValueError, AttributeError):
+        data = {"version": PROFILE_VERSION, "profiles": {}}
+    data["profiles"][profile_key(model, device)] = entry
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def startup_settings(
+    path: Path,
+    model: str,
+    device: str,
+    compute_type: str | None = None,
+    cpu_threads: int | None = None,
+    num_workers: int | None = None,
+) -> dict:
+    """
+    compute_type/cpu_threads/num_workers to load the worker's model with.
+
+    An explicit compute_type wins; otherwise the tuned profile, otherwise
+    the device default. 'source' says which (cli/profile/default).
+    Explicit cpu_threads/num_workers override whichever was picked; on CPU,
+    cpu_threads 0 becomes one thread per physical core (cpu_config.py).
+    """
+    if compute_type:
+        settings = {"compute_type": compute_type, "cpu_threads": 0, "num_workers": 1, "source": "cli"}
+    elif (entry := load_profile(path, model, device)) is not None:
+        settings = {
+            "compute_type": entry["compute_type"],
+            "cpu_threads": int(entry.get("cpu_threads", 0)),
+            "num_workers": int(entry.get("num_workers", 1)),
+            "source": "profile",
+        }
+    else:
+        settings = {
+            "compute_type": default_compute_type(device), "cpu_threads": 0, "num_workers": 1, "source": "default",
+        }
+    if cpu_threads is not None:
+        settings["cpu_threads"] = cpu_threads
+    if num_workers is not None:
+        settings["num_workers"] = num_workers
+    if not settings["cpu_threads"]:
+        settings["cpu_threads"] = default_cpu_threads(device)
+    return settings
+
+
+def supported_compute_types(device: str) -> list[str]:
+    """Candidate compute types CTranslate2 supports on this device, most precise first."""
+    import ctranslate2
+
+    supported = ctranslate2.get_supported_compute_types(device)
+    return [ct for ct in COMPUTE_TYPES[device] if ct in supported]
+
+
+def thread_candidates(device: str) -> list[int]:
+    """cpu_threads values to try (0 = CTranslate2's default)."""
+    if device == "cuda":
+        return [0]
+    cores = physical_cores()
+    return sorted({max(1, cores // 4), max(1, cores // 2), cores, len(available_cpus())})
+
+
+def agreement(text: str, reference: str) -> float:
+    """Word-level similarity of two transcripts (1.0 = identical)."""
+    a, b = text.lower().split(), reference.lower().split()
+    if not a and not b:
+        return 1.0
+    return round(difflib.SequenceMatcher(None, a, b).ratio(), 4)
+
+
+def autotune(
+    model: str,
+    device: str,
+    audio,
+    transcribe,
+    loader,
+    compute_types: list[str] | None = None,
+    thread_counts: list[int] | None = None,
+    repeat: int = 3,
+) -> dict:
+    """
+    Time every (compute_type, cpu_threads) candidate and pick the fastest accurate one.
+
+    Args:
+        audio: Reference clip (float32 samples)
+        transcribe: (model, audio) -> text
+        loader: (model, device, compute_type, cpu_threads) -> loaded model
+        compute_types: Defaults to supported_compute_types(device)
+        thread_counts: Defaults to thread_candidates(device)
+
+    Returns:
+        Profile entry: chosen 'compute_type', 'cpu_threads', 'num_workers',
+        'median_ms', 'agreement', plus 'created' and every candidate's
+        result in 'candidates'
+
+    Raises:
+        RuntimeError: No candidate could be loaded
+    """
+    compute_types = compute_types or supported_compute_types(device)
+    thread_counts = thread_counts or thread_candidates(device)
+    candidates = []
+    for compute_type in compute_types:
+        for cpu_threads in thread_counts:
+            candidate = {"compute_type": compute_type, "cpu_threads": cpu_threads, "num_workers": 1}
+            try:
+                loaded = loader(model, device, compute_type, cpu_threads)
+                transcribe(loaded, audio)  # warmup
+                times, text = [], ""
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    text = transcribe(loaded, audio)
+                    times.append((time.perf_counter() - start) * 1000)
+                del loaded
+            except Exception as e:
+                candidate["error"] = f"{type(e).__name__}: {e}"
+                print(f"[Autotune] {compute_type} threads={cpu_threads}: FAILED {e}", file=sys.stderr, flush=True)
+                candidates.append(candidate)
+                continue
+            candidate["median_ms"] = round(statistics.median(times), 1)
+            candidate["text"] = text
+            print(
+                f"[Autotune] {compute_type} threads={cpu_threads}: {candidate['median_ms']}ms",
+                file=sys.stderr,
+                flush=True,
+            )
+            candidates.append(candidate)
+
+    usable = [c for c in candidates if "error" not in c]
+    if not usable:
+        raise RuntimeError("No compute type could be loaded: " + "; ".join(c["error"] for c in candidates))
+    # The most precise compute type that loaded is the reference
+    reference = usable[0]["text"]
+    for candidate in usable:
+        candidate["agreement"] = agreement(candidate.pop("text"), reference)
+    accurate = [c for c in usable if c["agreement"] >= MIN_AGREEMENT]
+    best = min(accurate, key=lambda c: c["median_ms"])
+    return {
+        "compute_type": best["compute_type"],
+        "cpu_threads": best["cpu_threads"],
+        "num_workers": best["num_workers"],
+        "median_ms": best["median_ms"],
+        "agreement": best["agreement"],
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "candidates": candidates,
+    }
@@ -0,0 +1,83 @@
+"""
+VoicePaste - Batched Decoding
+Decodes several queued requests in one faster-whisper BatchedInferencePipeline
+call. The clips are concatenated and passed as clip_timestamps, so each
+request becomes one chunk of the batch and the encoder/decoder run once for
+all of them.
+
+Only requests that decode identically can share a batch: same model, same
+language, prompt, hotwords, suppress tokens and beam size (batch_key), no
+VAD, and at most BATCH_MAX_SECONDS of audio (one chunk). Everything else runs
+on its own.
+"""
+from bisect import bisect_right
+from types import SimpleNamespace
+
+import numpy as np
+
+from audio_input import SAMPLE_RATE
+
+# Batched chunks are at most one Whisper window long.
+BATCH_MAX_SECONDS = 30.0
+
+
+def batch_key(plan: dict, beam_size: int) -> tuple:
+    """Requests with equal keys can be decoded in one batch."""
+    suppress_tokens = plan["suppress_tokens"]
+    return (
+        plan["language"],
+        plan["initial_prompt"],
+        plan.get("hotwords"),
+        tuple(suppress_tokens) if suppress_tokens else None,
+        beam_size,
+    )
+
+
+def decode_batch(model, audios: list, plan: dict, beam_size: int, batch_size: int) -> list[list]:
+    """
+    Decode several clips that share a plan (see transcribe.plan_transcription).
+
+    Args:
+        audios: float32 16kHz clips, each at most BATCH_MAX_SECONDS long
+        batch_size: Chunks per forward pass
+
+    Returns:
+        One list of segments per clip, with times relative to that clip
+    """
+    from faster_whisper import BatchedInferencePipeline
+
+    starts = []
+    clips = []
+    offset = 0
+    for audio in audios:
+        starts.append(offset / SAMPLE_RATE)
+        clips.append({"start": offset / SAMPLE_RATE, "end": (offset + len(audio)) / SAMPLE_RATE})
+        offset += len(audio)
+
+    pipeline = BatchedInferencePipeline(model)
+    segments, _ = pipeline.transcribe(
+        np.concatenate(audios),
+        language=plan["language"],
+        beam_size=beam_size,
+        initial_prompt=plan["initial_prompt"],
+        hotwords=plan.get("hotwords"),
+        suppress_tokens=plan["suppress_tokens"],
+        clip_timestamps=clips,
+        batch_size=batch_size,
+        vad_filter=False,
+    )
+
+    per_clip = [[] for _ in audios]
+    for seg in segments:
+        # Tolerate sample rounding in the pipeline's clip offsets
+        index = max(0, bisect_right(starts, seg.start + 0.01) - 1)
+        start = starts[index]
+        per_clip[index].append(SimpleNamespace(
+            text=seg.text,
+            start=round(max(0.0, seg.start - start), 3),
+            end=round(max(0.0, seg.end - start), 3),
+            avg_logprob=seg.avg_logprob,
+            no_speech_prob=seg.no_speech_prob,
+            compression_ratio=seg.compression_ratio,
+        ))
+    return per_clip
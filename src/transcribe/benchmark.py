@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+VoicePaste - Transcription Benchmark
+Runs transcribe_audio over a directory of WAV clips for every combination of
+the swept settings and writes latency/RTF statistics as JSON.
+
+Example (CPU, tiny model, two beam sizes):
+    python benchmark.py --clips ../../tests/samples --models tiny --beam-sizes 1,5 --output bench.json
+
+Each setting runs in its own subprocess by default, so model load time and
+peak RSS are not polluted by the settings before it.
+
+Thread scaling (CPU): --cpu-threads 1,2,4,auto runs each setting at those
+cpu_threads values; "thread_scaling" in the results lists throughput (audio
+seconds decoded per second) and speedup against the fewest threads.
+
+Process scaling (CPU, long recordings): --cpu-processes 1,2,4 splits every
+clip across that many worker processes (parallel_transcribe.py), each with
+--cpu-threads threads; "process_scaling" lists wall-clock throughput per
+process count and the cores it used.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Bump when the result JSON layout changes.
+RESULTS_VERSION = 1
+
+SWEEP_KEYS = ("model", "compute_type", "beam_size", "vad", "language_mode", "cpu_threads", "processes")
+
+
+def parse_list(value: str, cast=str) -> list:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def parse_on_off(value: str) -> bool:
+    value = value.lower()
+    if value in ("on", "true", "1", "yes"):
+        return True
+    if value in ("off", "false", "0", "no"):
+        return False
+    raise argparse.ArgumentTypeError(f"Expected on/off, got {value!r}")
+
+
+def parse_threads(value: str) -> int:
+    """A cpu_threads value; "auto" is one thread per physical core."""
+    if value.lower() == "auto":
+        from cpu_config import physical_cores
+
+        return physical_cores()
+    threads = int(value)
+    if threads < 1:
+        raise ValueError(f"cpu_threads must be >= 1, got {threads}")
+    return threads
+
+
+def parse_processes(value: str) -> int:
+    processes = int(value)
+    if processes < 1:
+        raise ValueError(f"processes must be >= 1, got {processes}")
+    return processes
+
+
+def expand_settings(sweep: dict) -> list[dict]:
+    """Cartesian product of the swept values, in SWEEP_KEYS order (keys missing from `sweep` are left out)."""
+    keys = [key for key in SWEEP_KEYS if key in sweep]
+    return [dict(zip(keys, values)) for values in itertools.product(*(sweep[key] for key in keys))]
+
+
+def find_clips(clips_dir: Path) -> list[dict]:
+    """WAV clips in a directory with their durations (read from the header only)."""
+    clips = []
+    for path in sorted(clips_dir.glob("*.wav")):
+        with wave.open(str(path), "rb") as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        clips.append({"name": path.name, "path": str(path), "duration_s": round(duration, 3)})
+    return clips
+
+
+def percentiles(values: list[float]) -> dict:
+    """p50/p95/p99 (linear interpolation), mean, min and max of a sample."""
+    if not values:
+        return {}
+    import numpy as np
+
+    data = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(data, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(data.mean()), 3),
+        "min": round(float(data.min()), 3),
+        "max": round(float(data.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB (None if unavailable)."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def load_model(setting: dict, device: str):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(
+        setting["model"], device=device, compute_type=setting["compute_type"],
+        cpu_threads=setting.get("cpu_threads", 0),
+    )
+
+
+def start_parallel(setting: dict, device: str):
+    """Process pool splitting every clip, for settings with processes > 1 (None otherwise)."""
+    if setting.get("processes", 1) < 2:
+        return None
+    from parallel_transcribe import ParallelTranscriber
+
+    key = (setting["model"], device, setting["compute_type"])
+    parallel = ParallelTranscriber(
+        setting["processes"], loader_args=(key, setting.get("cpu_threads", 0)), min_seconds=0.0
+    )
+    parallel.start()
+    return parallel
+
+
+def time_clip(model, clip: dict, setting: dict, parallel=None) -> dict:
+    """Transcribe one clip and time the first segment and the whole request."""
+    from transcribe import transcribe_audio
+
+    first_segment_at = []
+
+    def on_segment(segment):
+        if not first_segment_at:
+            first_segment_at.append(time.perf_counter())
+
+    start = time.perf_counter()
+    result = transcribe_audio(
+        Path(clip["path"]),
+        model,
+        language_mode=setting["language_mode"],
+        beam_size=setting["beam_size"],
+        enable_vad=setting["vad"],
+        on_segment=on_segment,
+        parallel=parallel,
+    )
+    end = time.perf_counter()
+
+    total_ms = (end - start) * 1000
+    return {
+        "clip": clip["name"],
+        "first_segment_ms": round((first_segment_at[0] - start) * 1000, 1) if first_segment_at else None,
+        "total_ms": round(total_ms, 1),
+        "rtf": round(total_ms / 1000 / clip["duration_s"], 4) if clip["duration_s"] else None,
+        "language": result["language"],
+        "language_route": result["language_route"],
+        "chars": len(result["text"]),
+    }
+
+
+def run_setting(
+    setting: dict, clips: list[dict], device: str, repeat: int, warmup: int, model_factory=None, parallel_factory=None
+) -> dict:
+    """
+    Benchmark one setting in the current process.
+
+    Args:
+        model_factory: (setting, device) -> model; defaults to load_model
+        parallel_factory: (setting, device) -> ParallelTranscriber or None;
+            defaults to start_parallel. Its start-up counts as model load time
+
+    Returns:
+        Dict with 'setting', 'model_load_ms', 'peak_rss_mb', 'runs', 'summary',
+        'throughput' (audio seconds per second of decoding) and 'error' (set
+        instead of runs/summary/throughput when the setting failed)
+    """
+    report = {"setting": setting, "device": device, "error": None}
+    parallel = None
+    try:
+        start = time.perf_counter()
+        model = (model_factory or load_model)(setting, device)
+        parallel = (parallel_factory or start_parallel)(setting, device)
+        report["model_load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        for _ in range(warmup):
+            if clips:
+                time_clip(model, clips[0], setting, parallel)
+
+        runs = [time_clip(model, clip, setting, parallel) for _ in range(repeat) for clip in clips]
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        report["peak_rss_mb"] = peak_rss_mb()
+        return report
+    finally:
+        if parallel is not None:
+            parallel.close()
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["runs"] = runs
+    report["summary"] = {
+        metric: percentiles([run[metric] for run in runs if run[metric] is not None])
+        for metric in ("first_segment_ms", "total_ms", "rtf")
+    }
+    decode_s = sum(run["total_ms"] for run in runs) / 1000
+    audio_s = repeat * sum(clip["duration_s"] for clip in clips)
+    report["throughput"] = round(audio_s / decode_s, 3) if decode_s else None
+    return report
+
+
+def scaling(reports: list[dict], key: str) -> list[dict]:
+    """
+    Throughput per value of `key` (cpu_threads or processes) for each otherwise identical setting.
+
+    'speedup' is relative to the smallest value, 'efficiency' is speedup per
+    added thread or process (1.0 = linear scaling), 'cores' the threads in use.
+    """
+    groups: dict[str, list[dict]] = {}
+    for report in reports:
+        setting = report["setting"]
+        if report.get("error") or not report.get("throughput") or key not in setting:
+            continue
+        rest = {name: value for name, value in setting.items() if name != key}
+        groups.setdefault(json.dumps(rest, sort_keys=True), []).append(report)
+
+    entries = []
+    for group_key, group in groups.items():
+        group.sort(key=lambda r: r["setting"][key])
+        base = group[0]
+        points = []
+        for report in group:
+            value = report["setting"][key]
+            speedup = report["throughput"] / base["throughput"]
+            points.append({
+                key: value,
+                "cores": report["setting"].get("cpu_threads", 0) * report["setting"].get("processes", 1) or None,
+                "throughput": report["throughput"],
+                "speedup": round(speedup, 3),
+                "efficiency": round(speedup / (value / base["setting"][key]), 3),
+            })
+        entries.append({"setting": json.loads(group_key), "points": points})
+    return entries
+
+
+def thread_scaling(reports: list[dict]) -> list[dict]:
+    """Throughput per cpu_threads value (see scaling)."""
+    return scaling(reports, "cpu_threads")
+
+
+def process_scaling(reports: list[dict]) -> list[dict]:
+    """Wall-clock throughput per process count (see scaling)."""
+    return scaling(reports, "processes")
+
+
+def run_setting_isolated(setting: dict, args: argparse.Namespace) -> dict:
+    """Run one setting in a fresh interpreter and read its report from stdout."""
+    command = [
+        sys.executable,
+        str(Path(__file__).resolve()),
+        "--clips", str(args.clips),
+        "--device", args.device,
+        "--repeat", str(args.repeat),
+        "--warmup", str(args.warmup),
+        "--run-setting", json.dumps(setting),
+    ]
+    env = dict(os.environ)
+    if setting.get("cpu_threads"):
+        # Size the OpenMP pool the same as CTranslate2's, as the worker does
+        env["OMP_NUM_THREADS"] = str(setting["cpu_threads"])
+    proc = subprocess.run(command, capture_output=True, text=True, encoding="utf-8", env=env)
+    if proc.returncode != 0:
+        return {"setting": setting, "device": args.device, "error": proc.stderr.strip()[-2000:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def machine_info() -> dict:
+    info = {
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        from cpu_config import available_cpus, physical_cores
+
+        info["physical_cores"] = physical_cores()
+        info["affinity"] = available_cpus()
+    except Exception:
+        pass
+    for package in ("faster_whisper", "ctranslate2"):
+        try:
+            module = __import__(package)
+            info[package] = getattr(module, "__version__", "unknown")
+        except ImportError:
+            info[package] = None
+    return info
+
+
+def print_summary(report: dict) -> None:
+    setting = " ".join(f"{key}={report['setting'][key]}" for key in SWEEP_KEYS if key in report["setting"])
+    if report.get("error"):
+        print(f"[Bench] {setting}: FAILED {report['error'].splitlines()[-1]}", file=sys.stderr, flush=True)
+        return
+    total = report["summary"].get("total_ms", {})
+    rtf = report["summary"].get("rtf", {})
+    print(
+        f"[Bench] {setting}: load={report['model_load_ms']}ms "
+        f"total p50/p95/p99={total.get('p50')}/{total.get('p95')}/{total.get('p99')}ms "
+        f"rtf p50={rtf.get('p50')} throughput={report['throughput']}x peak_rss={report['peak_rss_mb']}MB",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def print_scaling(entries: list[dict], key: str = "cpu_threads") -> None:
+    label, unit = ("threads", "t") if key == "cpu_threads" else ("processes", "p")
+    for entry in entries:
+        if len(entry["points"]) < 2:
+            continue
+        setting = " ".join(f"{name}={value}" for name, value in entry["setting"].items())
+        points = ", ".join(
+            f"{p[key]}{unit}={p['throughput']}x (x{p['speedup']}, eff {p['efficiency']})" for p in entry["points"]
+        )
+        print(f"[Bench] {label} {setting}: {points}", file=sys.stderr, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark faster-whisper transcription settings")
+    parser.add_argument("--clips", type=Path, required=True, help="Directory of 16kHz mono WAV clips")
+    parser.add_argument("--output", type=Path, help="Write results JSON here (default: stdout)")
+    parser.add_argument("--device", default="cpu", choices=["cuda", "cpu"], help="Device (default: cpu)")
+    parser.add_argument("--models", default="tiny", help="Comma-separated models (default: tiny)")
+    parser.add_argument("--compute-types", default="int8", help="Comma-separated compute types (default: int8)")
+    parser.add_argument("--beam-sizes", default="5", help="Comma-separated beam sizes (default: 5)")
+    parser.add_argument("--vad", default="off", help="Comma-separated on/off values (default: off)")
+    parser.add_argument("--language-modes", default="auto", help="Comma-separated language modes (default: auto)")
+    parser.add_argument(
+        "--cpu-threads", default="auto",
+        help="Comma-separated cpu_threads values (per process), auto = physical cores (default: auto)",
+    )
+    parser.add_argument(
+        "--cpu-processes", default="1",
+        help="Comma-separated process counts to split each clip across (default: 1, no splitting)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per clip (default: 3)")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed warmup runs per setting (default: 1)")
+    parser.add_argument("--in-process", action="store_true", help="Run all settings in this process")
+    parser.add_argument("--run-setting", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # Make `import transcribe` work when run from anywhere
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    if not args.clips.is_dir():
+        print(f"Error: clips directory not found: {args.clips}", file=sys.stderr)
+        return 1
+    clips = find_clips(args.clips)
+    if not clips:
+        print(f"Error: no .wav clips in {args.clips}", file=sys.stderr)
+        return 1
+
+    if args.run_setting:
+        # Child process of an isolated run: one setting, report on stdout
+        report = run_setting(json.loads(args.run_setting), clips, args.device, args.repeat, args.warmup)
+        print(json.dumps(report), flush=True)
+        return 0
+
+    try:
+        sweep = {
+            "model": parse_list(args.models),
+            "compute_type": parse_list(args.compute_types),
+            "beam_size": parse_list(args.beam_sizes, int),
+            "vad": parse_list(args.vad, parse_on_off),
+            "language_mode": parse_list(args.language_modes),
+            "cpu_threads": sorted(set(parse_list(args.cpu_threads, parse_threads))),
+            "processes": sorted(set(parse_list(args.cpu_processes, parse_processes))),
+        }
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    reports = []
+    for setting in expand_settings(sweep):
+        if args.in_process:
+            report = run_setting(setting, clips, args.device, args.repeat, args.warmup)
+        else:
+            report = run_setting_isolated(setting, args)
+        print_summary(report)
+        reports.append(report)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "clips": [{"name": c["name"], "duration_s": c["duration_s"]} for c in clips],
+        "repeat": args.repeat,
+        "warmup": args.warmup,
+        "results": reports,
+        "thread_scaling": thread_scaling(reports),
+        "process_scaling": process_scaling(reports),
+    }
+    print_scaling(results["thread_scaling"])
+    print_scaling(results["process_scaling"], "processes")
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+        print(f"[Bench] Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0 if all(not r.get("error") for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
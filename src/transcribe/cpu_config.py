@@ -0,0 +1,184 @@
+"""
+VoicePaste - CPU Threads and Affinity
+How many threads CTranslate2 decodes with on CPU, and which cores the worker
+may run on.
+
+CTranslate2's default (cpu_threads=0) lets OpenMP start one thread per
+logical core, so on a shared workstation two workers, or a worker and a
+build, fight over the same cores and hyper-threads. The worker instead
+defaults to one thread per physical core it is allowed to run on
+(--cpu-affinity narrows that set), and sets OMP_NUM_THREADS to match before
+ctranslate2 is imported, unless it is already set.
+
+Explicit settings win over the default: --cpu-threads/--num-workers on the
+command line, "cpu_threads"/"num_workers" per request (see worker_protocol.py).
+"""
+import os
+import sys
+from pathlib import Path
+
+# Thread-count variables read when the OpenMP runtime starts.
+THREAD_ENV = ("OMP_NUM_THREADS",)
+
+
+def parse_affinity(spec: str) -> list[int]:
+    """
+    CPU ids from a list like "0-3,6".
+
+    Raises:
+        ValueError: Malformed or empty list
+    """
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start, end = int(first), int(last or first)
+        if start < 0 or end < start:
+            raise ValueError(f"Invalid CPU range: {part!r}")
+        cpus.update(range(start, end + 1))
+    if not cpus:
+        raise ValueError("Empty CPU list")
+    return sorted(cpus)
+
+
+def available_cpus() -> list[int]:
+    """Logical CPU ids this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    if sys.platform == "win32":
+        mask = _windows_affinity_mask()
+        if mask:
+            return [cpu for cpu in range(mask.bit_length()) if mask >> cpu & 1]
+    return list(range(os.cpu_count() or 1))
+
+
+def set_affinity(cpus: list[int]) -> None:
+    """
+    Restrict this process (and the threads it starts later) to `cpus`.
+
+    Raises:
+        OSError: The OS refused the set, or affinity isn't supported here
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+        return
+    if sys.platform == "win32":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        mask = sum(1 << cpu for cpu in cpus)
+        if not kernel32.SetProcessAffinityMask(ctypes.c_void_p(kernel32.GetCurrentProcess()), ctypes.c_size_t(mask)):
+            raise OSError(f"SetProcessAffinityMask failed (error {kernel32.GetLastError()})")
+        return
+    raise OSError("CPU affinity is not supported on this platform")
+
+
+def physical_cores() -> int:
+    """Physical cores among available_cpus() (logical CPUs if the topology is unknown)."""
+    cpus = available_cpus()
+    if sys.platform.startswith("linux"):
+        cores = _linux_physical_cores(cpus)
+        if cores:
+            return cores
+    # Machine-wide counts: scale by the share of logical CPUs we may use
+    cores = None
+    try:
+        import psutil
+
+        cores = psutil.cpu_count(logical=False)
+    except ImportError:
+        if sys.platform == "win32":
+            cores = _windows_physical_cores()
+    logical = os.cpu_count() or len(cpus)
+    if not cores:
+        return len(cpus)
+    return max(1, min(cores, round(len(cpus) * cores / logical)))
+
+
+def default_cpu_threads(device: str) -> int:
+    """Threads to decode with when none are configured (0 = CTranslate2's default on CUDA)."""
+    if device == "cuda":
+        return 0
+    return physical_cores()
+
+
+def configure_environment(cpu_threads: int) -> dict:
+    """
+    Set THREAD_ENV to `cpu_threads` (or the physical core count) where unset.
+
+    Only takes effect before ctranslate2 is imported. Returns the values in
+    effect afterwards.
+    """
+    threads = str(cpu_threads or physical_cores())
+    for name in THREAD_ENV:
+        os.environ.setdefault(name, threads)
+    return {name: os.environ[name] for name in THREAD_ENV}
+
+
+def describe(cpu_threads: int, num_workers: int) -> dict:
+    """Thread settings and the CPUs they run on, for logs and the metrics op."""
+    cpus = available_cpus()
+    return {
+        "cpu_threads": cpu_threads,
+        "num_workers": num_workers,
+        "physical_cores": physical_cores(),
+        "logical_cpus": len(cpus),
+        "affinity": cpus,
+        "env": {name: os.environ.get(name) for name in THREAD_ENV},
+    }
+
+
+def _linux_physical_cores(cpus: list[int]) -> int | None:
+    # Each core lists its hyper-thread siblings; count the distinct lists
+    cores = set()
+    for cpu in cpus:
+        topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        for name in ("core_cpus_list", "thread_siblings_list"):
+            try:
+                cores.add((topology / name).read_text().strip())
+                break
+            except OSError:
+                continue
+        else:
+            return None
+    return len(cores) or None
+
+
+def _windows_affinity_mask() -> int | None:
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+    process_mask, system_mask = ctypes.c_size_t(), ctypes.c_size_t()
+    if not kernel32.GetProcessAffinityMask(
+        ctypes.c_void_p(kernel32.GetCurrentProcess()), ctypes.byref(process_mask), ctypes.byref(system_mask)
+    ):
+        return None
+    return process_mask.value
+
+
+def _windows_physical_cores() -> int | None:
+    import ctypes
+    from ctypes import wintypes
+
+    relation_processor_core = 0
+    kernel32 = ctypes.windll.kernel32
+    length = wintypes.DWORD(0)
+    kernel32.GetLogicalProcessorInformationEx(relation_processor_core, None, ctypes.byref(length))
+    if not length.value:
+        return None
+    buffer = ctypes.create_string_buffer(length.value)
+    if not kernel32.GetLogicalProcessorInformationEx(relation_processor_core, buffer, ctypes.byref(length)):
+        return None
+    # Variable-size records: {DWORD Relationship; DWORD Size; ...}, one per core
+    cores, offset = 0, 0
+    while offset < length.value:
+        size = int.from_bytes(buffer.raw[offset + 4:offset + 8], "little")
+        if not size:
+            break
+        cores += 1
+        offset += size
+    return cores or None
@@ -0,0 +1,134 @@
+"""
+VoicePaste - Energy VAD
+Dependency-free silence trimming: drops long pauses from 16 kHz float32 audio
+before decoding, without faster-whisper's Silero VAD (and its onnxruntime /
+torch requirements).
+
+Frames of FRAME_MS are classified as speech when their RMS energy is above
+both an absolute floor and an adaptive one (the quiet end of the recording
+plus a margin, capped at MAX_NOISE_FLOOR_DB: in a recording with few pauses
+the quiet end is speech, not silence). Speech is padded by `pad_ms` on each side; only pauses longer
+than `min_silence_ms` are removed, so natural gaps between words stay.
+
+trim_silence() returns the shortened audio and a TimestampMap that converts
+times in it back to times in the original recording.
+"""
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from audio_input import SAMPLE_RATE
+
+FRAME_MS = 30
+
+# Frames quieter than this are silence whatever the noise floor (dBFS).
+ABSOLUTE_FLOOR_DB = -55.0
+# Speech must be this far above the noise floor (dB).
+FLOOR_MARGIN_DB = 12.0
+# Percentile of frame energies taken as the noise floor.
+NOISE_PERCENTILE = 10
+# The adaptive floor never rises above this (dBFS), so quiet speech isn't cut when there are no real pauses.
+MAX_NOISE_FLOOR_DB = -40.0
+
+
+class TimestampMap:
+    """
+    Maps times in trimmed audio back to the original.
+
+    Args:
+        chunks: Kept (original_start, original_end) spans in seconds, in order
+    """
+
+    def __init__(self, chunks: list[tuple[float, float]]):
+        self.chunks = chunks
+        self._trimmed_starts = []
+        position = 0.0
+        for start, end in chunks:
+            self._trimmed_starts.append(position)
+            position += end - start
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        Original time for trimmed time `t`. A time on a chunk boundary maps to
+        the start of the later chunk, or with is_end=True to the end of the
+        earlier one.
+        """
+        if not self.chunks:
+            return t
+        find = bisect_left if is_end else bisect_right
+        index = min(max(find(self._trimmed_starts, t) - 1, 0), len(self.chunks) - 1)
+        start, end = self.chunks[index]
+        return round(min(start + t - self._trimmed_starts[index], end), 3)
+
+
+def frame_energies_db(audio: np.ndarray, frame_samples: int) -> np.ndarray:
+    """RMS energy per frame in dBFS (the trailing partial frame counts as zero-padded)."""
+    full = len(audio) // frame_samples
+    blocks = audio[:full * frame_samples].reshape(full, frame_samples)  # a view, no copy
+    power = np.einsum("ij,ij->i", blocks, blocks)
+    tail = audio[full * frame_samples:]
+    if len(tail):
+        power = np.append(power, np.dot(tail, tail))
+    return 10.0 * np.log10(power / frame_samples + 1e-10)
+
+
+def speech_mask(energies_db: np.ndarray) -> np.ndarray:
+    adaptive = float(np.percentile(energies_db, NOISE_PERCENTILE)) + FLOOR_MARGIN_DB
+    floor = max(ABSOLUTE_FLOOR_DB, min(adaptive, MAX_NOISE_FLOOR_DB))
+    return energies_db > floor
+
+
+def trim_silence(
+    audio: np.ndarray,
+    min_silence_ms: int = 1000,
+    pad_ms: int = 200,
+) -> tuple[np.ndarray, TimestampMap, dict]:
+    """
+    Remove pauses longer than `min_silence_ms` (keeping `pad_ms` around speech).
+
+    Returns:
+        (trimmed audio, TimestampMap, stats) where stats has 'kept_seconds',
+        'dropped_seconds' and 'chunks'. Audio without any speech frames is
+        returned unchanged.
+    """
+    frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+    total_seconds = len(audio) / SAMPLE_RATE
+    unchanged = (audio, TimestampMap([(0.0, total_seconds)]), {
+        "kept_seconds": round(total_seconds, 3), "dropped_seconds": 0.0, "chunks": 1,
+    })
+    if len(audio) < frame_samples:
+        return unchanged
+
+    speech = speech_mask(frame_energies_db(audio, frame_samples))
+    if not speech.any():
+        return unchanged
+
+    # Pad speech on both sides (dilation by a box filter)
+    pad_frames = max(pad_ms // FRAME_MS, 0)
+    if pad_frames:
+        kernel = np.ones(2 * pad_frames + 1, dtype=np.int32)
+        keep = np.convolve(speech.astype(np.int32), kernel, mode="same") > 0
+    else:
+        keep = speech.copy()
+
+    # Fill gaps that are too short to be worth removing
+    min_gap_frames = max(min_silence_ms // FRAME_MS, 1)
+    edges = np.diff(np.concatenate(([1], keep.astype(np.int8), [1])))
+    gap_starts = np.flatnonzero(edges == -1)
+    gap_ends = np.flatnonzero(edges == 1)
+    for start, end in zip(gap_starts, gap_ends):
+        if end - start < min_gap_frames and start > 0 and end < len(keep):
+            keep[start:end] = True
+
+    edges = np.diff(np.concatenate(([0], keep.astype(np.int8), [0])))
+    run_starts = [int(start) * frame_samples for start in np.flatnonzero(edges == 1)]
+    run_ends = [min(int(end) * frame_samples, len(audio)) for end in np.flatnonzero(edges == -1)]
+
+    trimmed = np.concatenate([audio[start:end] for start, end in zip(run_starts, run_ends)])
+    chunks = [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in zip(run_starts, run_ends)]
+    kept_seconds = len(trimmed) / SAMPLE_RATE
+    return trimmed, TimestampMap(chunks), {
+        "kept_seconds": round(kept_seconds, 3),
+        "dropped_seconds": round(total_seconds - kept_seconds, 3),
+        "chunks": len(chunks),
+    }
@@ -0,0 +1,44 @@
+"""
+VoicePaste - Short-Utterance Fast Path
+Confidence checks for tiered decoding: short clips are first decoded by a
+small draft model with greedy search, and the draft is only kept when every
+segment passes the checks below. Otherwise the request escalates to the main
+model.
+
+The limits are stricter than faster-whisper's own fallback thresholds
+(log_prob -1.0, no_speech 0.6, compression 2.4): a draft that merely avoids a
+temperature fallback is not good enough to skip the main model.
+"""
+
+# Clips up to this long (seconds) try the draft model first.
+FAST_PATH_MAX_SECONDS = 8.0
+
+# Per-segment acceptance limits for a draft.
+MIN_AVG_LOGPROB = -0.6
+MAX_NO_SPEECH_PROB = 0.5
+MAX_COMPRESSION_RATIO = 2.2
+
+
+def confidence_failures(
+    segments: list[dict],
+    min_avg_logprob: float = MIN_AVG_LOGPROB,
+    max_no_speech_prob: float = MAX_NO_SPEECH_PROB,
+    max_compression_ratio: float = MAX_COMPRESSION_RATIO,
+) -> list[str]:
+    """
+    Reasons a draft transcription should not be trusted (empty if it passes).
+
+    Args:
+        segments: Segment dicts from transcribe_audio, with 'text',
+            'avg_logprob', 'no_speech_prob' and 'compression_ratio'
+    """
+    if not any(s["text"] for s in segments):
+        return ["empty"]
+    reasons = []
+    if any(s["avg_logprob"] < min_avg_logprob for s in segments):
+        reasons.append("avg_logprob")
+    if any(s["no_speech_prob"] > max_no_speech_prob for s in segments):
+        reasons.append("no_speech_prob")
+    if any(s["compression_ratio"] > max_compression_ratio for s in segments):
+        reasons.append("compression_ratio")
+    return reasons
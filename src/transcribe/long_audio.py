@@ -0,0 +1,117 @@
+"""
+VoicePaste - Long Recordings
+Memory-mapped, windowed reading of the 16 kHz mono 16-bit WAV files written
+by AudioRecorder. The file is never decoded as a whole: windows of
+WINDOW_SECONDS are converted to float32 one at a time, so memory use is the
+same for a 5 minute and a 5 hour recording.
+
+Window ends are moved back to the quietest frame in the last CUT_SEARCH_SECONDS
+so a cut rarely lands inside a word.
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from audio_input import BYTES_PER_SAMPLE, SAMPLE_RATE, pcm16_to_float32
+from energy_vad import FRAME_MS, frame_energies_db
+
+WINDOW_SECONDS = 300.0
+CUT_SEARCH_SECONDS = 5.0
+
+
+def read_wav_header(path: Path) -> tuple[int, int] | None:
+    """
+    Locate the PCM data of a 16 kHz mono 16-bit WAV.
+
+    Returns:
+        (data offset, data size in bytes), or None for any other format (or
+        no WAV at all). A data size the writer never filled in (recording
+        still open or interrupted) is taken from the file size.
+    """
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+        pcm_format_ok = False
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, chunk_size = header[:4], struct.unpack("<I", header[4:])[0]
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                if len(fmt) < 16:
+                    return None
+                audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+                pcm_format_ok = (audio_format, channels, rate, bits) == (1, 1, SAMPLE_RATE, 8 * BYTES_PER_SAMPLE)
+                if chunk_size % 2:
+                    f.seek(1, 1)
+            elif chunk_id == b"data":
+                if not pcm_format_ok:
+                    return None
+                offset = f.tell()
+                size = chunk_size
+                if size == 0 or offset + size > file_size:
+                    size = file_size - offset
+                return offset, size - size % BYTES_PER_SAMPLE
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+
+def wav_seconds(path: Path) -> float | None:
+    """Duration of an AudioRecorder-format WAV from its header (None for other files)."""
+    header = read_wav_header(path)
+    if header is None:
+        return None
+    return header[1] / (SAMPLE_RATE * BYTES_PER_SAMPLE)
+
+
+def mmap_wav(path: Path) -> np.memmap:
+    """The int16 samples of an AudioRecorder-format WAV, memory-mapped read-only."""
+    header = read_wav_header(path)
+    if header is None:
+        raise ValueError(f"Not a 16kHz mono 16-bit PCM WAV: {path}")
+    offset, size = header
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(size // BYTES_PER_SAMPLE,))
+
+
+def quietest_cut(samples: np.ndarray, start: int, end: int) -> int:
+    """Sample index of the start of the quietest frame in samples[start:end]."""
+    frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+    region = pcm16_to_float32(samples[start:end])
+    if len(region) < frame_samples:
+        return end
+    full = len(region) // frame_samples
+    energies = frame_energies_db(region[:full * frame_samples], frame_samples)
+    return start + int(np.argmin(energies)) * frame_samples
+
+
+def iter_wav_windows(path: Path, window_s: float = WINDOW_SECONDS, search_s: float = CUT_SEARCH_SECONDS):
+    """
+    Yield (offset in seconds, float32 samples) windows covering the whole file.
+
+    Only the current window is held in memory; the file itself stays mapped.
+    """
+    samples = mmap_wav(path)
+    total = len(samples)
+    window = int(window_s * SAMPLE_RATE)
+    search = int(min(search_s, window_s / 2) * SAMPLE_RATE)
+    start = 0
+    try:
+        while start < total:
+            end = min(start + window, total)
+            if end < total and search:
+                end = quietest_cut(samples, end - search, end)
+            yield start / SAMPLE_RATE, pcm16_to_float32(samples[start:end])
+            start = end
+    finally:
+        # Release the mapping (matters on Windows, where a mapped file can't be deleted)
+        mapping = getattr(samples, "_mmap", None)
+        del samples
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass
@@ -0,0 +1,110 @@
+"""
+VoicePaste - Worker Metrics
+Per-stage timing for a single request and running aggregates across requests.
+
+Stage names used by transcribe_audio (and the worker, for queue, model_load
+and batch_decode):
+    queue            waiting in the worker's request queue
+    cache_lookup     hashing the audio and looking up the result cache (see result_cache.py)
+    model_load       loading a model that wasn't warm in the pool
+    audio_load       decoding the WAV file to float32 samples (window reads for long files)
+    silence_trim     energy VAD removing long pauses (see energy_vad.py)
+    suppress_tokens  building the Russian suppress-token list (cached after first use)
+    prompt_encode    tokenizing the initial prompt, dictation context and hotwords (cached, see prompt_cache.py)
+    language_detect  language detection pass (when the language isn't fixed)
+    prepare          model.transcribe() setup: VAD (when enabled) and feature extraction
+    decode           iterating segments; per-segment times are in 'segment_decode_ms' (includes
+                     adaptive beam re-decodes, see adaptive_beam.py)
+    postprocess      per-segment clean-up (see postprocess.py) and joining the segments
+    vocabulary       per-segment --vocabulary corrections (see vocabulary.py)
+    fast_path_draft  a fast-path draft decode that was escalated (see fast_path.py)
+    batch_decode     the shared batched decode a request was part of (see batching.py)
+    parallel_decode  chunk decodes of a long CPU recording on the process pool (see parallel_transcribe.py)
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Accumulates wall-clock milliseconds per named stage for one request."""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def as_dict(self) -> dict:
+        return {name: round(ms, 2) for name, ms in self.stages.items()}
+
+
+class MetricsAggregator:
+    """
+    Running per-stage statistics over the worker's lifetime.
+
+    Counts and totals cover every request; percentiles use the last `window`
+    samples of each stage so a long-lived worker reflects current behavior.
+    """
+
+    def __init__(self, window: int = 200):
+        self._window = window
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._audio_seconds = 0.0
+        self._totals: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        self._maxima: dict[str, float] = {}
+        self._recent: dict[str, deque] = {}
+
+    def record(self, stages: dict, audio_seconds: float | None = None) -> None:
+        with self._lock:
+            self._requests += 1
+            if audio_seconds:
+                self._audio_seconds += audio_seconds
+            for name, ms in stages.items():
+                self._totals[name] = self._totals.get(name, 0.0) + ms
+                self._counts[name] = self._counts.get(name, 0) + 1
+                self._maxima[name] = max(self._maxima.get(name, 0.0), ms)
+                self._recent.setdefault(name, deque(maxlen=self._window)).append(ms)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self._errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {}
+            for name, total in self._totals.items():
+                recent = sorted(self._recent[name])
+                stages[name] = {
+                    "count": self._counts[name],
+                    "total_ms": round(total, 2),
+                    "mean_ms": round(total / self._counts[name], 2),
+                    "p50_ms": round(_nearest_rank(recent, 50), 2),
+                    "p95_ms": round(_nearest_rank(recent, 95), 2),
+                    "max_ms": round(self._maxima[name], 2),
+                }
+            return {
+                "requests": self._requests,
+                "errors": self._errors,
+                "audio_seconds": round(self._audio_seconds, 3),
+                "stages": stages,
+            }
+
+
+def _nearest_rank(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, -(-len(sorted_values) * percentile // 100) - 1)
+    return sorted_values[int(index)]
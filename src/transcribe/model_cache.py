@@ -0,0 +1,220 @@
+"""
+VoicePaste - Model Cache
+Finds faster-whisper models in the Hugging Face cache by looking at the cache
+layout directly, without importing faster_whisper or huggingface_hub (together
+they take well over 100ms and pull in ctranslate2, tokenizers and av). Used by
+--check-model and the model pool's size estimates.
+
+Cache layout (huggingface_hub):
+    <hub cache>/models--Systran--faster-whisper-medium/
+        refs/main                  commit hash of the downloaded revision
+        snapshots/<hash>/model.bin symlinks (or copies on Windows) into blobs/
+        voicepaste-manifest.json   expected size/sha256 per file and revision,
+                                   written by our downloader (optional)
+
+check_model() reports per-file sizes against the manifest and, with
+verify=True, sha256 checksums against the manifest or the blob name (LFS
+blobs are named after their sha256).
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+# Model names faster-whisper accepts, as in faster_whisper.utils._MODELS.
+MODEL_REPOS = {
+    "tiny.en": "Systran/faster-whisper-tiny.en",
+    "tiny": "Systran/faster-whisper-tiny",
+    "base.en": "Systran/faster-whisper-base.en",
+    "base": "Systran/faster-whisper-base",
+    "small.en": "Systran/faster-whisper-small.en",
+    "small": "Systran/faster-whisper-small",
+    "medium.en": "Systran/faster-whisper-medium.en",
+    "medium": "Systran/faster-whisper-medium",
+    "large-v1": "Systran/faster-whisper-large-v1",
+    "large-v2": "Systran/faster-whisper-large-v2",
+    "large-v3": "Systran/faster-whisper-large-v3",
+    "large": "Systran/faster-whisper-large-v3",
+    "distil-large-v2": "Systran/faster-distil-whisper-large-v2",
+    "distil-medium.en": "Systran/faster-distil-whisper-medium.en",
+    "distil-small.en": "Systran/faster-distil-whisper-small.en",
+    "distil-large-v3": "Systran/faster-distil-whisper-large-v3",
+    "distil-large-v3.5": "distil-whisper/distil-large-v3.5-ct2",
+    "large-v3-turbo": "mobiuslabsgmbh/faster-whisper-large-v3-turbo",
+    "turbo": "mobiuslabsgmbh/faster-whisper-large-v3-turbo",
+}
+
+# Files WhisperModel can't load without; a vocabulary.* file is needed as well.
+REQUIRED_FILES = ("config.json", "model.bin")
+
+MANIFEST_NAME = "voicepaste-manifest.json"
+
+_SHA256_NAME = re.compile(r"[0-9a-f]{64}")
+
+
+def hub_cache_dir() -> Path:
+    """The Hugging Face hub cache, resolved from the same variables huggingface_hub reads."""
+    for var in ("HF_HUB_CACHE", "HUGGINGFACE_HUB_CACHE"):
+        if os.environ.get(var):
+            return Path(os.environ[var])
+    if os.environ.get("HF_HOME"):
+        return Path(os.environ["HF_HOME"]) / "hub"
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "huggingface" / "hub"
+
+
+def repo_id_for(model: str) -> str:
+    """
+    Hub repository of a model name or id.
+
+    Raises:
+        ValueError: Unknown model name
+    """
+    if "/" in model:
+        return model
+    try:
+        return MODEL_REPOS[model]
+    except KeyError:
+        raise ValueError(f"Invalid model size '{model}', expected one of: {', '.join(MODEL_REPOS)}") from None
+
+
+def is_complete(path: Path) -> bool:
+    """True if a model directory has every file needed to load it (symlink targets included)."""
+    if not all((path / name).is_file() for name in REQUIRED_FILES):
+        return False
+    return any(path.glob("vocabulary.*"))
+
+
+def repo_cache_dir(model: str, cache_dir: Path | None = None) -> Path:
+    """models--<org>--<name> directory of a model in the hub cache (may not exist)."""
+    return (cache_dir or hub_cache_dir()) / ("models--" + repo_id_for(model).replace("/", "--"))
+
+
+def find_cached_model(model: str, cache_dir: Path | None = None) -> Path | None:
+    """
+    Directory of a complete local copy of `model`, or None.
+
+    Args:
+        model: Model name (e.g. medium), hub id, or a local model directory
+        cache_dir: Hub cache to look in; defaults to hub_cache_dir()
+
+    Raises:
+        ValueError: Unknown model name
+    """
+    path = Path(model)
+    if path.is_dir():
+        return path if is_complete(path) else None
+
+    repo_dir = repo_cache_dir(model, cache_dir)
+    snapshots = repo_dir / "snapshots"
+    try:
+        main = (repo_dir / "refs" / "main").read_text().strip()
+    except OSError:
+        main = None
+    if main and is_complete(snapshots / main):
+        return snapshots / main
+
+    # No usable refs/main (e.g. downloaded at a pinned revision): newest complete snapshot
+    try:
+        candidates = sorted(snapshots.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True)
+    except OSError:
+        return None
+    return next((p for p in candidates if p.is_dir() and is_complete(p)), None)
+
+
+def read_manifest(repo_dir: Path) -> dict:
+    """{revision: {file name: {"size", "sha256"}}} from the repo's manifest ({} if none)."""
+    try:
+        manifest = json.loads((repo_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(repo_dir: Path, revision: str, files: dict) -> None:
+    """Record expected {name: {"size", "sha256"}} for a downloaded revision."""
+    manifest = read_manifest(repo_dir)
+    manifest[revision] = files
+    repo_dir.mkdir(parents=True, exist_ok=True)
+    tmp = repo_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, repo_dir / MANIFEST_NAME)
+
+
+def sha256_file(path: Path, chunk_bytes: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_model(model: str, cache_dir: Path | None = None, verify: bool = False) -> dict:
+    """
+    Check a model's local copy without loading it.
+
+    Args:
+        verify: Also hash every file (slow for large models: seconds per GB)
+
+    Returns:
+        {"model", "repo_id", "present", "path", "revision", "files", "missing",
+        "elapsed_ms"}. "files" maps each file of the snapshot to {"size",
+        "expected_size", "sha256" (verify only), "ok", "error"}; "present"
+        requires every needed file with no size or checksum mismatch.
+    """
+    start = time.perf_counter()
+    report = {
+        "model": model, "repo_id": None, "present": False, "path": None, "revision": None,
+        "files": {}, "missing": [],
+    }
+    try:
+        path = find_cached_model(model, cache_dir)
+        local_dir = Path(model).is_dir()
+        if not local_dir:
+            report["repo_id"] = repo_id_for(model)
+    except ValueError as e:
+        report["error"] = str(e)
+        report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return report
+
+    if path is None:
+        report["missing"] = list(REQUIRED_FILES) + ["vocabulary.*"]
+    else:
+        report["path"] = str(path)
+        expected = {}
+        if not local_dir:
+            report["revision"] = path.name
+            expected = read_manifest(repo_cache_dir(model, cache_dir)).get(path.name, {})
+        for name in sorted(set(expected) | {p.name for p in path.iterdir() if p.is_file()}):
+            report["files"][name] = _check_file(path / name, expected.get(name, {}), verify)
+        report["missing"] = [name for name, entry in report["files"].items() if entry["error"] == "missing"]
+        report["present"] = all(entry["ok"] for entry in report["files"].values())
+    report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return report
+
+
+def _check_file(path: Path, expected: dict, verify: bool) -> dict:
+    entry = {"size": None, "expected_size": expected.get("size"), "ok": False, "error": None}
+    try:
+        entry["size"] = path.stat().st_size
+    except OSError:
+        entry["error"] = "missing"
+        return entry
+    if entry["expected_size"] is not None and entry["size"] != entry["expected_size"]:
+        entry["error"] = "size mismatch"
+        return entry
+    if entry["size"] == 0:
+        entry["error"] = "empty"
+        return entry
+    if verify:
+        entry["sha256"] = sha256_file(path)
+        known = expected.get("sha256")
+        if known is None and path.is_symlink() and _SHA256_NAME.fullmatch(Path(os.readlink(path)).name):
+            known = Path(os.readlink(path)).name
+        if known is not None and entry["sha256"] != known:
+            entry["error"] = "checksum mismatch"
+            return entry
+    entry["ok"] = True
+    return entry
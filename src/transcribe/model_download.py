@@ -0,0 +1,347 @@
+"""
+VoicePaste - Model Download
+Resumable, parallel download of faster-whisper models into the Hugging Face
+cache, using only the standard library (no huggingface_hub import).
+
+- File list, sizes and hashes come from the Hub API ({endpoint}/api/models/
+  {repo}/revision/{revision}?blobs=true); HF_ENDPOINT points it at a mirror
+  or a local test server, HF_TOKEN is sent as a bearer token
+- Each file is fetched in CHUNK_BYTES ranges by `workers` threads into
+  blobs/<id>.incomplete; finished chunks are recorded in
+  blobs/<id>.incomplete.parts, so a dropped connection only re-fetches the
+  chunks that weren't done
+- Files are verified before they are moved into place: sha256 for LFS files,
+  the git blob sha1 otherwise, and the size for both
+- The result is the normal cache layout (blobs/, snapshots/<commit>/,
+  refs/main) plus voicepaste-manifest.json, so faster-whisper loads it and
+  model_cache.check_model() can check sizes and checksums later
+
+Progress is reported as PROGRESS lines (see ProgressReporter).
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
+from http.client import HTTPException
+from pathlib import Path
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from model_cache import repo_cache_dir, repo_id_for, write_manifest
+
+DEFAULT_ENDPOINT = "https://huggingface.co"
+
+# Files faster-whisper needs (as in faster_whisper.utils.download_model).
+ALLOW_PATTERNS = ("config.json", "preprocessor_config.json", "model.bin", "tokenizer.json", "vocabulary.*")
+
+CHUNK_BYTES = 16 * 1024 * 1024
+READ_BYTES = 256 * 1024
+ATTEMPTS = 4
+RETRY_DELAY_S = 1.0
+TIMEOUT_S = 30.0
+
+
+class DownloadError(RuntimeError):
+    """A file could not be downloaded or failed verification."""
+
+
+class RangeNotSupported(Exception):
+    """The server ignored a Range request (answered 200 instead of 206)."""
+
+
+class ProgressReporter:
+    """
+    Thread-safe byte counter that prints progress lines, at most every
+    `interval_s` (and always at 100% of a file):
+
+        PROGRESS {"file": "model.bin", "downloaded": 1048576, "total": 1617824864,
+                  "percent": 0.1, "overall_downloaded": ..., "overall_total": ...,
+                  "bytes_per_s": 52428800}
+
+    Args:
+        total: Bytes of all files still to download
+        emit: Called with each line; defaults to printing on stdout
+    """
+
+    def __init__(self, total: int, emit=None, interval_s: float = 0.25):
+        self.total = total
+        self.emit = emit or (lambda line: print(line, flush=True))
+        self.interval_s = interval_s
+        self.overall = 0
+        self._files: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._last = 0.0
+
+    def start_file(self, name: str, total: int, done: int = 0) -> None:
+        with self._lock:
+            self._files[name] = [done, total]
+            self.overall += done
+        self._report(name, force=True)
+
+    def restart_file(self, name: str) -> None:
+        """Forget a file's progress (it is being fetched again from the start)."""
+        with self._lock:
+            self.overall -= self._files[name][0]
+            self._files[name][0] = 0
+
+    def add(self, name: str, count: int) -> None:
+        with self._lock:
+            self._files[name][0] += count
+            self.overall += count
+        self._report(name)
+
+    def _report(self, name: str, force: bool = False) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            downloaded, total = self._files[name]
+            if not force and downloaded < total and now - self._last < self.interval_s:
+                return
+            self._last = now
+            elapsed = max(now - self._start, 1e-6)
+            line = "PROGRESS " + json.dumps({
+                "file": name,
+                "downloaded": downloaded,
+                "total": total,
+                "percent": round(100.0 * downloaded / total, 1) if total else 100.0,
+                "overall_downloaded": self.overall,
+                "overall_total": self.total,
+                "bytes_per_s": int(self.overall / elapsed),
+            })
+            self.emit(line)
+
+
+def endpoint() -> str:
+    return os.environ.get("HF_ENDPOINT", DEFAULT_ENDPOINT).rstrip("/")
+
+
+def _headers() -> dict:
+    token = os.environ.get("HF_TOKEN") or os.environ.get("HUGGING_FACE_HUB_TOKEN")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def fetch_repo_info(repo_id: str, revision: str = "main") -> dict:
+    """Commit sha and file list of a model repo: {"sha", "files": [{"name", "size", "blob_id", "sha256"}]}."""
+    url = f"{endpoint()}/api/models/{repo_id}/revision/{quote(revision, safe='')}?blobs=true"
+    with urlopen(Request(url, headers=_headers()), timeout=TIMEOUT_S) as resp:
+        info = json.loads(resp.read().decode("utf-8"))
+    files = []
+    for sibling in info.get("siblings", []):
+        name = sibling["rfilename"]
+        if not any(fnmatch(name, pattern) for pattern in ALLOW_PATTERNS):
+            continue
+        lfs = sibling.get("lfs") or {}
+        files.append({
+            "name": name,
+            "size": lfs.get("size", sibling.get("size")),
+            "blob_id": lfs.get("sha256") or sibling.get("blobId"),
+            "sha256": lfs.get("sha256"),
+        })
+    if not files:
+        raise DownloadError(f"No model files found in {repo_id}@{revision}")
+    return {"sha": info["sha"], "files": files}
+
+
+def chunk_ranges(size: int, chunk_bytes: int) -> list[tuple[int, int]]:
+    """Inclusive (start, end) byte ranges covering `size` bytes."""
+    return [(start, min(start + chunk_bytes, size) - 1) for start in range(0, size, chunk_bytes)]
+
+
+def download_model(
+    model: str,
+    cache_dir: Path | None = None,
+    revision: str = "main",
+    workers: int = 4,
+    chunk_bytes: int = CHUNK_BYTES,
+    emit=None,
+) -> Path:
+    """
+    Download (or finish downloading) a model into the hub cache.
+
+    Args:
+        model: Model name (e.g. large-v3-turbo) or hub id
+        workers: Parallel range requests per file
+        emit: Progress line callback (see ProgressReporter)
+
+    Returns:
+        The snapshot directory
+
+    Raises:
+        DownloadError: A file failed after all retries or didn't verify
+        ValueError: Unknown model name
+    """
+    repo_id = repo_id_for(model)
+    repo_dir = repo_cache_dir(model, cache_dir)
+    info = fetch_repo_info(repo_id, revision)
+    commit = info["sha"]
+    snapshot = repo_dir / "snapshots" / commit
+    blobs = repo_dir / "blobs"
+    snapshot.mkdir(parents=True, exist_ok=True)
+    blobs.mkdir(parents=True, exist_ok=True)
+
+    pending = [f for f in info["files"] if not _is_in_place(snapshot / f["name"], f)]
+    progress = ProgressReporter(sum(f["size"] for f in pending), emit)
+    for file in pending:
+        url = f"{endpoint()}/{repo_id}/resolve/{commit}/{quote(file['name'])}"
+        blob = blobs / file["blob_id"]
+        if not (blob.is_file() and blob.stat().st_size == file["size"]):
+            _download_file(url, blob, file, workers, chunk_bytes, progress)
+        else:
+            progress.start_file(file["name"], file["size"], file["size"])
+        _link_into_snapshot(blob, snapshot / file["name"])
+
+    write_manifest(repo_dir, commit, {
+        f["name"]: {"size": f["size"], "sha256": f["sha256"]} if f["sha256"] else {"size": f["size"]}
+        for f in info["files"]
+    })
+    if revision == "main" or revision == commit:
+        (repo_dir / "refs").mkdir(exist_ok=True)
+        (repo_dir / "refs" / "main").write_text(commit)
+    return snapshot
+
+
+def _is_in_place(path: Path, file: dict) -> bool:
+    try:
+        return path.stat().st_size == file["size"]
+    except OSError:
+        return False
+
+
+def _download_file(url: str, blob: Path, file: dict, workers: int, chunk_bytes: int, progress) -> None:
+    partial = blob.with_name(blob.name + ".incomplete")
+    parts_path = blob.with_name(blob.name + ".incomplete.parts")
+    size = file["size"]
+    ranges = chunk_ranges(size, chunk_bytes)
+
+    done = _read_parts(parts_path, partial, size, chunk_bytes)
+    if not partial.exists() or partial.stat().st_size != size:
+        with open(partial, "wb") as f:
+            f.truncate(size)
+        done = set()
+    progress.start_file(file["name"], size, sum(end - start + 1 for i, (start, end) in enumerate(ranges) if i in done))
+    if done:
+        print(f"[Download] Resuming {file['name']}: {len(done)}/{len(ranges)} chunks done", file=sys.stderr, flush=True)
+
+    lock = threading.Lock()
+
+    def fetch(index: int) -> None:
+        start, end = ranges[index]
+        _fetch_with_retries(url, partial, start, end, file["name"], progress)
+        with lock:
+            done.add(index)
+            _write_parts(parts_path, done, size, chunk_bytes)
+
+    todo = [i for i in range(len(ranges)) if i not in done]
+    try:
+        if len(todo) > 1 and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download") as pool:
+                for future in [pool.submit(fetch, i) for i in todo]:
+                    future.result()
+        else:
+            for i in todo:
+                fetch(i)
+    except RangeNotSupported:
+        # Server can't do ranges: one plain GET of the whole file
+        print(f"[Download] No range support; fetching {file['name']} in one request", file=sys.stderr, flush=True)
+        progress.restart_file(file["name"])
+        _fetch_whole(url, partial, file["name"], progress)
+
+    _verify(partial, file)
+    os.replace(partial, blob)
+    parts_path.unlink(missing_ok=True)
+
+
+def _fetch_with_retries(url: str, path: Path, start: int, end: int, name: str, progress) -> None:
+    for attempt in range(1, ATTEMPTS + 1):
+        written = 0
+        try:
+            req = Request(url, headers={**_headers(), "Range": f"bytes={start}-{end}"})
+            with urlopen(req, timeout=TIMEOUT_S) as resp, open(path, "r+b") as f:
+                if resp.status != 206:
+                    raise RangeNotSupported()
+                f.seek(start)
+                while block := resp.read(READ_BYTES):
+                    if written + len(block) > end - start + 1:
+                        raise DownloadError(f"{name}: server sent more than the requested range")
+                    f.write(block)
+                    written += len(block)
+                    progress.add(name, len(block))
+            if written != end - start + 1:
+                raise OSError(f"short read ({written} of {end - start + 1} bytes)")
+            return
+        except (RangeNotSupported, DownloadError):
+            progress.add(name, -written)
+            raise
+        except (OSError, HTTPException) as e:
+            progress.add(name, -written)
+            if attempt == ATTEMPTS:
+                raise DownloadError(f"{name}: bytes {start}-{end} failed after {ATTEMPTS} attempts: {e}") from e
+            print(f"[Download] {name} bytes {start}-{end}: {e}; retrying", file=sys.stderr, flush=True)
+            time.sleep(RETRY_DELAY_S * attempt)
+
+
+def _fetch_whole(url: str, path: Path, name: str, progress) -> None:
+    try:
+        with urlopen(Request(url, headers=_headers()), timeout=TIMEOUT_S) as resp, open(path, "wb") as f:
+            while block := resp.read(READ_BYTES):
+                f.write(block)
+                progress.add(name, len(block))
+    except (OSError, HTTPException) as e:
+        raise DownloadError(f"{name}: {e}") from e
+
+
+def _verify(path: Path, file: dict) -> None:
+    size = path.stat().st_size
+    if size != file["size"]:
+        _discard(path)
+        raise DownloadError(f"{file['name']}: size {size}, expected {file['size']}")
+    if file["sha256"]:
+        digest, expected = hashlib.sha256(), file["sha256"]
+    elif file["blob_id"]:
+        # Git blob id: sha1 over "blob <size>\0" + content
+        digest, expected = hashlib.sha1(f"blob {size}\0".encode()), file["blob_id"]
+    else:
+        return
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    if digest.hexdigest() != expected:
+        _discard(path)
+        raise DownloadError(f"{file['name']}: checksum mismatch (got {digest.hexdigest()}, expected {expected})")
+
+
+def _discard(partial: Path) -> None:
+    partial.unlink(missing_ok=True)
+    partial.with_name(partial.name + ".parts").unlink(missing_ok=True)
+
+
+def _read_parts(parts_path: Path, partial: Path, size: int, chunk_bytes: int) -> set[int]:
+    """Chunk indices already written, if the record matches this file and chunking."""
+    try:
+        record = json.loads(parts_path.read_text())
+    except (OSError, ValueError):
+        return set()
+    if record.get("size") != size or record.get("chunk_bytes") != chunk_bytes or not partial.exists():
+        return set()
+    return set(record.get("done", []))
+
+
+def _write_parts(parts_path: Path, done: set[int], size: int, chunk_bytes: int) -> None:
+    tmp = parts_path.with_name(parts_path.name + ".tmp")
+    tmp.write_text(json.dumps({"size": size, "chunk_bytes": chunk_bytes, "done": sorted(done)}))
+    os.replace(tmp, parts_path)
+
+
+def _link_into_snapshot(blob: Path, target: Path) -> None:
+    """Symlink snapshots/<commit>/<name> to its blob, as huggingface_hub does; move it where symlinks aren't allowed."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.is_symlink() or target.exists():
+        target.unlink()
+    try:
+        target.symlink_to(os.path.relpath(blob, target.parent))
+    except OSError:
+        os.replace(blob, target)
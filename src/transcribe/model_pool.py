@@ -0,0 +1,276 @@
+"""
+VoicePaste - Model Pool
+Loaded WhisperModels kept warm in the resident worker, keyed by
+(model, device, compute_type), so requests can switch models without a reload.
+A request that asks for other thread settings than the worker's gets its own
+copy, keyed by (model, device, compute_type, cpu_threads, num_workers).
+
+Models that aren't pinned are evicted:
+- least recently used first, when the pool holds more than `max_models`
+- when adding one would exceed `memory_budget_mb` (estimated weight size)
+- after `idle_ttl_s` seconds without use (checked by a background sweeper)
+
+A pinned model counts towards `max_models` too: when no unpinned model is left
+to make room (max_models=1), it is evicted like the others, and loaded again,
+still pinned, when it is next asked for.
+
+Eviction only drops the pool's reference; a request that is still using the
+model keeps it alive until it finishes.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from model_cache import find_cached_model
+
+# Weight size relative to the float16 model.bin the faster-whisper repos ship.
+COMPUTE_TYPE_SCALE = {
+    "int8": 0.5,
+    "int8_float16": 0.5,
+    "int8_bfloat16": 0.5,
+    "int8_float32": 0.5,
+    "float16": 1.0,
+    "bfloat16": 1.0,
+    "float32": 2.0,
+}
+
+
+def default_compute_type(device: str) -> str:
+    return "float16" if device == "cuda" else "int8"
+
+
+def model_key(options: dict) -> tuple:
+    """(model, device, compute_type) for merged request options."""
+    device = options.get("device")
+    compute_type = options.get("compute_type") or (default_compute_type(device) if device else None)
+    return options.get("model"), device, compute_type
+
+
+def thread_key(options: dict, defaults: dict) -> tuple:
+    """
+    (cpu_threads, num_workers) a request asks for, or () when they are the
+    worker's own (cpu_threads 0 means the worker's).
+    """
+    base = (defaults.get("cpu_threads", 0), defaults.get("num_workers", 1))
+    threads = (options.get("cpu_threads") or base[0], options.get("num_workers", base[1]))
+    return () if threads == base else threads
+
+
+def load_whisper_model(key: tuple, cpu_threads: int = 0, num_workers: int = 1):
+    """Load the model for a pool key; a key's own thread settings override the arguments."""
+    from faster_whisper import WhisperModel
+
+    model, device, compute_type = key[:3]
+    if len(key) > 3:
+        cpu_threads, num_workers = key[3:]
+    return WhisperModel(
+        model, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers
+    )
+
+
+def estimate_model_mb(key: tuple) -> float | None:
+    """Approximate weight memory of a model from its cached model.bin (None if not cached)."""
+    model, _, compute_type = key[:3]
+    try:
+        path = Path(model)
+        if not path.is_dir():
+            path = find_cached_model(model)
+        size = (path / "model.bin").stat().st_size
+    except Exception:
+        return None
+    return round(size / (1024 * 1024) * COMPUTE_TYPE_SCALE.get(compute_type, 1.0), 1)
+
+
+class ModelPool:
+    """
+    LRU pool of loaded models.
+
+    Args:
+        loader: key -> model; defaults to load_whisper_model
+        max_models: Most models held at once (pinned ones included, and
+            evicted when nothing else makes room)
+        idle_ttl_s: Evict unpinned models unused for this long (0 disables)
+        memory_budget_mb: Cap on the summed size estimates (0 disables)
+        size_of: key -> estimated MB or None; defaults to estimate_model_mb
+    """
+
+    def __init__(
+        self,
+        loader=None,
+        max_models: int = 2,
+        idle_ttl_s: float = 600.0,
+        memory_budget_mb: float = 0,
+        size_of=None,
+    ):
+        if max_models < 1:
+            raise ValueError("max_models must be >= 1")
+        self._loader = loader or load_whisper_model
+        self._size_of = size_of or estimate_model_mb
+        self.max_models = max_models
+        self.idle_ttl_s = idle_ttl_s
+        self.memory_budget_mb = memory_budget_mb
+
+        # key -> {"model", "size_mb", "last_used", "uses", "pinned"}, least recently used first
+        self._entries: OrderedDict[tuple, dict] = OrderedDict()
+        self._pinned: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # one load at a time, so a key is never loaded twice
+        self._stop = threading.Event()
+        self._sweeper = None
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def put(self, key: tuple, model, pinned: bool = False) -> None:
+        """Add an already loaded model (e.g. the worker's startup model)."""
+        size_mb = self._size_of(key) if key[0] else None
+        with self._lock:
+            if pinned:
+                self._pinned.add(key)
+            self._entries[key] = self._entry(model, size_mb, pinned)
+            self._entries.move_to_end(key)
+
+    def get(self, key: tuple, timer=None):
+        """
+        Return the model for `key`, loading it (and evicting others) if needed.
+
+        Args:
+            timer: Optional StageTimer; a load is recorded as 'model_load'
+        """
+        model = self._lookup(key)
+        if model is not None:
+            return model
+        with self._load_lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            return self._load(key, timer)
+
+    def _lookup(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry["last_used"] = time.monotonic()
+            entry["uses"] += 1
+            self._entries.move_to_end(key)
+            return entry["model"]
+
+    def _load(self, key: tuple, timer):
+        # Loads happen on the request thread; make room first so two large
+        # models never have to fit at the same time.
+        size_mb = self._size_of(key)
+        with self._lock:
+            self._make_room(size_mb)
+        print(f"[Pool] Loading {format_key(key)} (~{size_mb or '?'}MB)", file=sys.stderr, flush=True)
+        start = time.perf_counter()
+        if timer is not None:
+            with timer.stage("model_load"):
+                model = self._loader(key)
+        else:
+            model = self._loader(key)
+        load_ms = int((time.perf_counter() - start) * 1000)
+        print(f"[Pool] Loaded {format_key(key)} in {load_ms}ms", file=sys.stderr, flush=True)
+
+        with self._lock:
+            self.loads += 1
+            self._entries[key] = self._entry(model, size_mb, pinned=key in self._pinned)
+            self._entries.move_to_end(key)
+        return model
+
+    def evict_idle(self, now: float | None = None) -> list[tuple]:
+        """Drop unpinned models idle for longer than idle_ttl_s; returns their keys."""
+        if not self.idle_ttl_s:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expired = [
+                key for key, entry in self._entries.items()
+                if not entry["pinned"] and now - entry["last_used"] >= self.idle_ttl_s
+            ]
+            for key in expired:
+                self._evict(key, "idle")
+        return expired
+
+    def start_sweeper(self, interval_s: float | None = None) -> None:
+        """Run evict_idle() periodically on a daemon thread (no-op without a TTL)."""
+        if not self.idle_ttl_s or self._sweeper is not None:
+            return
+        interval_s = interval_s or min(max(self.idle_ttl_s / 4, 1.0), 30.0)
+
+        def sweep():
+            while not self._stop.wait(interval_s):
+                self.evict_idle()
+
+        self._sweeper = threading.Thread(target=sweep, name="model-pool-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = [
+                {
+                    "model": key[0],
+                    "device": key[1],
+                    "compute_type": key[2],
+                    # None: the worker's thread settings
+                    "cpu_threads": key[3] if len(key) > 3 else None,
+                    "num_workers": key[4] if len(key) > 3 else None,
+                    "size_mb": entry["size_mb"],
+                    "idle_s": round(now - entry["last_used"], 1),
+                    "uses": entry["uses"],
+                    "pinned": entry["pinned"],
+                }
+                for key, entry in self._entries.items()
+            ]
+            return {"models": models, "loads": self.loads, "evictions": self.evictions}
+
+    @staticmethod
+    def _entry(model, size_mb, pinned: bool) -> dict:
+        return {"model": model, "size_mb": size_mb, "last_used": time.monotonic(), "uses": 0, "pinned": pinned}
+
+    def _make_room(self, size_mb: float | None) -> None:
+        """
+        Evict LRU unpinned models until one more (of size_mb) fits, then
+        pinned ones if the count is still at max_models. Caller holds the lock.
+        """
+        for key in [k for k, e in self._entries.items() if not e["pinned"]]:
+            over_count = len(self._entries) >= self.max_models
+            used_mb = sum(e["size_mb"] or 0 for e in self._entries.values())
+            over_budget = bool(self.memory_budget_mb and size_mb and used_mb + size_mb > self.memory_budget_mb)
+            if not over_count and not over_budget:
+                return
+            self._evict(key, "count" if over_count else "memory")
+        for key in [k for k, e in self._entries.items() if e["pinned"]]:
+            if len(self._entries) < self.max_models:
+                return
+            self._evict(key, "count")
+
+    def _evict(self, key: tuple, reason: str) -> None:
+        del self._entries[key]
+        self.evictions += 1
+        print(f"[Pool] Evicted {format_key(key)} ({reason})", file=sys.stderr, flush=True)
+
+
+def format_key(key: tuple) -> str:
+    model, device, compute_type = key[:3]
+    if len(key) > 3:
+        return f"{model} on {device} ({compute_type}, cpu_threads={key[3]}, num_workers={key[4]})"
+    return f"{model} on {device} ({compute_type})"
@@ -0,0 +1,402 @@
+"""
+VoicePaste - Parallel Long-Form Transcription (CPU)
+On CPU one WhisperModel decodes a 10 minute dictation in minutes, and more
+intra-op threads stop helping long before the cores run out. Long recordings
+are instead cut into chunks at silences and decoded by a pool of worker
+processes, each with its own model and a share of the cores, then stitched
+back together in order.
+
+- Cuts: every CHUNK_SECONDS, moved back to the quietest frame in the last
+  CUT_SEARCH_SECONDS (long_audio.quietest_cut), so they fall in pauses
+- Overlap: each chunk is decoded OVERLAP_SECONDS past its cut, so a word
+  running over the cut is complete in the earlier chunk
+- Seams: segments starting at or after the cut belong to the next chunk and
+  are dropped; words the next chunk repeats from the end of the previous
+  one (longest match, up to MAX_SEAM_WORDS) are removed
+- Language: detected once in the calling process, on the first 30s; every
+  chunk is decoded in it
+
+Audio is not copied to the workers: a WAV stays memory-mapped and each
+process maps the same file; samples go into one shared-memory block. Model
+weights can't be shared the same way: CTranslate2 copies them into its own
+allocations, so each process holds a full copy (they load from the same
+cached files, read once into the OS page cache). Memory use is about
+`processes` times the model size, outside ModelPool's budget, so the mode is
+off unless --cpu-processes asks for it.
+
+The pool starts on the first long request and stays up, so later ones don't
+pay the model loads again.
+"""
+import multiprocessing
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from adaptive_beam import combine_beam_reports
+from audio_input import SAMPLE_RATE, pcm16_to_float32
+from long_audio import CUT_SEARCH_SECONDS, mmap_wav, quietest_cut, wav_seconds
+from metrics import StageTimer
+from postprocess import join_segments
+from vocabulary import combine_reports
+
+CHUNK_SECONDS = 60.0
+OVERLAP_SECONDS = 1.0
+# Shorter recordings are decoded in the calling process
+PARALLEL_MIN_SECONDS = 120.0
+MAX_SEAM_WORDS = 8
+# --cpu-processes 0/auto never starts more (each process holds a model copy)
+MAX_AUTO_PROCESSES = 4
+# Audio the language is detected on
+DETECT_SECONDS = 30.0
+
+_WORD = re.compile(r"\w+")
+
+# Set in each worker process by _init_process
+_model = None
+
+
+def default_processes() -> int:
+    """Processes for --cpu-processes 0/auto: one per two physical cores, at most MAX_AUTO_PROCESSES (1 = off)."""
+    from cpu_config import physical_cores
+
+    return max(1, min(MAX_AUTO_PROCESSES, physical_cores() // 2))
+
+
+def plan_chunks(
+    samples: np.ndarray,
+    chunk_s: float = CHUNK_SECONDS,
+    overlap_s: float = OVERLAP_SECONDS,
+    search_s: float = CUT_SEARCH_SECONDS,
+) -> list[tuple[int, int, int]]:
+    """
+    Split int16 or float32 samples into chunks cut at quiet frames.
+
+    Returns:
+        (start, cut, end) sample indices per chunk: the chunk owns
+        [start, cut) and is decoded over [start, end), end = cut + overlap
+    """
+    total = len(samples)
+    chunk = int(chunk_s * SAMPLE_RATE)
+    search = int(min(search_s, chunk_s / 2) * SAMPLE_RATE)
+    overlap = int(overlap_s * SAMPLE_RATE)
+    chunks = []
+    start = 0
+    while start < total:
+        cut = min(start + chunk, total)
+        if cut < total and search:
+            region = samples[cut - search:cut]
+            if region.dtype != np.int16:
+                # quietest_cut reads int16 PCM
+                region = (np.clip(region, -1.0, 1.0) * 32767).astype(np.int16)
+            cut = cut - search + quietest_cut(region, 0, search)
+        chunks.append((start, cut, min(cut + overlap, total)))
+        start = cut
+    return chunks
+
+
+def _words(text: str) -> list[str]:
+    return [w.lower() for w in _WORD.findall(text)]
+
+
+def merge_seam(previous: list[dict], following: list[dict], cut_s: float) -> tuple[list[dict], list[dict]]:
+    """
+    Stitch two neighbouring chunks' segments (times in the whole file's timeline).
+
+    Returns:
+        (previous without the segments starting at/after the cut, following
+        without the words it repeats from the end of previous)
+    """
+    previous = [s for s in previous if s["start"] < cut_s]
+    if not previous or not following:
+        return previous, following
+    tail = _words(previous[-1]["text"])[-MAX_SEAM_WORDS:]
+    head_tokens = list(_WORD.finditer(following[0]["text"]))
+    head = [m.group().lower() for m in head_tokens[:MAX_SEAM_WORDS]]
+    repeated = 0
+    for k in range(min(len(tail), len(head)), 0, -1):
+        if tail[-k:] == head[:k]:
+            repeated = k
+            break
+    if not repeated:
+        return previous, following
+    rest = following[0]["text"][head_tokens[repeated - 1].end():].lstrip(" ,.;:!?…")
+    if rest:
+        following = [{**following[0], "text": rest}] + following[1:]
+    else:
+        following = following[1:]
+    return previous, following
+
+
+def _init_process(loader, loader_args) -> None:
+    global _model
+    _model = loader(*loader_args)
+
+
+def _ping() -> bool:
+    return _model is not None
+
+
+def _read_chunk(source: tuple, start: int, end: int) -> np.ndarray:
+    if source[0] == "wav":
+        samples = mmap_wav(Path(source[1]))
+        try:
+            return pcm16_to_float32(samples[start:end])
+        finally:
+            del samples
+    block = shared_memory.SharedMemory(name=source[1])
+    try:
+        return np.ndarray((source[2],), dtype=np.float32, buffer=block.buf)[start:end].copy()
+    finally:
+        block.close()
+
+
+def _decode_chunk(source: tuple, start: int, end: int, options: dict) -> dict:
+    """Worker process: transcribe one chunk with the process's model (times relative to the chunk)."""
+    from transcribe import transcribe_audio
+
+    audio = _read_chunk(source, start, end)
+    result = transcribe_audio(
+        audio,
+        _model,
+        language_mode=options["language_mode"],
+        beam_size=options["beam_size"],
+        custom_initial_prompt=options["initial_prompt"],
+        enable_vad=options["vad"],
+        language=options["language"],
+        trim_silence=options["trim_silence"],
+        postprocess=options["postprocess"],
+        context=options["context"],
+        context_tokens=options["context_tokens"],
+        adaptive_beam=options["adaptive_beam"],
+    )
+    keys = (
+        "segments", "segment_decode_ms", "duration_ms", "silence", "language", "language_prob", "vocabulary",
+        "adaptive_beam",
+    )
+    return {key: result[key] for key in keys}
+
+
+def default_loader(key: tuple, cpu_threads: int):
+    """Load the model in a worker process with its share of the threads."""
+    import os
+
+    from cpu_config import THREAD_ENV
+    from model_pool import load_whisper_model
+
+    # Inherited from the parent, which sized it for all the cores
+    for name in THREAD_ENV:
+        os.environ[name] = str(cpu_threads)
+    return load_whisper_model(key, cpu_threads)
+
+
+class ParallelTranscriber:
+    """
+    Process pool for long CPU transcriptions.
+
+    Args:
+        processes: Worker processes (each loads its own model)
+        loader: Picklable callable loading the model in a worker process
+        loader_args: Its arguments, e.g. ((model, "cpu", compute_type), cpu_threads)
+        min_seconds: Shorter audio isn't worth the pool (see wants())
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        loader=default_loader,
+        loader_args: tuple = (),
+        min_seconds: float = PARALLEL_MIN_SECONDS,
+        chunk_s: float = CHUNK_SECONDS,
+        overlap_s: float = OVERLAP_SECONDS,
+    ):
+        self.processes = processes
+        self.loader = loader
+        self.loader_args = loader_args
+        self.min_seconds = min_seconds
+        self.chunk_s = chunk_s
+        self.overlap_s = overlap_s
+        self._executor = None
+
+    def wants(self, audio) -> bool:
+        """Whether `audio` (WAV path or float32 samples) should be decoded in parallel."""
+        if self.processes < 2:
+            return False
+        seconds = wav_seconds(audio) if isinstance(audio, Path) else len(audio) / SAMPLE_RATE
+        return seconds is not None and seconds >= self.min_seconds
+
+    def start(self) -> None:
+        """Start the processes and load their models now instead of on the first request."""
+        executor = self._pool()
+        for future in [executor.submit(_ping) for _ in range(self.processes)]:
+            future.result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                # Spawn, not fork: the parent's model and threads must not be inherited
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process,
+                initargs=(self.loader, self.loader_args),
+            )
+        return self._executor
+
+    def transcribe(
+        self,
+        audio,
+        model,
+        language_mode: str = "auto",
+        beam_size: int = 5,
+        custom_initial_prompt: str = "",
+        enable_vad: bool = False,
+        language: str | None = None,
+        on_segment=None,
+        trim_silence: bool = False,
+        postprocess=None,
+        context: str = "",
+        context_tokens: int = 0,
+        adaptive_beam: bool = False,
+    ) -> dict:
+        """
+        transcribe_audio() for a long recording, decoded chunk by chunk across the pool.
+
+        `model` (in this process) only detects the language. Segments reach
+        on_segment in order, as soon as every chunk before them is done.
+
+        Returns:
+            transcribe_audio() result plus 'parallel' ({'processes', 'chunks',
+            'chunk_ms'}); timings['parallel_decode'] is the wall time of the
+            pool phase
+        """
+        from transcribe import plan_transcription
+
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        block = None
+        if isinstance(audio, Path):
+            with timer.stage("audio_load"):
+                samples = mmap_wav(audio)
+            source = ("wav", str(audio))
+        else:
+            samples = np.ascontiguousarray(audio, dtype=np.float32)
+            block = shared_memory.SharedMemory(create=True, size=max(samples.nbytes, 1))
+            np.ndarray(samples.shape, dtype=np.float32, buffer=block.buf)[:] = samples
+            source = ("shm", block.name, len(samples))
+        try:
+            chunks = plan_chunks(samples, self.chunk_s, self.overlap_s)
+            head = samples[:int(DETECT_SECONDS * SAMPLE_RATE)]
+            head = pcm16_to_float32(head) if head.dtype == np.int16 else head
+            plan = plan_transcription(
+                head, model, language_mode, custom_initial_prompt, enable_vad, language, timer, context, context_tokens
+            )
+            del head, samples
+            print(
+                f"[Parallel] {len(chunks)} chunks on {self.processes} processes, language {plan['language']}",
+                file=sys.stderr,
+                flush=True,
+            )
+            options = {
+                "language_mode": language_mode,
+                "beam_size": beam_size,
+                "initial_prompt": custom_initial_prompt,
+                "vad": enable_vad,
+                "language": plan["language"],
+                "trim_silence": trim_silence,
+                "postprocess": postprocess,
+                "context": context,
+                "context_tokens": context_tokens,
+                "adaptive_beam": adaptive_beam,
+            }
+            with timer.stage("parallel_decode"):
+                parts = self._decode(source, chunks, options, on_segment)
+        finally:
+            if block is not None:
+                block.close()
+                block.unlink()
+
+        segments = [segment for part in parts for segment in part["segments"]]
+        silence = None
+        for part in parts:
+            if part["silence"] is not None:
+                silence = silence or {"kept_seconds": 0.0, "dropped_seconds": 0.0, "chunks": 0}
+                for key in silence:
+                    silence[key] = round(silence[key] + part["silence"][key], 3)
+        # Left to model.transcribe() (auto mode with VAD): the first chunk's language
+        first = parts[0] if parts else {"language": None, "language_prob": 0.0}
+        language_prob = plan["detected_prob"] if plan["detected_prob"] is not None else first["language_prob"]
+        return {
+            "text": join_segments(segment["text"] for segment in segments),
+            "language": plan["language"] or first["language"],
+            "language_prob": language_prob,
+            "language_route": plan["route"],
+            "language_candidates": plan["candidates"],
+            "prompt": plan["prompt"],
+            "duration_ms": int((time.perf_counter() - start_time) * 1000),
+            "audio_seconds": round(chunks[-1][2] / SAMPLE_RATE, 3) if chunks else 0.0,
+            "segments": segments,
+            "timings": timer.as_dict(),
+            "segment_decode_ms": [ms for part in parts for ms in part["segment_decode_ms"]],
+            "silence": silence,
+            "vocabulary": combine_reports(part["vocabulary"] for part in parts),
+            "adaptive_beam": combine_beam_reports(part["adaptive_beam"] for part in parts),
+            "parallel": {
+                "processes": self.processes,
+                "chunks": len(chunks),
+                "chunk_ms": [part["duration_ms"] for part in parts],
+            },
+        }
+
+    def _decode(self, source: tuple, chunks: list, options: dict, on_segment) -> list[dict]:
+        """Run every chunk on the pool; stitch and emit them in order as they finish."""
+        try:
+            executor = self._pool()
+            futures = [executor.submit(_decode_chunk, source, start, end, options) for start, _, end in chunks]
+        except BrokenProcessPool:
+            self.close()
+            raise
+        parts = []
+        previous = None  # last chunk, waiting for its seam with the next one
+        try:
+            for (start, cut, _), future in zip(chunks, futures):
+                try:
+                    part = future.result()
+                except BrokenProcessPool as e:
+                    self.close()
+                    raise RuntimeError(f"Parallel transcription worker died: {e}") from e
+                offset = start / SAMPLE_RATE
+                part["segments"] = [
+                    {**s, "start": round(s["start"] + offset, 3), "end": round(s["end"] + offset, 3)}
+                    for s in part["segments"]
+                ]
+                if previous is not None:
+                    previous["segments"], part["segments"] = merge_seam(
+                        previous["segments"], part["segments"], start / SAMPLE_RATE
+                    )
+                    self._emit(previous, on_segment)
+                part["cut"] = cut
+                previous = part
+                parts.append(part)
+            if previous is not None:
+                self._emit(previous, on_segment)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return parts
+
+    @staticmethod
+    def _emit(part: dict, on_segment) -> None:
+        if on_segment is not None:
+            for segment in part["segments"]:
+                on_segment(segment)
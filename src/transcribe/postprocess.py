@@ -0,0 +1,186 @@
+"""
+VoicePaste - Transcript Post-Processing
+Text clean-up applied to every segment as it is decoded, compiled once per
+(language mode, rules) into a TextPipeline:
+
+1. letters      Russian letters that leaked through -> Ukrainian (ua/bilingual
+                modes)
+2. replacements user-defined phrases -> replacement (whole words where the
+                phrase starts/ends with a letter or digit)
+3. punctuation  no spaces before , . ! ? ; : …
+4. whitespace   runs of spaces and tabs -> one space, trimmed (line breaks
+                the model produced are kept)
+5. vocabulary   spoken forms -> vocabulary terms (--vocabulary, see
+                vocabulary.py); timed and counted on its own per request
+
+Rules 2-4 are alternatives of one compiled regex, so a segment is scanned
+once by re.sub whatever the rule count; without replacements, a cheaper
+search first checks there is whitespace to fix at all. Letters use
+str.replace per pair: str.translate falls back to a per-character lookup on
+non-ASCII text and measured ~10x slower for this map. The transcript is the
+segments joined with single spaces; nothing runs over the whole text
+afterwards.
+
+Rules file (--postprocess-rules), every key optional:
+    {"letters": true, "punctuation": true, "whitespace": true,
+     "ignore_case": false, "replacements": {"voice paste": "VoicePaste"}}
+"""
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from vocabulary import Vocabulary
+
+# Russian-only letters and their Ukrainian stand-ins
+LETTER_MAP = {
+    'ы': 'и', 'Ы': 'И',
+    'э': 'е', 'Э': 'Е',
+    'ё': 'е', 'Ё': 'Е',
+    'ъ': "'", 'Ъ': "'",
+}
+
+# Language modes whose output gets LETTER_MAP
+LETTER_MODES = ("ua", "uk", "bilingual")
+
+# Closing punctuation that whitespace before it is removed from
+CLOSING_PUNCTUATION = ",.!?;:…"
+
+DEFAULT_RULES = {
+    "letters": True,
+    "punctuation": True,
+    "whitespace": True,
+    "ignore_case": False,
+    "replacements": {},
+}
+
+_LETTER_PAIRS = tuple(LETTER_MAP.items())
+
+
+def validate_rules(rules) -> dict:
+    """
+    DEFAULT_RULES updated with `rules`.
+
+    Raises:
+        ValueError: Unknown key or wrongly typed value
+    """
+    if not isinstance(rules, dict):
+        raise ValueError("Post-processing rules must be an object")
+    merged = {**DEFAULT_RULES, "replacements": dict(DEFAULT_RULES["replacements"])}
+    for key, value in rules.items():
+        if key not in DEFAULT_RULES:
+            raise ValueError(f"Unknown post-processing rule: {key!r}")
+        if key == "replacements":
+            if not isinstance(value, dict) or not all(
+                isinstance(k, str) and k and isinstance(v, str) for k, v in value.items()
+            ):
+                raise ValueError("'replacements' must map non-empty strings to strings")
+            merged[key].update(value)
+        elif not isinstance(value, bool):
+            raise ValueError(f"Post-processing rule {key!r} must be true or false")
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_rules(path: Path) -> dict:
+    """
+    Rules from a JSON file (see the module docstring).
+
+    Raises:
+        ValueError: Unreadable file, invalid JSON or invalid rules
+    """
+    try:
+        return validate_rules(json.loads(path.read_text(encoding="utf-8")))
+    except OSError as e:
+        raise ValueError(f"Cannot read {path}: {e}") from e
+
+
+class TextPipeline:
+    """
+    Compiled post-processing for one language mode and rule set; call it on
+    segment text. clean() runs rules 1-4 only, `vocabulary` is rule 5.
+    """
+
+    def __init__(self, language_mode: str = "auto", rules: dict | None = None, vocabulary: Vocabulary | None = None):
+        rules = validate_rules(rules or {})
+        self.vocabulary = vocabulary
+        self.whitespace = rules["whitespace"]
+        self._letters = _LETTER_PAIRS if rules["letters"] and language_mode in LETTER_MODES else ()
+        # Whitespace/punctuation rules can only change text containing one of these
+        trigger = []
+
+        ignore_case = rules["ignore_case"]
+        self._replacements = {}
+        for phrase, replacement in rules["replacements"].items():
+            # Phrases are matched after letter mapping, so map them the same way
+            phrase = self._map_letters(phrase)
+            self._replacements[phrase.lower() if ignore_case else phrase] = replacement
+
+        alternatives = []
+        if self._replacements:
+            # Longest first, so "open ai studio" wins over "open ai"
+            phrases = sorted(self._replacements, key=len, reverse=True)
+            alternatives.append("(?P<replace>" + "|".join(_phrase_pattern(p) for p in phrases) + ")")
+        if rules["punctuation"]:
+            alternatives.append(f"(?P<punct>[ \\t]+(?=[{re.escape(CLOSING_PUNCTUATION)}]))")
+            trigger.append(f"[ \\t][{re.escape(CLOSING_PUNCTUATION)}]")
+        if self.whitespace:
+            alternatives.append(r"(?P<space>[ \t]{2,}|\t)")
+            trigger.append(r"[ \t][ \t]|\t")
+        self._ignore_case = ignore_case
+        flags = re.IGNORECASE if ignore_case else 0
+        self._pattern = re.compile("|".join(alternatives), flags) if alternatives else None
+        self._trigger = re.compile("|".join(trigger)) if trigger and not self._replacements else None
+
+    def __call__(self, text: str) -> str:
+        text = self.clean(text)
+        if self.vocabulary is not None:
+            text = self.vocabulary.correct(text)[0]
+        return text
+
+    def clean(self, text: str) -> str:
+        text = self._map_letters(text)
+        if self._pattern is not None and (self._trigger is None or self._trigger.search(text)):
+            text = self._pattern.sub(self._substitute, text)
+        return text.strip() if self.whitespace else text
+
+    def _map_letters(self, text: str) -> str:
+        for russian, ukrainian in self._letters:
+            text = text.replace(russian, ukrainian)
+        return text
+
+    def _substitute(self, match: re.Match) -> str:
+        kind = match.lastgroup
+        if kind == "replace":
+            phrase = match.group()
+            return self._replacements.get(phrase.lower() if self._ignore_case else phrase, phrase)
+        if kind == "punct":
+            return ""
+        return " "
+
+
+def _phrase_pattern(phrase: str) -> str:
+    pattern = re.escape(phrase)
+    if phrase[0].isalnum():
+        pattern = r"\b" + pattern
+    if phrase[-1].isalnum():
+        pattern += r"\b"
+    return pattern
+
+
+@lru_cache(maxsize=32)
+def _cached_pipeline(language_mode: str, rules_json: str, vocabulary: Vocabulary | None) -> TextPipeline:
+    return TextPipeline(language_mode, json.loads(rules_json), vocabulary)
+
+
+def pipeline_for(
+    language_mode: str, rules: dict | None = None, vocabulary: Vocabulary | None = None
+) -> TextPipeline:
+    """The compiled TextPipeline for a language mode, rules and vocabulary, built once per combination."""
+    return _cached_pipeline(language_mode, json.dumps(rules or {}, sort_keys=True, ensure_ascii=False), vocabulary)
+
+
+def join_segments(texts) -> str:
+    """The transcript: post-processed segment texts joined with single spaces, empty ones skipped."""
+    return " ".join(text for text in texts if text)
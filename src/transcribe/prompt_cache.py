@@ -0,0 +1,169 @@
+"""
+VoicePaste - Prompt Cache and Dictation Context
+Token ids of the initial prompt, encoded once and reused.
+
+A text initial_prompt is re-tokenized by faster-whisper on every call, but
+the prompt only changes with the language mode and --initial-prompt. The
+worker encodes it once per (tokenizer, text) and passes the token ids, which
+model.transcribe() takes as they are. Only stable texts (the fixed prompt,
+the vocabulary's hotwords) go through the cache; entries are held per
+tokenizer with a weak reference, so they go away with an unloaded model.
+
+Dictation context (--context-tokens N): the end of the previous dictations
+(per language mode) is appended to the prompt, so names and terms carry
+over from one dictation to the next. Only the last N tokens of it are used,
+and never more than fit next to the fixed prompt in MAX_PROMPT_TOKENS, so the
+prompt length is bounded however long the session runs. The context changes
+with every dictation, so it is encoded on each request and not cached.
+
+Batched decodes (batching.py) pass the prompt as text, since
+BatchedInferencePipeline only takes a string; the context part is then the
+decoded text of the same tokens.
+"""
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+# faster-whisper keeps only the last max_length // 2 - 1 prompt tokens
+MAX_PROMPT_TOKENS = 223
+
+# Previous dictation text kept per language mode (characters), before token trimming
+CONTEXT_CHARS = 2000
+
+
+def encode_text(tokenizer, text: str) -> list[int]:
+    """Token ids of `text` as faster-whisper encodes a text prompt. `tokenizer` is model.hf_tokenizer."""
+    return tokenizer.encode(" " + text.strip(), add_special_tokens=False).ids
+
+
+class PromptCache:
+    """LRU of encoded prompt texts (max_entries per tokenizer), with hit/miss and encode-time counters."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        # tokenizer -> text -> token ids, least recently used text first
+        self._entries: weakref.WeakKeyDictionary[object, OrderedDict[str, list[int]]] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.encode_ms = 0.0
+
+    def encode(self, tokenizer, text: str) -> tuple[list[int], bool]:
+        """
+        Token ids of `text` (see encode_text), and whether they came from the
+        cache. Meant for texts that repeat across requests.
+        """
+        with self._lock:
+            try:
+                texts = self._entries.get(tokenizer)
+            except TypeError:
+                # Not weakly referenceable: encoded every time
+                texts = None
+            tokens = texts.get(text) if texts is not None else None
+            if tokens is not None:
+                texts.move_to_end(text)
+                self.hits += 1
+                return tokens, True
+        start = time.perf_counter()
+        tokens = encode_text(tokenizer, text)
+        encode_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.misses += 1
+            self.encode_ms += encode_ms
+            try:
+                texts = self._entries.setdefault(tokenizer, OrderedDict())
+            except TypeError:
+                return tokens, False
+            texts[text] = tokens
+            while len(texts) > self.max_entries:
+                texts.popitem(last=False)
+        return tokens, False
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "entries": sum(len(texts) for texts in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "encode_ms": round(self.encode_ms, 3),
+            }
+
+
+# Shared by every request of the worker
+PROMPT_CACHE = PromptCache()
+
+
+def build_prompt(
+    tokenizer,
+    base: str | None,
+    context: str = "",
+    context_tokens: int = 0,
+    cache: PromptCache = PROMPT_CACHE,
+    reserved_tokens: int = 0,
+) -> dict | None:
+    """
+    Prompt token ids: the fixed prompt followed by the end of the dictation context.
+
+    Args:
+        base: Fixed prompt (language mode prompt plus --initial-prompt), or None
+        context: Previous dictations; trimmed to its last `context_tokens` tokens
+        reserved_tokens: Prompt tokens taken by the hotwords (see vocabulary.py),
+            which the context gives up
+
+    Returns:
+        None without any prompt, else {'tokens', 'text', 'base_tokens',
+        'context_tokens', 'cached'}; 'text' is the same prompt as a string,
+        'cached' is true when nothing had to be encoded
+    """
+    tokens, cached = cache.encode(tokenizer, base) if base else ([], True)
+    text = base or ""
+    budget = min(context_tokens, MAX_PROMPT_TOKENS - reserved_tokens - len(tokens))
+    context_ids = []
+    if context and budget > 0:
+        context_ids = encode_text(tokenizer, context)[-budget:]
+        cached = False
+        text = (text + " " + tokenizer.decode(context_ids).strip()).strip()
+    if not tokens and not context_ids:
+        return None
+    return {
+        "tokens": tokens + context_ids,
+        "text": text,
+        "base_tokens": len(tokens),
+        "context_tokens": len(context_ids),
+        "cached": cached,
+    }
+
+
+class DictationContext:
+    """The end of the previous dictations' text, per language mode."""
+
+    def __init__(self, max_chars: int = CONTEXT_CHARS):
+        self.max_chars = max_chars
+        self._texts: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, language_mode: str, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        with self._lock:
+            texts = self._texts.setdefault(language_mode, deque())
+            texts.append(text)
+            # Drop whole dictations from the front while the rest still covers max_chars
+            while len(texts) > 1 and sum(len(t) + 1 for t in texts) - len(texts[0]) - 1 >= self.max_chars:
+                texts.popleft()
+
+    def text(self, language_mode: str) -> str:
+        with self._lock:
+            joined = " ".join(self._texts.get(language_mode, ()))
+        if len(joined) > self.max_chars:
+            cut_inside_word = joined[-self.max_chars - 1] != " "
+            joined = joined[-self.max_chars:]
+            if cut_inside_word:
+                joined = joined.partition(" ")[2]
+        return joined.lstrip()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
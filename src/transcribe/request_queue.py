@@ -0,0 +1,147 @@
+"""
+VoicePaste - Request Queue
+Pending transcription requests of the resident worker. stdin is read on one
+thread and requests are queued here; a dispatcher thread takes them in order
+of:
+
+1. "priority" option (higher first, default 0)
+2. estimated audio length (shorter first), so a quick command isn't stuck
+   behind a long dictation
+3. arrival order
+
+A queued request can be cancelled outright; a running one is flagged and
+stops at its next decoded segment.
+"""
+import heapq
+import itertools
+import threading
+import time
+from pathlib import Path
+
+from audio_input import BYTES_PER_SAMPLE, SAMPLE_RATE
+
+WAV_HEADER_BYTES = 44
+
+
+class RequestCancelled(Exception):
+    """Raised inside a running request once it has been cancelled."""
+
+
+def estimate_seconds(request: dict) -> float:
+    """Audio length of a request from its PCM frame or WAV file size (0 if unknown)."""
+    if "audio" in request:
+        return len(request["audio"]) / (SAMPLE_RATE * BYTES_PER_SAMPLE)
+    try:
+        size = Path(request["path"]).stat().st_size
+    except (KeyError, OSError):
+        return 0.0
+    return max(0, size - WAV_HEADER_BYTES) / (SAMPLE_RATE * BYTES_PER_SAMPLE)
+
+
+class QueuedRequest:
+    """One transcription request waiting for (or running on) the dispatcher."""
+
+    def __init__(self, request: dict, legacy: bool = False):
+        self.request = request
+        self.id = request.get("id")
+        self.legacy = legacy
+        self.priority = request.get("options", {}).get("priority", 0)
+        # Legacy replies carry no id, so legacy requests must stay in arrival order
+        self.seconds = 0.0 if legacy else estimate_seconds(request)
+        self.received = time.perf_counter()
+        self.cancelled = threading.Event()
+
+    def check_cancelled(self, *_) -> None:
+        """on_segment callback that aborts a cancelled request."""
+        if self.cancelled.is_set():
+            raise RequestCancelled(f"Request {self.id} cancelled")
+
+
+class RequestQueue:
+    """Thread-safe priority queue of QueuedRequests."""
+
+    def __init__(self):
+        self._heap: list[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._running: dict[str, QueuedRequest] = {}
+
+    def __len__(self) -> int:
+        with self._cond:
+            return sum(1 for entry in self._heap if not entry[-1].cancelled.is_set())
+
+    def put(self, item: QueuedRequest) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Worker is shutting down")
+            heapq.heappush(self._heap, (-item.priority, item.seconds, next(self._seq), item))
+            self._cond.notify()
+
+    def pop_batch(self, max_items: int = 1, compatible=None) -> list[QueuedRequest] | None:
+        """
+        Wait for the next request and take up to `max_items - 1` more queued
+        ones for which compatible(first, other) is true.
+
+        Returns:
+            The requests (marked running), or None once closed and drained.
+        """
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][-1].cancelled.is_set():
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    break
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+            batch = [heapq.heappop(self._heap)[-1]]
+            if max_items > 1 and compatible is not None:
+                rest = []
+                for entry in sorted(self._heap):
+                    item = entry[-1]
+                    if item.cancelled.is_set():
+                        continue
+                    if len(batch) < max_items and compatible(batch[0], item):
+                        batch.append(item)
+                    else:
+                        rest.append(entry)
+                self._heap = rest
+                heapq.heapify(self._heap)
+            for item in batch:
+                if item.id is not None:
+                    self._running[item.id] = item
+            return batch
+
+    def done(self, batch: list[QueuedRequest]) -> None:
+        with self._cond:
+            for item in batch:
+                if self._running.get(item.id) is item:
+                    del self._running[item.id]
+
+    def cancel(self, request_id: str) -> str | None:
+        """
+        Cancel a request by id.
+
+        Returns:
+            "queued" if it hadn't started (the caller answers it), "running"
+            if it was flagged to stop, None if no such request is pending
+        """
+        with self._cond:
+            item = self._running.get(request_id)
+            if item is not None:
+                item.cancelled.set()
+                return "running"
+            for entry in self._heap:
+                item = entry[-1]
+                if item.id == request_id and not item.cancelled.is_set():
+                    item.cancelled.set()
+                    return "queued"
+        return None
+
+    def close(self) -> None:
+        """Stop accepting requests; pop_batch() returns None once the queue is drained."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
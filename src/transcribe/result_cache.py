@@ -0,0 +1,188 @@
+"""
+VoicePaste - Result Cache
+Transcripts of audio the worker has already decoded, keyed by a hash of the
+PCM samples plus every option that changes the output, so a retry (paste
+failure, or the app's one-off fallback on the same WAV) comes back without a
+decode.
+
+- PCM frames are hashed as sent; WAV files by their PCM data only (the same
+  samples as a frame or a WAV give the same key). Other WAV formats hash the
+  whole file.
+- In memory: an LRU of the last `max_entries` results.
+- On disk (optional): one JSON file per result in `cache_dir`, the
+  `max_disk_entries` most recently used kept. This is what the one-off mode
+  (a fresh process) hits.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from long_audio import read_wav_header
+
+# Bump when the key or the stored result layout changes; old disk entries then miss.
+CACHE_VERSION = 6
+
+# Request options that change the transcript, with the value a missing one means.
+CACHE_OPTIONS = {
+    "language_mode": "auto",
+    "beam_size": 5,
+    "initial_prompt": "",
+    "vad": False,
+    "trim_silence": False,
+    "postprocess_rules": None,
+    "adaptive_beam": False,
+}
+
+# Only part of the key when the fast path is on (fast_path and a draft model).
+FAST_PATH_OPTIONS = ("fast_path_model", "fast_path_max_seconds")
+
+# Result fields kept; timings describe the original decode and are not replayed.
+RESULT_FIELDS = (
+    "text", "language", "language_prob", "language_route", "language_candidates",
+    "audio_seconds", "segments", "segment_decode_ms", "silence", "fast_path", "windows", "vocabulary",
+)
+
+READ_BYTES = 1024 * 1024
+
+
+def pcm_digest(audio) -> str:
+    """
+    Hash of the audio samples: int16 PCM bytes, or a WAV file path.
+
+    Raises:
+        OSError: The file can't be read
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if not isinstance(audio, Path):
+        digest.update(memoryview(audio).cast("B"))
+        return digest.hexdigest()
+    header = read_wav_header(audio)
+    offset, size = header if header is not None else (0, audio.stat().st_size)
+    with open(audio, "rb") as f:
+        f.seek(offset)
+        while size > 0:
+            chunk = f.read(min(READ_BYTES, size))
+            if not chunk:
+                break
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(audio_digest: str, model_key: tuple, options: dict, context: str = "") -> str:
+    """
+    Key for a PCM digest decoded by a (model, device, compute_type) with these
+    options and this dictation context (the previous dictations put in the
+    prompt, "" without).
+    """
+    key_options = {name: options.get(name, default) for name, default in CACHE_OPTIONS.items()}
+    if options.get("fast_path") and options.get("fast_path_model"):
+        key_options.update({name: options.get(name) for name in FAST_PATH_OPTIONS})
+    # Dictation context in the prompt: other previous dictations are another prompt, so another entry
+    context_tokens = options.get("context_tokens", 0) if options.get("context", True) else 0
+    key_options["context_tokens"] = context_tokens
+    key_options["context"] = hashlib.sha256(context.encode("utf-8")).hexdigest() if context and context_tokens else None
+    # The compiled --vocabulary by its content digest
+    vocabulary = options.get("vocabulary_terms") if options.get("vocabulary", True) else None
+    key_options["vocabulary"] = vocabulary.digest if vocabulary is not None else None
+    fields = {"v": CACHE_VERSION, "audio": audio_digest, "model": list(model_key[:3]), "options": key_options}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU of transcribe results, optionally backed by a directory.
+
+    Args:
+        max_entries: Results kept in memory (0 = none, disk only)
+        cache_dir: Directory for the on-disk cache (None disables it)
+        max_disk_entries: Files kept in cache_dir
+    """
+
+    def __init__(self, max_entries: int = 32, cache_dir: Path | None = None, max_disk_entries: int = 500):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+        result = self._read(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        entry = {name: result[name] for name in RESULT_FIELDS if name in result}
+        with self._lock:
+            self._remember(key, entry)
+        self._write(key, entry)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk": self.cache_dir is not None,
+            }
+
+    def _remember(self, key: str, entry: dict) -> None:
+        """Caller holds the lock."""
+        if not self.max_entries:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read(self, key: str) -> dict | None:
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # most recently used survives pruning
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and "text" in entry else None
+
+    def _write(self, key: str, entry: dict) -> None:
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.json"
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+            self._prune()
+        except OSError as e:
+            print(f"[Cache] Could not write result: {e}", file=sys.stderr, flush=True)
+
+    def _prune(self) -> None:
+        files = list(self.cache_dir.glob("*.json"))
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda p: p.stat().st_mtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            path.unlink(missing_ok=True)
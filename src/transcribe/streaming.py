@@ -0,0 +1,179 @@
+"""
+VoicePaste - Streaming Transcription
+Incremental transcription of a recording that is still in progress.
+
+Audio arrives as 16 kHz mono int16 PCM chunks. A background thread decodes
+the uncommitted part of the buffer every `step_s` seconds and commits
+segments once they are stable:
+
+- Segments ending inside the trailing `overlap_s` are never committed; a word
+  there may still be cut by the window edge.
+- Otherwise a segment is committed when two consecutive decodes agree on it
+  (same text, in the same position).
+- If nothing agrees for `window_s` seconds, the stable segments are committed
+  anyway so the decode window stays bounded.
+
+On stop only the uncommitted tail is decoded, so time-to-text after stop
+depends on the window settings, not on the length of the dictation.
+"""
+import sys
+import threading
+import time
+
+from audio_input import SAMPLE_RATE, pcm16_to_float32
+from postprocess import join_segments
+
+# Two decodes agree on a segment if its start moved less than this.
+AGREEMENT_TOLERANCE_S = 0.5
+
+
+class StreamingSession:
+    """
+    One in-progress recording.
+
+    Args:
+        decode: Callable (audio: float32 ndarray, language: str | None) -> dict
+            with 'segments' (window-relative {'start', 'end', 'text'}) and
+            'language', i.e. a bound transcribe_audio
+        window_s: Upper bound on the audio decoded by one background pass
+        step_s: New audio needed before the next background pass
+        overlap_s: Trailing audio that is never committed by a background pass
+    """
+
+    def __init__(self, decode, window_s: float = 30.0, step_s: float = 5.0, overlap_s: float = 2.0):
+        if not 0 < overlap_s < window_s:
+            raise ValueError("overlap_s must be between 0 and window_s")
+        self._decode = decode
+        self._window = int(window_s * SAMPLE_RATE)
+        self._step = int(step_s * SAMPLE_RATE)
+        self._overlap = int(overlap_s * SAMPLE_RATE)
+
+        self._pcm = bytearray()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._error: Exception | None = None
+
+        self._committed_samples = 0  # start of the audio that still needs decoding
+        self._decoded_until = 0  # end of the last background pass
+        self._committed: list[dict] = []
+        self._hypothesis: list[dict] = []  # uncommitted segments of the last pass (absolute times)
+        self._language: str | None = None
+
+        self.windows_decoded = 0
+        self.background_ms = 0
+
+        self._thread = threading.Thread(target=self._run, name="stream-decode", daemon=True)
+        self._thread.start()
+
+    @property
+    def received_seconds(self) -> float:
+        return len(self._pcm) // 2 / SAMPLE_RATE
+
+    def feed(self, pcm: bytes) -> None:
+        """Append int16 PCM audio; decoding happens on the background thread."""
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Stream already stopped")
+            self._pcm += pcm
+            self._cond.notify()
+
+    def cancel(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+
+    def finish(self) -> dict:
+        """
+        Stop the background thread, decode the remaining tail and return the
+        full result.
+
+        Returns:
+            Dict with 'text', 'segments', 'language', 'windows_decoded',
+            'background_ms', 'tail_ms' and 'tail_seconds' keys
+        """
+        self.cancel()
+        if self._error is not None:
+            raise self._error
+
+        tail_start = time.perf_counter()
+        total = len(self._pcm) // 2
+        tail_seconds = (total - self._committed_samples) / SAMPLE_RATE
+        if total > self._committed_samples:
+            self._decode_pass(final=True)
+        tail_ms = int((time.perf_counter() - tail_start) * 1000)
+
+        segments = [s for s in self._committed if s["text"]]
+        return {
+            "text": join_segments(s["text"] for s in segments),
+            "segments": segments,
+            "language": self._language,
+            "windows_decoded": self.windows_decoded,
+            "background_ms": self.background_ms,
+            "tail_ms": tail_ms,
+            "tail_seconds": round(tail_seconds, 3),
+        }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping and len(self._pcm) // 2 - self._decoded_until < self._step:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+            try:
+                self._decode_pass(final=False)
+            except Exception as e:
+                print(f"[Stream] Background decode failed: {e}", file=sys.stderr, flush=True)
+                self._error = e
+                return
+
+    def _decode_pass(self, final: bool) -> None:
+        start = self._committed_samples
+        with self._cond:
+            total = len(self._pcm) // 2
+            end = total if final else min(total, start + self._window)
+            # Convert straight from the shared buffer; the view is released before feed() can grow it
+            with memoryview(self._pcm) as view:
+                audio = pcm16_to_float32(view[start * 2:end * 2])
+        offset = start / SAMPLE_RATE
+
+        pass_start = time.perf_counter()
+        result = self._decode(audio, self._language)
+        self.windows_decoded += 1
+        if not final:
+            self.background_ms += int((time.perf_counter() - pass_start) * 1000)
+        if self._language is None and result.get("segments"):
+            self._language = result.get("language")
+
+        segments = [
+            {"start": offset + s["start"], "end": offset + s["end"], "text": s["text"]}
+            for s in result.get("segments", [])
+        ]
+        self._decoded_until = end
+
+        if final:
+            self._committed.extend(segments)
+            self._committed_samples = end
+            self._hypothesis = []
+            return
+
+        commit_limit = (end - self._overlap) / SAMPLE_RATE
+        stable = [s for s in segments if s["end"] <= commit_limit]
+        if end - start >= self._window:
+            # Full window without agreement: commit what we have to keep moving
+            agreed = stable or segments
+        else:
+            agreed = []
+            for current, previous in zip(stable, self._hypothesis):
+                if current["text"] != previous["text"] or abs(current["start"] - previous["start"]) > AGREEMENT_TOLERANCE_S:
+                    break
+                agreed.append(current)
+
+        if agreed:
+            self._committed.extend(agreed)
+            self._committed_samples = int(round(agreed[-1]["end"] * SAMPLE_RATE))
+        elif not segments and end - start > self._overlap:
+            # Silence so far: nothing to keep before the overlap zone
+            self._committed_samples = end - self._overlap
+        self._hypothesis = segments[len(agreed):]
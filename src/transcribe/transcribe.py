@@ -2,189 +2,1622 @@
 """
 VoicePaste - Transcription Worker
 Transcribes audio using faster-whisper with GPU support.
+
+faster_whisper (and with it ctranslate2, tokenizers and av) is imported only
+when a model is loaded or a file decoded, so --check-model and argument errors
+don't pay for it; --startup-profile reports where cold-start time goes.
 """
+from __future__ import annotations
+
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import argparse
 import sys
-import io
 import faulthandler
+import hashlib
+import json
+import threading
+import weakref
 from pathlib import Path
-from faster_whisper import WhisperModel
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+import autotune
+import cpu_config
+import energy_vad
+from adaptive_beam import AdaptiveDecode, combine_beam_reports
+from audio_input import MAX_FRAME_BYTES, SAMPLE_RATE, pcm16_to_float32, read_frame, skip_frame
+from batching import BATCH_MAX_SECONDS, batch_key, decode_batch
+from fast_path import FAST_PATH_MAX_SECONDS, confidence_failures
+from long_audio import WINDOW_SECONDS, iter_wav_windows, wav_seconds
+from metrics import MetricsAggregator, StageTimer
+from model_cache import check_model
+from prompt_cache import MAX_PROMPT_TOKENS, PROMPT_CACHE, DictationContext, build_prompt
+from postprocess import TextPipeline, join_segments, load_rules, pipeline_for
+from parallel_transcribe import PARALLEL_MIN_SECONDS, ParallelTranscriber, default_processes
+from model_pool import ModelPool, default_compute_type, load_whisper_model, model_key, thread_key
+from request_queue import QueuedRequest, RequestCancelled, RequestQueue
+from result_cache import ResultCache, cache_key, pcm_digest
+from streaming import StreamingSession
+from vocabulary import combine_reports, load_vocabulary
+from wav_tail import TailSession
+from worker_protocol import (
+    PROTOCOL_VERSION,
+    MessageWriter,
+    ProtocolError,
+    frame_size,
+    is_json_request,
+    message,
+    parse_request,
+)
 
-import time
 import traceback
 import os
 
-# Force UTF-8 output on Windows (critical for Cyrillic)
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
 
+IMPORT_MS = (time.perf_counter() - _IMPORT_START) * 1000
 
-def get_russian_suppress_tokens(tokenizer) -> list[int]:
-    """Get list of token IDs for Russian-only characters to suppress them."""
-    russian_chars = "ыэъёЫЭЪЁ"
+# Force UTF-8 output on Windows (critical for Cyrillic).
+# reconfigure() keeps the original stream objects alive, so importing this
+# module from tests or other tools doesn't close their stdout/stderr.
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
+
+RUSSIAN_ONLY_CHARS = "ыэъёЫЭЪЁ"
+
+# Languages bilingual mode decodes in. Whisper often scores Ukrainian speech as
+# Russian, so Russian probability counts towards Ukrainian.
+BILINGUAL_LANGUAGES = ("en", "uk")
+BILINGUAL_ALIASES = {"ru": "uk"}
+
+# Bump when the on-disk suppress-token format or selection rule changes.
+SUPPRESS_CACHE_VERSION = 1
+
+# tokenizer -> token ids. Weak keys: an entry goes away with its model's tokenizer,
+# so models unloaded by the pool don't pile up here.
+_suppress_tokens_memo: weakref.WeakKeyDictionary[object, list[int]] = weakref.WeakKeyDictionary()
+
+
+def decode_audio(path: str, sampling_rate: int = SAMPLE_RATE):
+    """faster_whisper.decode_audio, imported on first use."""
+    from faster_whisper import decode_audio as fw_decode_audio
+
+    return fw_decode_audio(path, sampling_rate=sampling_rate)
+
+
+def get_cache_dir() -> Path:
+    """Directory for worker caches (VOICEPASTE_CACHE_DIR overrides the default)."""
+    override = os.environ.get("VOICEPASTE_CACHE_DIR")
+    if override:
+        return Path(override)
+    local_app_data = os.environ.get("LOCALAPPDATA")
+    if local_app_data:
+        return Path(local_app_data) / "VoicePaste" / "cache"
+    return Path.home() / ".cache" / "voicepaste"
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Stable hash of the tokenizer vocabulary, used to key on-disk caches."""
+    to_str = getattr(tokenizer, "to_str", None)
+    if to_str is not None:
+        payload = to_str()
+    else:
+        payload = repr(sorted(tokenizer.get_vocab().items()))
+    digest = hashlib.sha256()
+    digest.update(RUSSIAN_ONLY_CHARS.encode("utf-8"))
+    digest.update(payload.encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _scan_russian_suppress_tokens(tokenizer) -> list[int]:
     suppress_tokens = []
-    
+
     # Iterate through all token IDs and decode them to check for Russian-only characters
     for i in range(tokenizer.get_vocab_size()):
         try:
             decoded = tokenizer.decode([i])
-            if any(char in decoded for char in russian_chars):
+            if any(char in decoded for char in RUSSIAN_ONLY_CHARS):
                 suppress_tokens.append(i)
-        except:
+        except Exception:
             continue
-                
-    return sorted(list(set(suppress_tokens)))
+
+    return sorted(set(suppress_tokens))
+
+
+def _load_suppress_cache(path: Path) -> list[int] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SUPPRESS_CACHE_VERSION:
+        return None
+    tokens = data.get("tokens")
+    if not isinstance(tokens, list) or not all(isinstance(t, int) for t in tokens):
+        return None
+    return tokens
+
+
+def _save_suppress_cache(path: Path, tokens: list[int]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"version": SUPPRESS_CACHE_VERSION, "tokens": tokens}),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[Suppress] Failed to write cache {path}: {e}", file=sys.stderr, flush=True)
+
+
+def get_russian_suppress_tokens(tokenizer) -> list[int]:
+    """
+    Get list of token IDs for Russian-only characters to suppress them.
+
+    The full vocabulary scan runs at most once per tokenizer: results are
+    memoized for the life of the process and stored on disk under
+    get_cache_dir(), keyed by tokenizer_fingerprint().
+    """
+    try:
+        memo = _suppress_tokens_memo.get(tokenizer)
+    except TypeError:
+        # Not weakly referenceable; the disk cache still spares the scan
+        memo = None
+    if memo is not None:
+        return memo
+
+    cache_path = get_cache_dir() / "suppress_tokens" / f"{tokenizer_fingerprint(tokenizer)}.json"
+    tokens = _load_suppress_cache(cache_path)
+    if tokens is None:
+        start = time.perf_counter()
+        tokens = _scan_russian_suppress_tokens(tokenizer)
+        scan_ms = int((time.perf_counter() - start) * 1000)
+        print(
+            f"[Suppress] Built {len(tokens)} suppress tokens in {scan_ms}ms, caching to {cache_path}",
+            file=sys.stderr,
+            flush=True,
+        )
+        _save_suppress_cache(cache_path, tokens)
+
+    try:
+        _suppress_tokens_memo[tokenizer] = tokens
+    except TypeError:
+        pass
+    return tokens
+
+
+def is_vad_dependency_error(err: Exception) -> bool:
+    msg = str(err).lower()
+    return (
+        "vad" in msg
+        or "silero" in msg
+        or "torch" in msg
+        or "onnxruntime" in msg
+    )
+
+
+def report_vad_dependency_error(err: Exception) -> None:
+    """Explain a vad_filter failure caused by a missing dependency (the caller re-raises it)."""
+    if is_vad_dependency_error(err):
+        print(
+            "[VAD] Missing dependency for vad_filter. "
+            "Install required VAD deps (e.g., torch/onnxruntime).",
+            file=sys.stderr,
+        )
+        if os.environ.get("VOICEPASTE_DEBUG", "0") in ("1", "true", "True"):
+            traceback.print_exc(file=sys.stderr)
+
+
+def detect_restricted_language(model: WhisperModel, audio, allowed, aliases=None, vad_filter: bool = False):
+    """
+    Pick the most likely language out of `allowed` from the first 30s window.
+
+    Runs one encoder pass (model.detect_language) and no decoding. Probabilities
+    of `aliases` keys are added to the language they map to.
+
+    Returns:
+        (language, probability renormalized over `allowed`, {language: raw probability})
+    """
+    aliases = aliases or {}
+    _, _, all_language_probs = model.detect_language(audio, vad_filter=vad_filter)
+    scores = dict.fromkeys(allowed, 0.0)
+    for lang, prob in all_language_probs:
+        lang = aliases.get(lang, lang)
+        if lang in scores:
+            scores[lang] += prob
+    language = max(allowed, key=lambda lang: scores[lang])
+    total = sum(scores.values())
+    probability = scores[language] / total if total > 0 else 0.0
+    return language, probability, {lang: round(prob, 4) for lang, prob in scores.items()}
+
+
+def plan_transcription(
+    audio,
+    model: WhisperModel,
+    language_mode: str,
+    custom_initial_prompt: str = "",
+    enable_vad: bool = False,
+    language: str | None = None,
+    timer: StageTimer | None = None,
+    context: str = "",
+    context_tokens: int = 0,
+    hotwords: str | None = None,
+) -> dict:
+    """
+    Settle everything that has to be known before decoding: the language,
+    the initial prompt and the suppress tokens.
+
+    Args:
+        audio: float32 16kHz mono samples
+        language: Force the decoding language (skips detection)
+        context: Previous dictations, appended to the prompt (see prompt_cache.py)
+        context_tokens: Most context tokens to use (0 = none)
+        hotwords: Vocabulary terms for the decoder (see vocabulary.py); the
+            context gives up the tokens they take
+
+    Returns:
+        Dict with 'language' (None when left to model.transcribe()),
+        'initial_prompt' (text), 'prompt_tokens' (the same prompt as cached
+        token ids, or None), 'prompt' (token counts, see build_prompt),
+        'hotwords', 'hotword_tokens', 'suppress_tokens', 'route',
+        'detected_prob' and 'candidates'
+    """
+    timer = timer or StageTimer()
+
+    # Determine language and initial_prompt based on mode
+    forced_language = language
+    language = None
+    initial_prompt = None
+    suppress_tokens = None
+
+    if language_mode == "en":
+        language = "en"
+    elif language_mode in ("ua", "uk"):
+        language = "uk"
+        # Force Ukrainian spelling for UK mode too
+        with timer.stage("suppress_tokens"):
+            suppress_tokens = get_russian_suppress_tokens(model.hf_tokenizer)
+    elif language_mode == "bilingual":
+        # Bilingual mode: auto-detect but guide the model to prefer English and Ukrainian
+        # This helps prevent Whisper from misidentifying Ukrainian as Russian.
+        # We include Ukrainian-specific characters that don't exist in Russian (ґ, є, і, ї).
+        language = None  # Detected below, restricted to BILINGUAL_LANGUAGES
+        initial_prompt = (
+            "English and Ukrainian. Transcribe in these languages. "
+            "Англійська та українська мови. ґ, є, і, ї. "
+        )
+        # Suppress Russian tokens in Bilingual mode as requested by user
+        with timer.stage("suppress_tokens"):
+            suppress_tokens = get_russian_suppress_tokens(model.hf_tokenizer)
+        
+    # Append custom prompt if provided
+    if custom_initial_prompt:
+        if initial_prompt:
+            initial_prompt = initial_prompt.strip() + " " + custom_initial_prompt.strip()
+        else:
+            initial_prompt = custom_initial_prompt.strip()
+
+    if forced_language:
+        language = forced_language
+
+    hotword_tokens = 0
+    if hotwords:
+        with timer.stage("prompt_encode"):
+            hotword_tokens = len(PROMPT_CACHE.encode(model.hf_tokenizer, hotwords)[0])
+    prompt = None
+    if initial_prompt or (context and context_tokens):
+        with timer.stage("prompt_encode"):
+            prompt = build_prompt(
+                model.hf_tokenizer, initial_prompt, context, context_tokens, reserved_tokens=hotword_tokens
+            )
+        if prompt is not None:
+            initial_prompt = prompt["text"]
+
+    # Settle the language before decoding so the audio is decoded exactly once.
+    # Bilingual mode only chooses between English and Ukrainian; with VAD on,
+    # auto mode leaves detection to model.transcribe() (on the filtered audio).
+    detected_prob = None
+    candidates = None
+    if language is not None:
+        route = "fixed"
+    elif language_mode == "bilingual":
+        route = "restricted"
+        with timer.stage("language_detect"):
+            try:
+                language, detected_prob, candidates = detect_restricted_language(
+                    model, audio, BILINGUAL_LANGUAGES, BILINGUAL_ALIASES, vad_filter=enable_vad
+                )
+            except (ModuleNotFoundError, ImportError, RuntimeError) as e:
+                # Detection with vad_filter needs the same dependencies as the decode
+                if enable_vad:
+                    report_vad_dependency_error(e)
+                raise
+    elif not enable_vad:
+        route = "detect"
+        with timer.stage("language_detect"):
+            language, detected_prob, _ = model.detect_language(audio)
+    else:
+        route = "model"
+    if route in ("restricted", "detect"):
+        print(
+            f"[Language] {route}: {language} (p={detected_prob:.2f}"
+            + (f", {candidates}" if candidates else "")
+            + f") in {timer.stages['language_detect']:.0f}ms",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    return {
+        "language": language,
+        "initial_prompt": initial_prompt,
+        "prompt_tokens": prompt["tokens"] if prompt is not None else None,
+        "prompt": prompt_summary(prompt),
+        "hotwords": hotwords or None,
+        "hotword_tokens": hotword_tokens,
+        "suppress_tokens": suppress_tokens,
+        "route": route,
+        "detected_prob": detected_prob,
+        "candidates": candidates,
+    }
+
+
+def prompt_summary(prompt: dict | None) -> dict | None:
+    """Token counts of a build_prompt() prompt, as reported in results."""
+    if prompt is None:
+        return None
+    return {
+        "tokens": len(prompt["tokens"]),
+        "base_tokens": prompt["base_tokens"],
+        "context_tokens": prompt["context_tokens"],
+        "cached": prompt["cached"],
+    }
+
+
+def collect_result(
+    segments,
+    info,
+    plan: dict,
+    audio_seconds: float,
+    language_mode: str,
+    timer: StageTimer,
+    start_time: float,
+    on_segment=None,
+    time_map: energy_vad.TimestampMap | None = None,
+    postprocess: TextPipeline | None = None,
+) -> dict:
+    """
+    Iterate decoded segments (decoding happens lazily here for
+    model.transcribe()), post-process them and build the transcribe_audio()
+    result dict.
+
+    Args:
+        info: Object with 'language' and 'language_probability'
+        audio_seconds: Length of the original audio
+        time_map: Maps segment times back to the original audio when
+            silences were trimmed
+        postprocess: Pipeline applied to each segment's text (default:
+            pipeline_for(language_mode)); its vocabulary pass is timed as
+            the 'vocabulary' stage
+    """
+    postprocess = postprocess or pipeline_for(language_mode)
+    vocabulary = postprocess.vocabulary
+    corrections = 0
+    # Decoding happens lazily while iterating the segment generator
+    segment_dicts = []
+    segment_decode_ms = []
+    segment_start = time.perf_counter()
+    for seg in segments:
+        decoded_at = time.perf_counter()
+        segment_decode_ms.append(round((decoded_at - segment_start) * 1000, 2))
+        timer.add("decode", (decoded_at - segment_start) * 1000)
+
+        with timer.stage("postprocess"):
+            segment = {
+                "start": time_map.to_original(seg.start) if time_map else seg.start,
+                "end": time_map.to_original(seg.end, is_end=True) if time_map else seg.end,
+                "text": postprocess.clean(seg.text.strip()),
+                "avg_logprob": seg.avg_logprob,
+                "no_speech_prob": seg.no_speech_prob,
+                "compression_ratio": seg.compression_ratio,
+            }
+            # Chosen per segment in adaptive mode (adaptive_beam.py)
+            beam = getattr(seg, "beam", None)
+            if beam is not None:
+                segment["beam"] = beam
+        if vocabulary is not None:
+            with timer.stage("vocabulary"):
+                segment["text"], count = vocabulary.correct(segment["text"])
+            corrections += count
+        segment_dicts.append(segment)
+        if on_segment is not None:
+            on_segment(segment)
+        segment_start = time.perf_counter()
+    timer.add("decode", (time.perf_counter() - segment_start) * 1000)
+
+    # Segments are already post-processed; joining them is all that is left
+    with timer.stage("postprocess"):
+        text = join_segments(segment["text"] for segment in segment_dicts)
+    print(f"[Transcribe] Segments joined. Text length={len(text)}", file=sys.stderr, flush=True)
+
+    end_time = time.perf_counter()
+    duration_ms = int((end_time - start_time) * 1000)
+    
+    # A language passed to model.transcribe() comes back with probability 1
+    language_prob = info.language_probability
+    if plan["detected_prob"] is not None and info.language == plan["language"]:
+        language_prob = plan["detected_prob"]
+
+    vocabulary_report = None
+    if vocabulary is not None:
+        vocabulary_report = {
+            "corrections": corrections,
+            "hotword_terms": vocabulary.hotword_terms if plan.get("hotwords") else 0,
+            "hotword_tokens": plan.get("hotword_tokens", 0),
+        }
+
+    return {
+        "text": text,
+        "language": info.language,
+        "language_prob": language_prob,
+        "language_route": plan["route"],
+        "language_candidates": plan["candidates"],
+        "prompt": plan.get("prompt"),
+        "vocabulary": vocabulary_report,
+        "duration_ms": duration_ms,
+        "audio_seconds": round(audio_seconds, 3),
+        "segments": segment_dicts,
+        "timings": timer.as_dict(),
+        "segment_decode_ms": segment_decode_ms,
+    }
 
 
 def transcribe_audio(
-    audio_path: Path,
+    audio,
     model: WhisperModel,
     language_mode: str = "auto",
     beam_size: int = 5,
     custom_initial_prompt: str = "",
     enable_vad: bool = False,
+    language: str | None = None,
+    on_segment=None,
+    plan: dict | None = None,
+    trim_silence: bool = False,
+    postprocess: TextPipeline | None = None,
+    parallel: ParallelTranscriber | None = None,
+    context: str = "",
+    context_tokens: int = 0,
+    adaptive_beam: bool = False,
 ) -> dict:
     """
-    Transcribe audio file using faster-whisper.
+    Transcribe audio using faster-whisper.
     
     Args:
-        audio_path: Path to WAV file (16kHz mono)
+        audio: Path to WAV file (16kHz mono), or float32 16kHz mono samples.
+            Recordings longer than WINDOW_SECONDS are read in windows (see
+            transcribe_windowed)
         model: Loaded WhisperModel instance
         language_mode: Language mode (auto/en/ua/bilingual)
         beam_size: Beam size for transcription
+        language: Force the decoding language (skips detection); the mode's
+            prompt and suppression still apply
+        on_segment: Optional callback, called with each segment dict as soon
+            as it is decoded
+        plan: plan_transcription() result computed earlier (skips planning)
+        trim_silence: Drop long pauses with the built-in energy VAD
+            (energy_vad.py) before decoding; segment times stay in the
+            original timeline
+        postprocess: Text clean-up per segment (default: the language
+            mode's pipeline with the default rules, see postprocess.py); its
+            vocabulary, if any, also gives the decoder's hotwords
+        parallel: Process pool that long recordings are split across (see
+            parallel_transcribe.py); shorter ones are decoded here
+        context: Previous dictations; their last `context_tokens` tokens
+            follow the initial prompt (see prompt_cache.py)
+        adaptive_beam: Decode greedily and re-decode only low-confidence
+            segments with `beam_size` (see adaptive_beam.py)
     
     Returns:
-        Dict with 'text', 'language', 'language_prob', 'duration_ms' keys
+        Dict with 'text', 'language', 'language_prob', 'language_route'
+        (how the language was chosen: fixed/detect/restricted/model),
+        'language_candidates' (restricted route only), 'prompt' (prompt
+        token counts, see prompt_summary; None without a prompt),
+        'vocabulary' ({'corrections', 'hotword_terms', 'hotword_tokens'};
+        None without a vocabulary), 'duration_ms',
+        'audio_seconds', 'segments' (list of {'start', 'end', 'text', 'avg_logprob',
+        'no_speech_prob', 'compression_ratio'}), 'timings' (ms per
+        stage, see metrics.py), 'segment_decode_ms', 'silence' (trim
+        stats, None unless trim_silence) and 'adaptive_beam' (see
+        AdaptiveDecode.report; None unless adaptive_beam) keys; adaptive
+        segments also carry 'beam'
     
     Raises:
         FileNotFoundError: Audio file not found
         RuntimeError: Transcription failed
     """
-    if not audio_path.exists():
-        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+    if isinstance(audio, Path) and not audio.exists():
+        raise FileNotFoundError(f"Audio file not found: {audio}")
     
+    if parallel is not None and plan is None and parallel.wants(audio):
+        return parallel.transcribe(
+            audio, model, language_mode, beam_size, custom_initial_prompt, enable_vad, language, on_segment,
+            trim_silence, postprocess=postprocess, context=context, context_tokens=context_tokens,
+            adaptive_beam=adaptive_beam,
+        )
+
+    if isinstance(audio, Path) and plan is None and (wav_seconds(audio) or 0) > WINDOW_SECONDS:
+        return transcribe_windowed(
+            audio, model, language_mode, beam_size, custom_initial_prompt, enable_vad, language, on_segment,
+            trim_silence, postprocess=postprocess, context=context, context_tokens=context_tokens,
+            adaptive_beam=adaptive_beam,
+        )
+
     start_time = time.perf_counter()
+    timer = StageTimer()
 
-    # Determine language and initial_prompt based on mode
-    language = None
-    initial_prompt = None
-    suppress_tokens = None
+    if isinstance(audio, Path):
+        with timer.stage("audio_load"):
+            audio = decode_audio(str(audio), sampling_rate=SAMPLE_RATE)
 
-    def is_vad_dependency_error(err: Exception) -> bool:
-        msg = str(err).lower()
-        return (
-            "vad" in msg
-            or "silero" in msg
-            or "torch" in msg
-            or "onnxruntime" in msg
+    audio_seconds = len(audio) / SAMPLE_RATE
+    time_map = None
+    silence = None
+    if trim_silence:
+        with timer.stage("silence_trim"):
+            audio, time_map, silence = energy_vad.trim_silence(audio)
+        print(
+            f"[VAD] Dropped {silence['dropped_seconds']:.1f}s of {audio_seconds:.1f}s "
+            f"({silence['chunks']} chunks) in {timer.stages['silence_trim']:.1f}ms",
+            file=sys.stderr,
+            flush=True,
         )
 
+    if plan is None:
+        vocabulary = postprocess.vocabulary if postprocess is not None else None
+        plan = plan_transcription(
+            audio, model, language_mode, custom_initial_prompt, enable_vad, language, timer, context, context_tokens,
+            hotwords=vocabulary.hotwords if vocabulary is not None else None,
+        )
+    # Cached token ids spare model.transcribe() re-encoding the prompt text
+    initial_prompt = plan.get("prompt_tokens") or plan["initial_prompt"]
+    suppress_tokens = plan["suppress_tokens"]
+
     vad_enabled = enable_vad
+    # Adaptive: greedy first, beam_size only for the segments that need it (see adaptive_beam.py)
+    adaptive = adaptive_beam and beam_size > 1
+    first_beam = 1 if adaptive else beam_size
 
     def run_transcribe(lang: str | None):
         try:
             if os.environ.get("VOICEPASTE_DEBUG", "0") in ("1", "true", "True"):
                 print(
-                    f"[Transcribe] model.transcribe(lang={lang}, vad_filter={vad_enabled}, beam_size={beam_size})",
+                    f"[Transcribe] model.transcribe(lang={lang}, vad_filter={vad_enabled}, beam_size={first_beam})",
                     file=sys.stderr,
                     flush=True,
                 )
             faulthandler.dump_traceback_later(30, repeat=True, file=sys.stderr)
-            if vad_enabled:
+            with timer.stage("prepare"):
+                if vad_enabled:
+                    return model.transcribe(
+                        audio,
+                        language=lang,
+                        beam_size=first_beam,
+                        vad_filter=True,
+                        initial_prompt=initial_prompt,
+                        suppress_tokens=suppress_tokens,
+                        hotwords=plan.get("hotwords"),
+                    )
                 return model.transcribe(
-                    str(audio_path),
+                    audio,
                     language=lang,
-                    beam_size=beam_size,
-                    vad_filter=True,
+                    beam_size=first_beam,
                     initial_prompt=initial_prompt,
                     suppress_tokens=suppress_tokens,
+                    hotwords=plan.get("hotwords"),
                 )
-            return model.transcribe(
-                str(audio_path),
-                language=lang,
-                beam_size=beam_size,
-                initial_prompt=initial_prompt,
-                suppress_tokens=suppress_tokens,
-            )
         except (ModuleNotFoundError, ImportError, RuntimeError) as e:
-            if is_vad_dependency_error(e):
-                print(
-                    "[VAD] Missing dependency for vad_filter. "
-                    "Install required VAD deps (e.g., torch/onnxruntime).",
-                    file=sys.stderr,
-                )
-                if os.environ.get("VOICEPASTE_DEBUG", "0") in ("1", "true", "True"):
-                    traceback.print_exc(file=sys.stderr)
+            report_vad_dependency_error(e)
             raise
         finally:
             faulthandler.cancel_dump_traceback_later()
 
-    if language_mode == "en":
-        language = "en"
-    elif language_mode in ("ua", "uk"):
-        language = "uk"
-        # Force Ukrainian spelling for UK mode too
-        suppress_tokens = get_russian_suppress_tokens(model.hf_tokenizer)
-    elif language_mode == "bilingual":
-        # Bilingual mode: auto-detect but guide the model to prefer English and Ukrainian
-        # This helps prevent Whisper from misidentifying Ukrainian as Russian.
-        # We include Ukrainian-specific characters that don't exist in Russian (ґ, є, і, ї).
-        language = None  # Allow auto-detection
-        initial_prompt = (
-            "English and Ukrainian. Transcribe in these languages. "
-            "Англійська та українська мови. ґ, є, і, ї. "
+    segments, info = run_transcribe(plan["language"])
+    adaptive_decode = None
+    if adaptive:
+        def redecode(start: float, end: float) -> list:
+            beam_segments, _ = model.transcribe(
+                audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)],
+                language=info.language,
+                beam_size=beam_size,
+                initial_prompt=initial_prompt,
+                suppress_tokens=suppress_tokens,
+                hotwords=plan.get("hotwords"),
+            )
+            return list(beam_segments)
+
+        segments = adaptive_decode = AdaptiveDecode(segments, redecode, beam_size, len(audio) / SAMPLE_RATE)
+    result = collect_result(
+        segments, info, plan, audio_seconds, language_mode, timer, start_time, on_segment, time_map, postprocess
+    )
+    result["silence"] = silence
+    result["adaptive_beam"] = adaptive_decode.report() if adaptive_decode is not None else None
+    return result
+
+
+def transcribe_windowed(
+    path: Path,
+    model: WhisperModel,
+    language_mode: str = "auto",
+    beam_size: int = 5,
+    custom_initial_prompt: str = "",
+    enable_vad: bool = False,
+    language: str | None = None,
+    on_segment=None,
+    trim_silence: bool = False,
+    window_s: float = WINDOW_SECONDS,
+    postprocess: TextPipeline | None = None,
+    context: str = "",
+    context_tokens: int = 0,
+    adaptive_beam: bool = False,
+) -> dict:
+    """
+    Transcribe a long WAV window by window (see long_audio.py), so only one
+    window of samples is in memory at a time.
+
+    The first window chooses the language; later windows are decoded in it.
+    Segment times are in the timeline of the whole file.
+
+    Returns:
+        transcribe_audio() result for the whole file, with timings summed
+        over the windows and 'windows' (number of windows) added
+    """
+    start_time = time.perf_counter()
+    timer = StageTimer()
+    texts = []
+    segments = []
+    segment_decode_ms = []
+    silence = None
+    first = None
+    audio_seconds = 0.0
+    window_count = 0
+    vocabulary_reports = []
+    beam_reports = []
+
+    windows = iter_wav_windows(path, window_s)
+    while True:
+        with timer.stage("audio_load"):
+            window = next(windows, None)
+        if window is None:
+            break
+        offset, samples = window
+        window_count += 1
+
+        def shift(segment, offset=offset):
+            return {**segment, "start": round(segment["start"] + offset, 3), "end": round(segment["end"] + offset, 3)}
+
+        part = transcribe_audio(
+            samples,
+            model,
+            language_mode=language_mode,
+            beam_size=beam_size,
+            custom_initial_prompt=custom_initial_prompt,
+            enable_vad=enable_vad,
+            language=language if first is None else (language or first["language"]),
+            on_segment=(lambda segment: on_segment(shift(segment))) if on_segment is not None else None,
+            trim_silence=trim_silence,
+            postprocess=postprocess,
+            context=context,
+            context_tokens=context_tokens,
+            adaptive_beam=adaptive_beam,
         )
-        # Suppress Russian tokens in Bilingual mode as requested by user
-        suppress_tokens = get_russian_suppress_tokens(model.hf_tokenizer)
-        
-    # Append custom prompt if provided
-    if custom_initial_prompt:
-        if initial_prompt:
-            initial_prompt = initial_prompt.strip() + " " + custom_initial_prompt.strip()
+        del samples, window
+        first = first or part
+        audio_seconds += part["audio_seconds"]
+        if part["text"]:
+            texts.append(part["text"])
+        segments.extend(shift(segment) for segment in part["segments"])
+        segment_decode_ms.extend(part["segment_decode_ms"])
+        vocabulary_reports.append(part["vocabulary"])
+        beam_reports.append(part["adaptive_beam"])
+        for name, ms in part["timings"].items():
+            timer.add(name, ms)
+        if part["silence"] is not None:
+            silence = silence or {"kept_seconds": 0.0, "dropped_seconds": 0.0, "chunks": 0}
+            for key in silence:
+                silence[key] = round(silence[key] + part["silence"][key], 3)
+        print(
+            f"[Windows] {offset / 60:.1f}min: {part['audio_seconds']:.1f}s in {part['duration_ms']}ms",
+            file=sys.stderr,
+            flush=True,
+        )
+
+    if first is None:
+        raise RuntimeError(f"No audio in {path}")
+    return {
+        **first,
+        "text": " ".join(texts),
+        "duration_ms": int((time.perf_counter() - start_time) * 1000),
+        "audio_seconds": round(audio_seconds, 3),
+        "segments": segments,
+        "timings": timer.as_dict(),
+        "segment_decode_ms": segment_decode_ms,
+        "silence": silence,
+        "vocabulary": combine_reports(vocabulary_reports),
+        "adaptive_beam": combine_beam_reports(beam_reports),
+        "windows": window_count,
+    }
+
+
+def run_tiered(
+    model: WhisperModel, draft_model: WhisperModel, audio, options: dict, on_segment=None, context: str = ""
+) -> dict:
+    """
+    Short-utterance fast path: decode short clips with the draft model and
+    greedy search, and escalate to `model` unless the draft passes
+    confidence_failures().
+
+    Returns:
+        transcribe_audio() result of the model that was kept, with 'fast_path'
+        ({'decision': accepted/escalated/long, 'reasons', 'draft_ms',
+        'audio_seconds', 'max_seconds'}) added. An escalated draft's time is
+        in timings['fast_path_draft'].
+    """
+    if isinstance(audio, Path) and not audio.exists():
+        raise FileNotFoundError(f"Audio file not found: {audio}")
+
+    start_time = time.perf_counter()
+    timer = StageTimer()
+    max_seconds = options.get("fast_path_max_seconds", FAST_PATH_MAX_SECONDS)
+    if isinstance(audio, Path):
+        audio_seconds = wav_seconds(audio)
+        if audio_seconds is None or audio_seconds <= max_seconds:
+            # Decode once; both tiers get the samples
+            with timer.stage("audio_load"):
+                audio = decode_audio(str(audio), sampling_rate=SAMPLE_RATE)
+        # A long file stays a path, so transcribe_audio can read it in windows
+    if not isinstance(audio, Path):
+        audio_seconds = len(audio) / SAMPLE_RATE
+    fast_path = {
+        "decision": "long",
+        "reasons": [],
+        "draft_ms": None,
+        "audio_seconds": round(audio_seconds, 3),
+        "max_seconds": max_seconds,
+    }
+
+    def decode(tier_model, beam_size, on_segment=on_segment):
+        return transcribe_audio(
+            audio,
+            tier_model,
+            language_mode=options["language_mode"],
+            beam_size=beam_size,
+            custom_initial_prompt=options["initial_prompt"],
+            enable_vad=options["vad"],
+            on_segment=on_segment,
+            trim_silence=options.get("trim_silence", False),
+            postprocess=request_pipeline(options),
+            context=context,
+            context_tokens=options.get("context_tokens", 0),
+            adaptive_beam=options.get("adaptive_beam", False),
+        )
+
+    result = None
+    if audio_seconds <= max_seconds:
+        # Hold the draft's segments back until it is accepted, so an escalated
+        # draft never reaches on_segment
+        draft_segments = []
+        draft = decode(draft_model, 1, draft_segments.append)
+        fast_path["draft_ms"] = draft["duration_ms"]
+        fast_path["reasons"] = confidence_failures(draft["segments"])
+        if fast_path["reasons"]:
+            fast_path["decision"] = "escalated"
+            timer.add("fast_path_draft", draft["duration_ms"])
         else:
-            initial_prompt = custom_initial_prompt.strip()
+            fast_path["decision"] = "accepted"
+            result = draft
+            if on_segment is not None:
+                for segment in draft_segments:
+                    on_segment(segment)
+    if result is None:
+        result = decode(model, options["beam_size"])
 
-    segments, info = run_transcribe(language)
-    
-    # [Bilingual Fix] If we detected Russian but we're in bilingual mode (EN/UA),
-    # it's highly likely it should have been Ukrainian.
-    
-    if language_mode == "bilingual" and info.language == "ru":
-        print("[Language Guard] Detected Russian in Bilingual mode. Re-transcribing as Ukrainian with suppression...", file=sys.stderr)
-        
-        # Suppress Russian-only characters (ы, э, ъ, ё) to force Ukrainian spelling
-        if suppress_tokens is None:
-            suppress_tokens = get_russian_suppress_tokens(model.hf_tokenizer)
-        
-        segments, info = run_transcribe("uk")
-    
-    # Combine all segments into single text
-    text = " ".join(seg.text.strip() for seg in segments)
-    print(f"[Transcribe] Segments joined. Text length={len(text)}", file=sys.stderr, flush=True)
-    
-    end_time = time.perf_counter()
-    duration_ms = int((end_time - start_time) * 1000)
-    
-    # Character level fallback to catch any Russian letters that leaked through
-    if language_mode in ("ua", "uk", "bilingual"):
-        # Replace remaining Russian letters with Ukrainian equivalents
-        replacements = {
-            'ы': 'и', 'Ы': 'И',
-            'э': 'е', 'Э': 'Е',
-            'ё': 'е', 'Ё': 'Е',
-            'ъ': "'", 'Ъ': "'"
-        }
-        for ru, ua in replacements.items():
-            text = text.replace(ru, ua)
-    
+    print(
+        f"[FastPath] {fast_path['decision']} ({audio_seconds:.1f}s clip"
+        + (f", draft {fast_path['draft_ms']}ms" if fast_path["draft_ms"] is not None else "")
+        + (f", failed: {', '.join(fast_path['reasons'])}" if fast_path["reasons"] else "")
+        + ")",
+        file=sys.stderr,
+        flush=True,
+    )
     return {
-        "text": text,
-        "language": info.language,
-        "language_prob": info.language_probability,
-        "duration_ms": duration_ms
+        **result,
+        "duration_ms": int((time.perf_counter() - start_time) * 1000),
+        "timings": {**timer.as_dict(), **result["timings"]},
+        "fast_path": fast_path,
     }
 
 
+def request_pipeline(options: dict) -> TextPipeline:
+    """
+    Post-processing for merged request options: the language mode, the
+    --postprocess-rules rules and the --vocabulary terms (unless the request
+    turned them off with "vocabulary": false).
+    """
+    vocabulary = options.get("vocabulary_terms") if options.get("vocabulary", True) else None
+    return pipeline_for(options["language_mode"], options.get("postprocess_rules"), vocabulary)
+
+
+def run_request(
+    model: WhisperModel,
+    audio,
+    options: dict,
+    draft_model: WhisperModel | None = None,
+    on_segment=None,
+    parallel: ParallelTranscriber | None = None,
+    context: str = "",
+) -> dict:
+    """
+    Transcribe one worker request; options are the merged CLI defaults and overrides.
+
+    Args:
+        audio: Path to a WAV file, or float32 samples from a PCM frame
+        draft_model: Small model for the short-utterance fast path (see run_tiered)
+        on_segment: Passed to transcribe_audio (the worker uses it for cancellation)
+        parallel: Process pool for long recordings (see transcribe_audio)
+        context: Previous dictations for the prompt (options["context_tokens"] of them)
+    """
+    if isinstance(audio, Path):
+        print(f"[Worker] Received path: {audio}", file=sys.stderr, flush=True)
+        try:
+            size = audio.stat().st_size
+            print(f"[Worker] Audio size: {size} bytes", file=sys.stderr, flush=True)
+        except Exception as e:
+            print(f"[Worker] Audio stat failed: {e}", file=sys.stderr, flush=True)
+    else:
+        print(f"[Worker] Received PCM: {len(audio) / SAMPLE_RATE:.2f}s", file=sys.stderr, flush=True)
+    print("[Worker] Starting transcription...", file=sys.stderr, flush=True)
+    print(f"[Worker] VAD enabled: {options['vad']}", file=sys.stderr, flush=True)
+    if draft_model is not None:
+        result = run_tiered(model, draft_model, audio, options, on_segment, context)
+    else:
+        result = transcribe_audio(
+            audio,
+            model,
+            language_mode=options["language_mode"],
+            beam_size=options["beam_size"],
+            custom_initial_prompt=options["initial_prompt"],
+            enable_vad=options["vad"],
+            on_segment=on_segment,
+            trim_silence=options.get("trim_silence", False),
+            postprocess=request_pipeline(options),
+            parallel=parallel,
+            context=context,
+            context_tokens=options.get("context_tokens", 0),
+            adaptive_beam=options.get("adaptive_beam", False),
+        )
+    print(f"[Timer] Transcription took {result['duration_ms']}ms", file=sys.stderr)
+    print(f"[Worker] Done. Text length={len(result['text'])}", file=sys.stderr, flush=True)
+    return result
+
+
+class Worker:
+    """
+    Resident worker state shared by all requests on one stdin/stdout pair.
+
+    stdin is read on the calling thread; transcription requests and stream
+    stops (the final decode of a stream) are queued (request_queue.py) and run
+    on a dispatcher thread, so new requests, cancellations and pings are
+    accepted while a decode is running.
+
+    Args:
+        model: Loaded WhisperModel for the default settings; pinned in the pool
+        defaults: CLI defaults (language_mode, beam_size, initial_prompt, vad,
+            model, device, compute_type)
+        stdout: Text output stream for READY and protocol messages
+        pool: ModelPool for requests that pick another model (default: a new pool)
+        batch_size: Most queued requests decoded together (1 disables batching)
+        batch_decoder: Batched decode function (default: batching.decode_batch)
+        result_cache: ResultCache answering repeated audio (None disables caching)
+        parallel: Process pool for long recordings on the default model (see
+            parallel_transcribe.py; None decodes them in this process)
+    """
+
+    def __init__(
+        self,
+        model: WhisperModel,
+        defaults: dict,
+        stdout,
+        pool: ModelPool | None = None,
+        batch_size: int = 1,
+        batch_decoder=None,
+        result_cache: ResultCache | None = None,
+        parallel: ParallelTranscriber | None = None,
+    ):
+        self.defaults = defaults
+        self.writer = MessageWriter(stdout)
+        self.streams: dict[str, StreamingSession | TailSession] = {}
+        # Streams stopped by the client, waiting for (or running) their final decode on the dispatcher
+        self.stopping: dict[str, StreamingSession | TailSession] = {}
+        self.metrics = MetricsAggregator()
+        self.pool = pool if pool is not None else ModelPool()
+        self.default_key = model_key(defaults)
+        self.pool.put(self.default_key, model, pinned=True)
+        self.queue = RequestQueue()
+        self.batch_size = batch_size
+        self.batch_decoder = batch_decoder or decode_batch
+        self.result_cache = result_cache
+        self.parallel = parallel
+        self.context = DictationContext()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="dispatcher", daemon=True)
+
+    def resolve_model_key(self, overrides: dict) -> tuple:
+        options = {**self.defaults, **overrides}
+        if "device" in overrides and "compute_type" not in overrides:
+            options["compute_type"] = default_compute_type(options["device"])
+        return model_key(options) + thread_key(options, self.defaults)
+
+    def model_for(self, overrides: dict, timer: StageTimer | None = None) -> WhisperModel:
+        """The pooled model for a request's option overrides (loaded if needed)."""
+        return self.pool.get(self.resolve_model_key(overrides), timer)
+
+    def serve(self, stdin) -> None:
+        """Print READY, then answer requests from a binary stream until QUIT/EOF."""
+        self.writer.send_raw("READY")
+        self._dispatcher.start()
+        for raw_line in stdin:
+            # A stray non-UTF-8 byte must not end the worker: it shows up as U+FFFD and the
+            # request then fails on its own (bad JSON, or a path that doesn't exist)
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            if line == "QUIT":
+                break
+            if is_json_request(line):
+                payload = None
+                size = frame_size(line)
+                try:
+                    if size > MAX_FRAME_BYTES:
+                        skip_frame(stdin, size)
+                    elif size:
+                        payload = read_frame(stdin, size)
+                except EOFError as e:
+                    print(f"[Worker] {e}", file=sys.stderr, flush=True)
+                    break
+                if not self.handle_json_request(line, payload):
+                    break
+            else:
+                self.handle_legacy_request(line)
+        self.drain()
+        for session in self.streams.values():
+            session.cancel()
+        if self.parallel is not None:
+            self.parallel.close()
+        self.pool.close()
+
+    def drain(self) -> None:
+        """Stop accepting requests and wait until the queued ones are answered."""
+        self.queue.close()
+        if self._dispatcher.is_alive():
+            self._dispatcher.join()
+
+    def handle_json_request(self, line: str, payload=None) -> bool:
+        """
+        Handle one JSON protocol request. Transcriptions are queued; everything
+        else is answered right away.
+
+        Args:
+            payload: Binary PCM frame that followed the line, if any
+
+        Returns:
+            False when the worker should shut down, True otherwise.
+        """
+        writer = self.writer
+        try:
+            request = parse_request(line, payload)
+        except ProtocolError as e:
+            print(f"[Worker] Bad request: {e}", file=sys.stderr, flush=True)
+            writer.error(e.request_id, str(e))
+            writer.end(e.request_id)
+            return True
+
+        request_id = request.get("id")
+        op = request["op"]
+        if op == "quit":
+            # Requests queued before quit are still answered
+            self.drain()
+            writer.end(request_id)
+            return False
+        if op == "ping":
+            writer.send(message("pong", request_id, protocol=PROTOCOL_VERSION))
+            return True
+        if op == "metrics":
+            writer.send(message(
+                "metrics", request_id, **self.metrics.snapshot(), pool=self.pool.snapshot(), queued=len(self.queue),
+                cpu=cpu_config.describe(self.defaults.get("cpu_threads", 0), self.defaults.get("num_workers", 1)),
+                result_cache=self.result_cache.snapshot() if self.result_cache is not None else None,
+                prompt_cache=PROMPT_CACHE.snapshot(),
+            ))
+            return True
+        if op == "cancel":
+            self.cancel_request(request_id)
+            return True
+        if op.startswith("stream_"):
+            self.handle_stream_request(request)
+            return True
+
+        self.queue.put(QueuedRequest(request))
+        return True
+
+    def cancel_request(self, request_id: str) -> None:
+        """A queued request is answered as cancelled now; a running one when it stops."""
+        state = self.queue.cancel(request_id)
+        print(f"[Worker] Cancel {request_id}: {state or 'not pending'}", file=sys.stderr, flush=True)
+        if state == "queued":
+            session = self.stopping.pop(request_id, None)
+            if session is not None:
+                session.cancel()
+            self.writer.result(request_id, status="cancelled")
+            self.writer.end(request_id)
+
+    def _dispatch(self) -> None:
+        while True:
+            batch = self.queue.pop_batch(self.batch_size, self._can_batch)
+            if batch is None:
+                return
+            try:
+                if len(batch) == 1:
+                    self._run_one(batch[0])
+                else:
+                    self._run_batch(batch)
+            finally:
+                self.queue.done(batch)
+
+    def _can_batch(self, first: QueuedRequest, other: QueuedRequest) -> bool:
+        def batchable(item):
+            options = {**self.defaults, **item.request["options"]}
+            return (
+                not item.legacy
+                and item.request["op"] == "transcribe"
+                and not options["vad"]
+                and not options.get("trim_silence")
+                and not options.get("adaptive_beam")
+                and self.draft_model_for(item.request["options"], load=False) is None
+                and item.seconds <= BATCH_MAX_SECONDS
+            )
+
+        return (
+            batchable(first)
+            and batchable(other)
+            and self.resolve_model_key(first.request["options"]) == self.resolve_model_key(other.request["options"])
+        )
+
+    def _run_one(self, item: QueuedRequest) -> None:
+        if item.legacy:
+            self._run_legacy(item)
+            return
+        if item.request["op"] == "stream_stop":
+            self._finish_stream(item)
+            return
+        request = item.request
+        options = {**self.defaults, **request["options"]}
+        try:
+            timer = StageTimer()
+            timer.add("queue", (time.perf_counter() - item.received) * 1000)
+            key, cached = self._cache_lookup(item, options, timer)
+            if cached is not None:
+                self._send_cached(item, options, timer, cached)
+                return
+            model = self.model_for(request["options"], timer)
+            draft_model = self.draft_model_for(request["options"], timer)
+            if "audio" in request:
+                with timer.stage("audio_load"):
+                    audio = pcm16_to_float32(request["audio"])
+            else:
+                audio = Path(request["path"])
+            # The pool's processes hold the default model only
+            parallel = self.parallel if self.resolve_model_key(request["options"]) == self.default_key else None
+            result = run_request(
+                model, audio, options, draft_model, on_segment=self._on_segment(item, options), parallel=parallel,
+                context=self.context_for(options),
+            )
+            item.check_cancelled()
+            self._cache_store(key, result)
+            self.remember_dictation(options, result)
+            self._send_result(item, timer, result)
+        except RequestCancelled:
+            self._send_cancelled(item)
+        except Exception as e:
+            self._send_error(item, e)
+
+    def _run_batch(self, batch: list[QueuedRequest]) -> None:
+        """Plan each request, then decode those that share a plan in one batched call."""
+        start_time = time.perf_counter()
+        model = self.model_for(batch[0].request["options"])
+        groups: dict[tuple, list] = {}
+        for item in batch:
+            options = {**self.defaults, **item.request["options"]}
+            timer = StageTimer()
+            timer.add("queue", (start_time - item.received) * 1000)
+            key, cached = self._cache_lookup(item, options, timer)
+            if cached is not None:
+                self._send_cached(item, options, timer, cached)
+                continue
+            try:
+                with timer.stage("audio_load"):
+                    if "audio" in item.request:
+                        audio = pcm16_to_float32(item.request["audio"])
+                    else:
+                        path = Path(item.request["path"])
+                        if not path.exists():
+                            raise FileNotFoundError(f"Audio file not found: {path}")
+                        audio = decode_audio(str(path), sampling_rate=SAMPLE_RATE)
+                vocabulary = request_pipeline(options).vocabulary
+                plan = plan_transcription(
+                    audio, model, options["language_mode"], options["initial_prompt"], timer=timer,
+                    context=self.context_for(options), context_tokens=options.get("context_tokens", 0),
+                    hotwords=vocabulary.hotwords if vocabulary is not None else None,
+                )
+            except Exception as e:
+                self._send_error(item, e)
+                continue
+            group_key = batch_key(plan, options["beam_size"])
+            if len(audio) > BATCH_MAX_SECONDS * SAMPLE_RATE:
+                group_key = ("single", item.id)
+            groups.setdefault(group_key, []).append((item, options, audio, plan, timer, key))
+
+        for group in groups.values():
+            if len(group) == 1:
+                item, options, audio, plan, timer, key = group[0]
+                try:
+                    result = transcribe_audio(
+                        audio,
+                        model,
+                        language_mode=options["language_mode"],
+                        beam_size=options["beam_size"],
+                        on_segment=self._on_segment(item, options),
+                        plan=plan,
+                        postprocess=request_pipeline(options),
+                        adaptive_beam=options.get("adaptive_beam", False),
+                    )
+                    self._cache_store(key, result)
+                    self.remember_dictation(options, result)
+                    self._send_result(item, timer, result)
+                except RequestCancelled:
+                    self._send_cancelled(item)
+                except Exception as e:
+                    self._send_error(item, e)
+                continue
+
+            _, options, _, plan, _, _ = group[0]
+            print(f"[Batch] Decoding {len(group)} requests together", file=sys.stderr, flush=True)
+            try:
+                batch_start = time.perf_counter()
+                per_request = self.batch_decoder(
+                    model, [audio for _, _, audio, _, _, _ in group], plan, options["beam_size"], self.batch_size
+                )
+                batch_ms = (time.perf_counter() - batch_start) * 1000
+            except Exception as e:
+                for item, *_ in group:
+                    self._send_error(item, e)
+                continue
+
+            for (item, options, audio, plan, timer, key), segments in zip(group, per_request):
+                if item.cancelled.is_set():
+                    self._send_cancelled(item)
+                    continue
+                timer.add("batch_decode", batch_ms)
+                info = SimpleNamespace(language=plan["language"], language_probability=1.0)
+                try:
+                    result = collect_result(
+                        segments, info, plan, len(audio) / SAMPLE_RATE, options["language_mode"], timer,
+                        start_time, self._on_segment(item, options), postprocess=request_pipeline(options),
+                    )
+                except RequestCancelled:
+                    self._send_cancelled(item)
+                    continue
+                self._cache_store(key, result)
+                self.remember_dictation(options, result)
+                self._send_result(item, StageTimer(), result, batch_size=len(group))
+
+    def _cache_lookup(self, item: QueuedRequest, options: dict, timer: StageTimer) -> tuple[str | None, dict | None]:
+        """
+        (cache key, cached result) for a request; the key is None when the
+        result cache is off, the request opted out ("cache": false) or its
+        audio can't be read (it then fails as usual when decoded).
+        """
+        if self.result_cache is None or not options.get("cache", True):
+            return None, None
+        request = item.request
+        with timer.stage("cache_lookup"):
+            try:
+                audio = request["audio"] if "audio" in request else Path(request["path"])
+                key = cache_key(
+                    pcm_digest(audio), self.resolve_model_key(request["options"]), options, self.context_for(options)
+                )
+            except OSError:
+                return None, None
+            return key, self.result_cache.get(key)
+
+    def _cache_store(self, key: str | None, result: dict) -> None:
+        if key is not None:
+            self.result_cache.put(key, result)
+
+    def context_for(self, options: dict) -> str:
+        """Previous dictations for a request's prompt ("" when the context is off for it)."""
+        if not options.get("context_tokens") or not options.get("context", True):
+            return ""
+        return self.context.text(options["language_mode"])
+
+    def remember_dictation(self, options: dict, result: dict) -> None:
+        """Add a decoded transcript to the context of later requests (cached replays aren't added)."""
+        if options.get("context_tokens") and options.get("context", True):
+            self.context.add(options["language_mode"], result["text"])
+
+    def _send_cached(self, item: QueuedRequest, options: dict, timer: StageTimer, cached: dict) -> None:
+        """Answer a request from a cached result, replaying its segments if asked to."""
+        print(f"[Cache] Hit for request {item.id}", file=sys.stderr, flush=True)
+        try:
+            on_segment = self._on_segment(item, options)
+            for segment in cached["segments"]:
+                on_segment(segment)
+        except RequestCancelled:
+            self._send_cancelled(item)
+            return
+        result = {**cached, "timings": {}, "duration_ms": 0}
+        if item.legacy:
+            self.metrics.record(timer.as_dict(), result["audio_seconds"])
+            self.writer.send_raw(result["text"])
+            return
+        self._send_result(item, timer, result, cached=True)
+
+    def _on_segment(self, item: QueuedRequest, options: dict):
+        """
+        on_segment callback for a request: stops it once cancelled and, with
+        the "segments" option, sends each segment as soon as it is decoded.
+        """
+        if not options.get("segments") or item.legacy:
+            return item.check_cancelled
+        index = 0
+
+        def send_segment(segment: dict) -> None:
+            nonlocal index
+            item.check_cancelled()
+            self.writer.send(message(
+                "segment", item.id, index=index, start=segment["start"], end=segment["end"], text=segment["text"]
+            ))
+            index += 1
+
+        return send_segment
+
+    def _send_result(self, item: QueuedRequest, timer: StageTimer, result: dict, **fields) -> None:
+        stages = timer.as_dict()
+        stages.update(result["timings"])
+        total_ms = int((time.perf_counter() - item.received) * 1000)
+        timings = {**stages, "transcribe_ms": result["duration_ms"], "total_ms": total_ms}
+        self.metrics.record(stages, result["audio_seconds"])
+        if "fast_path" in result:
+            fields["fast_path"] = result["fast_path"]
+        if result.get("silence"):
+            fields["silence"] = result["silence"]
+        if result.get("prompt"):
+            fields["prompt"] = result["prompt"]
+        if result.get("vocabulary"):
+            fields["vocabulary"] = result["vocabulary"]
+        if result.get("adaptive_beam"):
+            fields["adaptive_beam"] = result["adaptive_beam"]
+        if self.result_cache is not None:
+            fields.setdefault("cached", False)
+        self.writer.result(
+            item.id,
+            status="ok",
+            text=result["text"],
+            language=result["language"],
+            language_prob=result["language_prob"],
+            language_route=result["language_route"],
+            timings=timings,
+            segment_decode_ms=result["segment_decode_ms"],
+            segment_count=len(result["segments"]),
+            **fields,
+        )
+        self.writer.end(item.id)
+
+    def _send_error(self, item: QueuedRequest, error: Exception) -> None:
+        print(f"Error: {error}", file=sys.stderr, flush=True)
+        self.metrics.record_error()
+        self.writer.error(item.id, str(error))
+        self.writer.end(item.id)
+
+    def _send_cancelled(self, item: QueuedRequest) -> None:
+        print(f"[Worker] Request {item.id} cancelled", file=sys.stderr, flush=True)
+        self.writer.result(item.id, status="cancelled")
+        self.writer.end(item.id)
+
+    def draft_model_for(self, overrides: dict, timer: StageTimer | None = None, load: bool = True):
+        """
+        The fast-path draft model, if the fast path is configured and enabled
+        for this request. With load=False only its pool key is returned.
+        """
+        options = {**self.defaults, **overrides}
+        if not options.get("fast_path") or not options.get("fast_path_model"):
+            return None
+        overrides = {**overrides, "model": options["fast_path_model"]}
+        if not load:
+            return self.resolve_model_key(overrides)
+        return self.model_for(overrides, timer)
+
+    def start_stream(self, overrides: dict, path: Path | None = None) -> StreamingSession | TailSession:
+        """A session fed by stream_audio, or with `path` one following the recording's WAV file."""
+        options = {**self.defaults, **overrides}
+        model = self.model_for(overrides)
+
+        def decode(audio, language):
+            return transcribe_audio(
+                audio,
+                model,
+                language_mode=options["language_mode"],
+                beam_size=options["beam_size"],
+                custom_initial_prompt=options["initial_prompt"],
+                enable_vad=options["vad"],
+                language=language,
+                trim_silence=options.get("trim_silence", False),
+                postprocess=request_pipeline(options),
+                adaptive_beam=options.get("adaptive_beam", False),
+            )
+
+        if path is not None:
+            return TailSession(path, decode)
+        return StreamingSession(decode)
+
+    def handle_stream_request(self, request: dict) -> None:
+        """stream_start/stream_audio/stream_stop/stream_cancel; only stop, cancel and failures are answered."""
+        writer = self.writer
+        streams = self.streams
+        request_id = request["id"]
+        op = request["op"]
+        try:
+            if op == "stream_start":
+                if request_id in streams:
+                    raise ValueError(f"Stream already open: {request_id}")
+                path = Path(request["path"]) if "path" in request else None
+                streams[request_id] = self.start_stream(request["options"], path)
+                print(
+                    f"[Stream] Started {request_id}" + (f", following {path}" if path else ""),
+                    file=sys.stderr,
+                    flush=True,
+                )
+                return
+
+            session = streams.get(request_id)
+            if session is None:
+                raise ValueError(f"No open stream: {request_id}")
+            if op == "stream_audio":
+                if isinstance(session, TailSession):
+                    raise ValueError(f"Stream {request_id} follows {session.path}; it takes no audio")
+                session.feed(request["audio"])
+                return
+
+            del streams[request_id]
+            if op == "stream_cancel":
+                session.cancel()
+                writer.end(request_id)
+                return
+
+            # The final decode runs on the dispatcher; this thread only reads requests
+            self.stopping[request_id] = session
+            self.queue.put(QueuedRequest(request))
+            return
+        except Exception as e:
+            # Any failure closes the stream; the client gets one error + end for it
+            print(f"[Stream] Error: {e}", file=sys.stderr, flush=True)
+            session = streams.pop(request_id, None) or self.stopping.pop(request_id, None)
+            if session is not None:
+                session.cancel()
+            writer.error(request_id, str(e))
+        writer.end(request_id)
+
+    def _finish_stream(self, item: QueuedRequest) -> None:
+        """Decode what's left of a stopped stream and answer its stream_stop."""
+        writer = self.writer
+        request_id = item.id
+        session = self.stopping.pop(request_id, None)
+        if session is None:
+            # Cancelled while queued; already answered
+            return
+        try:
+            result = session.finish()
+            stop_ms = int((time.perf_counter() - item.received) * 1000)
+            print(
+                f"[Stream] {request_id}: {session.received_seconds:.1f}s audio, "
+                f"{result['windows_decoded']} windows, tail {result['tail_seconds']}s in {result['tail_ms']}ms",
+                file=sys.stderr,
+                flush=True,
+            )
+            writer.result(
+                request_id,
+                status="ok",
+                text=result["text"],
+                language=result["language"],
+                timings={
+                    "background_ms": result["background_ms"],
+                    "tail_ms": result["tail_ms"],
+                    "stop_to_result_ms": stop_ms,
+                },
+                windows_decoded=result["windows_decoded"],
+                tail_seconds=result["tail_seconds"],
+            )
+        except Exception as e:
+            print(f"[Stream] Error: {e}", file=sys.stderr, flush=True)
+            session.cancel()
+            writer.error(request_id, str(e))
+        writer.end(request_id)
+
+    def handle_legacy_request(self, line: str) -> None:
+        """Legacy protocol: a bare WAV path in, one bare text line (empty on error) out."""
+        self.queue.put(QueuedRequest({"path": line, "options": {}}, legacy=True))
+
+    def _run_legacy(self, item: QueuedRequest) -> None:
+        try:
+            timer = StageTimer()
+            key, cached = self._cache_lookup(item, self.defaults, timer)
+            if cached is not None:
+                self._send_cached(item, self.defaults, timer, cached)
+                return
+            result = run_request(
+                self.model_for({}), Path(item.request["path"]), self.defaults, parallel=self.parallel,
+                context=self.context_for(self.defaults),
+            )
+            self._cache_store(key, result)
+            self.remember_dictation(self.defaults, result)
+            self.metrics.record(result["timings"], result["audio_seconds"])
+            self.writer.send_raw(result["text"])
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr, flush=True)
+            self.metrics.record_error()
+            self.writer.send_raw("")  # Empty line for error
+
+
+def serve(
+    model: WhisperModel,
+    defaults: dict,
+    stdin,
+    stdout,
+    pool: ModelPool | None = None,
+    batch_size: int = 1,
+    result_cache: ResultCache | None = None,
+    parallel: ParallelTranscriber | None = None,
+) -> None:
+    """
+    Resident worker loop: print READY, then answer requests until QUIT/EOF.
+
+    Args:
+        model: Loaded WhisperModel for the default settings
+        defaults: CLI defaults (language_mode, beam_size, initial_prompt, vad,
+            model, device, compute_type)
+        stdin: Binary input stream, one request per line (plus PCM frames)
+        stdout: Text output stream for READY and protocol messages
+        pool: ModelPool for other models requested per request
+        batch_size: Most queued requests decoded in one batch (1 disables batching)
+        result_cache: ResultCache for repeated audio (None disables caching)
+        parallel: Process pool for long recordings (None disables it)
+    """
+    Worker(model, defaults, stdout, pool, batch_size, result_cache=result_cache, parallel=parallel).serve(stdin)
+
+
+def package_version(name: str) -> str:
+    """Installed version of a package, without importing it."""
+    from importlib import metadata
+
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "not installed"
+
+
+def describe_missing(report: dict) -> str:
+    """Why check_model() didn't find a usable copy, for the MODEL_MISSING line."""
+    if report.get("error"):
+        return report["error"]
+    if report["path"] is None:
+        return "not found in the Hugging Face cache"
+    problems = [f"{name}: {entry['error']}" for name, entry in report["files"].items() if not entry["ok"]]
+    return f"{report['path']}: " + ", ".join(problems)
+
+
+def report_startup(timer: StageTimer) -> None:
+    """
+    Print the startup profile: ms per stage (imports of the worker's own
+    modules, faster_whisper_import, model_load, cache_check) and ready_ms, the
+    time from the first import to this point (READY follows immediately).
+    """
+    profile = {**timer.as_dict(), "ready_ms": round((time.perf_counter() - _IMPORT_START) * 1000, 2)}
+    print(f"[Startup] {json.dumps(profile)}", file=sys.stderr, flush=True)
+
+
+def load_settings_model(model_name: str, device: str, settings: dict) -> WhisperModel:
+    """Load the worker's model with autotune.startup_settings() settings."""
+    return load_whisper_model(
+        (model_name, device, settings["compute_type"]), settings["cpu_threads"], settings["num_workers"]
+    )
+
+
+def parse_cpu_processes(value: str) -> int:
+    """--cpu-processes: a process count, with 0 or "auto" for default_processes()."""
+    if value == "auto":
+        return 0
+    try:
+        processes = int(value)
+    except ValueError:
+        processes = -1
+    if processes < 0:
+        raise argparse.ArgumentTypeError(f"must be a number >= 0 or auto, got {value!r}")
+    return processes
+
+
+def one_off_cache_key(args, device: str, compute_type: str) -> str:
+    """Result cache key of a one-off run; the same as a worker request with these settings."""
+    options = {
+        "language_mode": args.language_mode,
+        "beam_size": args.beam_size,
+        "initial_prompt": args.initial_prompt,
+        "vad": args.vad,
+        "trim_silence": args.trim_silence,
+        "postprocess_rules": args.postprocess_rules,
+        "vocabulary_terms": args.vocabulary,
+        "adaptive_beam": args.adaptive_beam,
+    }
+    return cache_key(pcm_digest(args.input), (args.model, device, compute_type), options)
+
+
+def cached_one_off(args, device: str, compute_type: str, result_cache: ResultCache) -> tuple[str | None, dict | None]:
+    """
+    (cache key, cached result) of a one-off run: the result of an earlier
+    identical one-off run or worker request, if any. The key is None when
+    the audio can't be read.
+    """
+    try:
+        key = one_off_cache_key(args, device, compute_type)
+    except OSError:
+        return None, None
+    cached = result_cache.get(key)
+    if cached is not None:
+        print(f"[Cache] Hit for {args.input}", file=sys.stderr, flush=True)
+    return key, cached
+
+
+def run_autotune(args) -> int:
+    """--autotune: benchmark compute types/threads on a clip and save the machine profile."""
+    if not args.autotune.exists():
+        print(f"Error: clip not found: {args.autotune}", file=sys.stderr)
+        return 1
+    audio = decode_audio(str(args.autotune), sampling_rate=SAMPLE_RATE)
+
+    def transcribe(model, clip):
+        return transcribe_audio(
+            clip, model, language_mode=args.language_mode, beam_size=args.beam_size,
+            custom_initial_prompt=args.initial_prompt,
+        )["text"]
+
+    def loader(model_name, device, compute_type, cpu_threads):
+        return load_whisper_model((model_name, device, compute_type), cpu_threads)
+
+    try:
+        entry = autotune.autotune(args.model, args.device, audio, transcribe, loader)
+    except Exception as e:
+        print(f"AUTOTUNE_FAILED: {e}", file=sys.stderr)
+        return 1
+    autotune.save_profile(get_cache_dir() / autotune.PROFILE_NAME, args.model, args.device, entry)
+    print(
+        f"[Autotune] {args.model} on {args.device}: {entry['compute_type']} "
+        f"cpu_threads={entry['cpu_threads'] or 'auto'} ({entry['median_ms']}ms, agreement {entry['agreement']})",
+        file=sys.stderr,
+        flush=True,
+    )
+    print(json.dumps(entry, ensure_ascii=False))
+    return 0
+
+
 def main():
     """CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -206,6 +1639,47 @@ def main():
         choices=["cuda", "cpu"],
         help="Device to use (default: cuda)"
     )
+    parser.add_argument(
+        "--compute-type",
+        help="CTranslate2 compute type (default: from the --autotune profile, else float16 on CUDA, int8 on CPU)"
+    )
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        help="CTranslate2 threads per decode, 0 = one per physical core (default: from the --autotune "
+             "profile, else one per physical core)"
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        help="CTranslate2 workers, for decodes running in parallel (default: 1)"
+    )
+    parser.add_argument(
+        "--cpu-processes",
+        type=parse_cpu_processes,
+        default=1,
+        help="On CPU, split recordings longer than --parallel-min-seconds across this many processes, "
+             "each with its own model copy and a share of --cpu-threads; 1 = off, 0 or auto = one per two "
+             "physical cores, up to 4 (default: 1)"
+    )
+    parser.add_argument(
+        "--parallel-min-seconds",
+        type=float,
+        default=PARALLEL_MIN_SECONDS,
+        help=f"Shortest recording split across --cpu-processes (default: {PARALLEL_MIN_SECONDS:g})"
+    )
+    parser.add_argument(
+        "--cpu-affinity",
+        metavar="CPUS",
+        help="Run only on these CPUs, e.g. 0-3,6 (thread defaults then count only these)"
+    )
+    parser.add_argument(
+        "--autotune",
+        type=Path,
+        metavar="CLIP",
+        help="Time the compute types and thread counts on this WAV clip, save the fastest accurate one "
+             "as this machine's profile and exit"
+    )
     parser.add_argument(
         "--no-fallback",
         action="store_true",
@@ -228,63 +1702,225 @@ def main():
         default=5,
         help="Beam size for transcription (default: 5)"
     )
+    parser.add_argument(
+        "--adaptive-beam",
+        action="store_true",
+        help="Decode greedily and re-decode only low-confidence segments with --beam-size (see adaptive_beam.py)"
+    )
+    parser.add_argument(
+        "--postprocess-rules",
+        type=Path,
+        metavar="FILE",
+        dest="postprocess_rules_path",
+        help="JSON file of transcript clean-up rules and replacements (see postprocess.py)"
+    )
+    parser.add_argument(
+        "--vocabulary",
+        type=Path,
+        metavar="FILE",
+        dest="vocabulary_path",
+        help="JSON file of product names and identifiers to bias decoding towards and correct in the text "
+             "(see vocabulary.py)"
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=0,
+        help=f"Server mode: append up to this many tokens of the previous dictations to the prompt, "
+             f"0 = off, at most {MAX_PROMPT_TOKENS} (default: 0)"
+    )
     parser.add_argument(
         "--vad",
         action="store_true",
         help="Enable VAD (silence trimming). Requires onnxruntime."
     )
+    parser.add_argument(
+        "--trim-silence",
+        action="store_true",
+        help="Drop long pauses with the built-in energy VAD before decoding (no extra dependencies)"
+    )
     parser.add_argument(
         "--wait",
         action="store_true",
         help="Start in server mode: load model, print READY, and wait for input path on stdin"
     )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=2,
+        help="Models kept loaded in server mode, including the default one; 1 swaps it out for others (default: 2)"
+    )
+    parser.add_argument(
+        "--model-idle-ttl",
+        type=float,
+        default=600,
+        help="Unload extra models after this many idle seconds, 0 = never (default: 600)"
+    )
+    parser.add_argument(
+        "--model-memory-mb",
+        type=float,
+        default=0,
+        help="Memory budget for loaded models in MB, 0 = unlimited (default: 0)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Decode up to this many queued short requests in one batch in server mode (default: 1, off)"
+    )
+    parser.add_argument(
+        "--fast-path-model",
+        help="Small model for short clips in server mode (e.g. base); enables the fast path"
+    )
+    parser.add_argument(
+        "--fast-path-max-seconds",
+        type=float,
+        default=FAST_PATH_MAX_SECONDS,
+        help=f"Longest clip tried on the fast-path model (default: {FAST_PATH_MAX_SECONDS:g})"
+    )
     parser.add_argument(
         "--check-model",
         action="store_true",
-        help="Check if model is cached locally and exit"
+        help="Check if model is cached locally and exit (reads the cache index, loads nothing)"
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="With --check-model: also verify sha256 checksums (slow for large models)"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="With --check-model: print the full report as one JSON line"
     )
     parser.add_argument(
         "--download-model",
         action="store_true",
-        help="Download model to cache and exit"
+        help="Download model to cache and exit (resumable; prints PROGRESS lines)"
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=4,
+        help="Parallel range requests per file for --download-model (default: 4)"
+    )
+    parser.add_argument(
+        "--result-cache",
+        type=int,
+        default=32,
+        help="Results of recent audio kept in memory in server mode, 0 = off (default: 32)"
+    )
+    parser.add_argument(
+        "--result-cache-disk",
+        action="store_true",
+        help="Also keep results on disk in the worker cache dir; one-off runs on the same audio then skip the decode"
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="Report import and model-load times on stderr (as [Startup] JSON) before serving"
     )
 
     args = parser.parse_args()
+    startup = StageTimer()
+    startup.add("imports", IMPORT_MS)
+    if args.cpu_threads is not None and args.cpu_threads < 0:
+        parser.error("--cpu-threads must be >= 0")
+    if args.num_workers is not None and args.num_workers < 1:
+        parser.error("--num-workers must be >= 1")
+    if not 0 <= args.context_tokens <= MAX_PROMPT_TOKENS:
+        parser.error(f"--context-tokens must be between 0 and {MAX_PROMPT_TOKENS}")
+    args.postprocess_rules = None
+    if args.postprocess_rules_path:
+        try:
+            args.postprocess_rules = load_rules(args.postprocess_rules_path)
+        except ValueError as e:
+            print(f"Error: --postprocess-rules: {e}", file=sys.stderr)
+            return 1
+    args.vocabulary = None
+    if args.vocabulary_path:
+        try:
+            with startup.stage("vocabulary_compile"):
+                args.vocabulary = load_vocabulary(args.vocabulary_path)
+        except ValueError as e:
+            print(f"Error: --vocabulary: {e}", file=sys.stderr)
+            return 1
+        print(
+            f"[Vocabulary] {json.dumps(args.vocabulary.summary())} compiled in "
+            f"{startup.stages['vocabulary_compile']:.0f}ms",
+            file=sys.stderr,
+            flush=True,
+        )
+    if args.cpu_affinity:
+        try:
+            cpu_config.set_affinity(cpu_config.parse_affinity(args.cpu_affinity))
+        except (ValueError, OSError) as e:
+            print(f"Error: --cpu-affinity {args.cpu_affinity}: {e}", file=sys.stderr)
+            return 1
 
-    # Handle --check-model flag
+    # Handle --check-model flag: looks at the cache only, no faster_whisper import or weight load
     if args.check_model:
-        try:
-            from faster_whisper.utils import available_models
-            # Simple check: try to construct model path
-            print(f"Checking model: {args.model}")
-            model = WhisperModel(args.model, device="cpu", compute_type="int8", download_root=None)
-            print("MODEL_PRESENT")
-            return 0
-        except Exception as e:
-            print(f"MODEL_MISSING: {e}", file=sys.stderr)
+        with startup.stage("cache_check"):
+            report = check_model(args.model, verify=args.verify)
+        if args.startup_profile:
+            report_startup(startup)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False))
+            return 0 if report["present"] else 1
+        print(f"Checking model: {args.model}")
+        if not report["present"]:
+            print(f"MODEL_MISSING: {describe_missing(report)}", file=sys.stderr)
             return 1
+        print("MODEL_PRESENT")
+        return 0
 
     # Handle --download-model flag
     if args.download_model:
+        from model_download import download_model
+
         try:
             print(f"Downloading model: {args.model}", flush=True)
-            # Download by initializing model (faster-whisper auto-downloads to HF cache)
-            WhisperModel(args.model, device="cpu", compute_type="int8")
+            # Parallel ranged fetch into the HF cache; resumes and verifies, loads nothing
+            download_model(args.model, workers=args.download_workers)
             print("DOWNLOAD_COMPLETE", flush=True)
             return 0
         except Exception as e:
             print(f"DOWNLOAD_FAILED: {e}", file=sys.stderr)
             return 1
 
-    # Determine compute type based on device
-    compute_type = "float16" if args.device == "cuda" else "int8"
-    
-    try:
-        model = WhisperModel(
-            args.model,
-            device=args.device,
-            compute_type=compute_type
+    if args.autotune:
+        return run_autotune(args)
+
+    # Compute type and threads: --compute-type, else this machine's autotune profile, else the device default
+    device = args.device
+    profile_path = get_cache_dir() / autotune.PROFILE_NAME
+    settings = autotune.startup_settings(
+        profile_path, args.model, device, args.compute_type, args.cpu_threads, args.num_workers
+    )
+    # OpenMP reads its thread count once, when ctranslate2 is first imported
+    cpu_config.configure_environment(settings["cpu_threads"])
+
+    result_cache = None
+    if args.result_cache > 0 or args.result_cache_disk:
+        result_cache = ResultCache(
+            max(args.result_cache, 0), get_cache_dir() / "results" if args.result_cache_disk else None
         )
+    one_off_key = None
+    if not args.wait and args.input and args.result_cache_disk:
+        # A repeat of an earlier one-off run (e.g. the app's fallback) skips the model load too. Only the
+        # disk cache outlives the process, so the WAV is hashed only with it on. The key is for the requested
+        # device and stays the same after a CUDA -> CPU fallback, so the next run finds the result
+        one_off_key, cached = cached_one_off(args, device, settings["compute_type"], result_cache)
+        if cached is not None:
+            print(cached["text"])
+            return 0
+
+    with startup.stage("faster_whisper_import"):
+        import faster_whisper  # noqa: F401  (timed here; load_whisper_model imports it again for free)
+
+    try:
+        with startup.stage("model_load"):
+            model = load_settings_model(args.model, device, settings)
     except Exception as e:
         if args.device == "cuda":
             if args.no_fallback:
@@ -292,61 +1928,75 @@ def main():
                 return 1
             else:
                 print(f"CUDA failed, falling back to CPU: {e}", file=sys.stderr)
-                model = WhisperModel(args.model, device="cpu", compute_type="int8")
+                device = "cpu"
+                settings = autotune.startup_settings(
+                    profile_path, args.model, device, None, args.cpu_threads, args.num_workers
+                )
+                with startup.stage("model_load"):
+                    model = load_settings_model(args.model, device, settings)
         else:
             print(f"Error: {e}", file=sys.stderr)
             return 1
+    compute_type = settings["compute_type"]
 
     print(
-        f"[Worker] Model loaded: {args.model} on {args.device} (compute_type={compute_type})",
+        f"[Worker] Model loaded: {args.model} on {device} (compute_type={compute_type}, "
+        f"cpu_threads={settings['cpu_threads'] or 'auto'}, num_workers={settings['num_workers']}, "
+        f"from {settings['source']}; {len(cpu_config.available_cpus())} CPUs, "
+        f"{cpu_config.physical_cores()} physical cores)",
         file=sys.stderr,
         flush=True,
     )
+    parallel = None
+    # Opt-in: every process loads its own model copy, outside the ModelPool budget
+    processes = args.cpu_processes or default_processes()
+    if device == "cpu" and processes > 1:
+        # The cores are shared out: each process decodes with its part of the threads
+        threads = max(1, (settings["cpu_threads"] or cpu_config.physical_cores()) // processes)
+        parallel = ParallelTranscriber(
+            processes, loader_args=((args.model, device, compute_type), threads), min_seconds=args.parallel_min_seconds
+        )
+        print(
+            f"[Worker] Recordings from {args.parallel_min_seconds:g}s on: {processes} processes x {threads} threads",
+            file=sys.stderr,
+            flush=True,
+        )
     if os.environ.get("VOICEPASTE_DEBUG", "0") in ("1", "true", "True"):
-        try:
-            import torch  # type: ignore
-            print(f"[Worker] torch={getattr(torch, '__version__', 'unknown')}", file=sys.stderr, flush=True)
-        except Exception as e:
-            print(f"[Worker] torch import failed: {e}", file=sys.stderr, flush=True)
-        try:
-            import onnxruntime  # type: ignore
-            print(f"[Worker] onnxruntime={getattr(onnxruntime, '__version__', 'unknown')}", file=sys.stderr, flush=True)
-        except Exception as e:
-            print(f"[Worker] onnxruntime import failed: {e}", file=sys.stderr, flush=True)
+        # Installed versions only; importing torch/onnxruntime here would cost seconds
+        for package in ("torch", "onnxruntime"):
+            print(f"[Worker] {package}={package_version(package)}", file=sys.stderr, flush=True)
+    if args.startup_profile:
+        report_startup(startup)
 
     if args.wait:
         # Server mode
-        print("READY", flush=True)
-        for line in sys.stdin:
-            input_path = Path(line.strip())
-            if not input_path or str(input_path) == "QUIT":
-                break
-            
-            try:
-                print(f"[Worker] Received path: {input_path}", file=sys.stderr, flush=True)
-                try:
-                    size = input_path.stat().st_size
-                    print(f"[Worker] Audio size: {size} bytes", file=sys.stderr, flush=True)
-                except Exception as e:
-                    print(f"[Worker] Audio stat failed: {e}", file=sys.stderr, flush=True)
-                print("[Worker] Starting transcription...", file=sys.stderr, flush=True)
-                print(f"[Worker] VAD enabled: {args.vad}", file=sys.stderr, flush=True)
-                result = transcribe_audio(
-                    input_path,
-                    model,
-                    language_mode=args.language_mode,
-                    beam_size=args.beam_size,
-                    custom_initial_prompt=args.initial_prompt,
-                    enable_vad=args.vad
-                )
-                print(f"[Timer] Transcription took {result['duration_ms']}ms", file=sys.stderr)
-                print(f"[Worker] Done. Text length={len(result['text'])}", file=sys.stderr, flush=True)
-                print(result["text"], flush=True)
-                # Print separator for multiple requests if needed, 
-                # but currently we'll likely restart or use one-at-a-time
-            except Exception as e:
-                print(f"Error: {e}", file=sys.stderr)
-                print("", flush=True) # Empty line for error
+        defaults = {
+            "language_mode": args.language_mode,
+            "beam_size": args.beam_size,
+            "initial_prompt": args.initial_prompt,
+            "vad": args.vad,
+            "trim_silence": args.trim_silence,
+            "postprocess_rules": args.postprocess_rules,
+            "vocabulary_terms": args.vocabulary,
+            "adaptive_beam": args.adaptive_beam,
+            "context_tokens": args.context_tokens,
+            "model": args.model,
+            "device": device,
+            "compute_type": compute_type,
+            "cpu_threads": settings["cpu_threads"],
+            "num_workers": settings["num_workers"],
+            "fast_path": bool(args.fast_path_model),
+            "fast_path_model": args.fast_path_model,
+            "fast_path_max_seconds": args.fast_path_max_seconds,
+        }
+        pool = ModelPool(
+            loader=lambda key: load_whisper_model(key, settings["cpu_threads"], settings["num_workers"]),
+            max_models=args.pool_size,
+            idle_ttl_s=args.model_idle_ttl,
+            memory_budget_mb=args.model_memory_mb,
+        )
+        pool.start_sweeper()
+        serve(model, defaults, sys.stdin.buffer, sys.stdout, pool, args.batch_size, result_cache, parallel)
     else:
         # One-off mode
         if not args.input:
@@ -362,13 +2012,22 @@ def main():
                 beam_size=args.beam_size,
                 custom_initial_prompt=args.initial_prompt,
                 enable_vad=args.vad,
+                trim_silence=args.trim_silence,
+                postprocess=pipeline_for(args.language_mode, args.postprocess_rules, args.vocabulary),
+                parallel=parallel,
+                adaptive_beam=args.adaptive_beam,
             )
             print(f"[Timer] Transcription took {result['duration_ms']}ms", file=sys.stderr)
+            if one_off_key is not None:
+                result_cache.put(one_off_key, result)
             print(result["text"])
             return 0
         except Exception as e:
             print(f"Error: {e}", file=sys.stderr)
             return 1
+        finally:
+            if parallel is not None:
+                parallel.close()
 
 
 
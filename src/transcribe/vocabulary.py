@@ -0,0 +1,189 @@
+"""
+VoicePaste - Vocabulary Biasing
+Product names and code identifiers from a vocabulary file (--vocabulary),
+compiled once when the worker starts and used twice per request:
+
+1. hotwords     the first terms, passed to faster-whisper as `hotwords`: they
+                go into the prompt ahead of the previous text, so the decoder
+                prefers their spelling. Terms are taken in file order up to
+                HOTWORD_CHARS characters; the prompt_cache.py context gives up
+                as many tokens, so the prompt stays within MAX_PROMPT_TOKENS
+2. corrections  spoken forms -> term, in each segment's text after the
+                post-processing rules (postprocess.py)
+
+Corrections walk a token trie. Every spoken form is a path of lower-cased
+tokens (words, and single punctuation characters), and a segment is scanned
+token by token, following the trie from each token for at most as many steps
+as the longest spoken form. The cost is linear in the segment's length
+whatever the number of terms; a regex alternation (as postprocess.py uses for
+a handful of replacements) tries every alternative at each position and slows
+down with the vocabulary size. Matches are leftmost-longest and never
+overlap; they are whole tokens, so "pasted" never matches "paste", and
+punctuation between words must be spoken too ("voice, paste" is left alone).
+
+Vocabulary file, JSON:
+    {"hotwords": true,
+     "terms": ["VoicePaste", {"term": "kubectl", "spoken": ["cube control", "kube cuddle"]}]}
+
+A term is also its own spoken form, case-insensitively ("voicepaste" ->
+"VoicePaste"). When two terms share a spoken form, the first one listed wins.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+
+# Characters of terms offered as hotwords (about 100 tokens)
+HOTWORD_CHARS = 400
+
+# Words, and punctuation characters one at a time
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def validate_vocabulary(data) -> tuple[list[tuple[str, tuple[str, ...]]], bool]:
+    """
+    (term, spoken forms) pairs and the hotwords flag of a vocabulary file's JSON.
+
+    Raises:
+        ValueError: Unknown key or wrongly typed value
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Vocabulary must be an object")
+    unknown = set(data) - {"terms", "hotwords"}
+    if unknown:
+        raise ValueError(f"Unknown vocabulary key: {sorted(unknown)[0]!r}")
+    hotwords = data.get("hotwords", True)
+    if not isinstance(hotwords, bool):
+        raise ValueError("'hotwords' must be true or false")
+    terms = data.get("terms", [])
+    if not isinstance(terms, list):
+        raise ValueError("'terms' must be a list")
+    entries = []
+    for entry in terms:
+        if isinstance(entry, str):
+            entry = {"term": entry}
+        if not isinstance(entry, dict) or set(entry) - {"term", "spoken"}:
+            raise ValueError(f"Invalid vocabulary term: {entry!r}")
+        term, spoken = entry.get("term"), entry.get("spoken", [])
+        if not isinstance(term, str) or not term.strip():
+            raise ValueError(f"Vocabulary term must be a non-empty string: {entry!r}")
+        if not isinstance(spoken, list) or not all(isinstance(s, str) and s.strip() for s in spoken):
+            raise ValueError(f"'spoken' of {term!r} must be a list of non-empty strings")
+        entries.append((term.strip(), tuple(s.strip() for s in spoken)))
+    return entries, hotwords
+
+
+def load_vocabulary(path: Path) -> "Vocabulary":
+    """
+    The compiled vocabulary of a JSON file (see the module docstring).
+
+    Raises:
+        ValueError: Unreadable file, invalid JSON or invalid vocabulary
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except OSError as e:
+        raise ValueError(f"Cannot read {path}: {e}") from e
+    entries, hotwords = validate_vocabulary(data)
+    return Vocabulary(entries, hotwords)
+
+
+def _tokens(text: str) -> list[str]:
+    return [token.lower() for token in _TOKEN.findall(text)]
+
+
+class Vocabulary:
+    """
+    Compiled vocabulary: the hotwords text and the correction trie.
+
+    Args:
+        entries: (term, spoken forms) pairs, in priority order
+        hotwords: Offer the first terms to the decoder as hotwords
+        hotword_chars: Most characters of the hotwords text
+    """
+
+    def __init__(self, entries, hotwords: bool = True, hotword_chars: int = HOTWORD_CHARS):
+        entries = [(term, tuple(spoken)) for term, spoken in entries]
+        self.terms = len(entries)
+        # Trie nodes are dicts of token -> node; the None key holds the term a path spells
+        self._root: dict = {}
+        self.max_tokens = 0
+        self.spoken_forms = 0
+        for term, spoken in entries:
+            for form in (term, *spoken):
+                tokens = _tokens(form)
+                if not tokens:
+                    continue
+                node = self._root
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                if None not in node:
+                    node[None] = term
+                    self.spoken_forms += 1
+                self.max_tokens = max(self.max_tokens, len(tokens))
+
+        self.hotwords = None
+        self.hotword_terms = 0
+        if hotwords:
+            chosen = []
+            length = 0
+            for term, _ in entries:
+                length += len(term) + (2 if chosen else 0)
+                if length > hotword_chars:
+                    break
+                chosen.append(term)
+            self.hotwords = ", ".join(chosen) or None
+            self.hotword_terms = len(chosen)
+        self.digest = hashlib.sha256(
+            json.dumps([entries, self.hotwords], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def correct(self, text: str) -> tuple[str, int]:
+        """`text` with spoken forms replaced by their terms, and the number of replacements."""
+        if not self._root:
+            return text, 0
+        matches = list(_TOKEN.finditer(text))
+        tokens = [match.group().lower() for match in matches]
+        pieces = []
+        last = 0
+        count = 0
+        i = 0
+        while i < len(tokens):
+            node = self._root.get(tokens[i])
+            found = None
+            j = i
+            while node is not None:
+                if None in node:
+                    found = (j, node[None])
+                j += 1
+                node = node.get(tokens[j]) if j < len(tokens) else None
+            if found is None:
+                i += 1
+                continue
+            j, term = found
+            start, end = matches[i].start(), matches[j].end()
+            if text[start:end] != term:
+                pieces.append(text[last:start])
+                pieces.append(term)
+                last = end
+                count += 1
+            i = j + 1
+        if not count:
+            return text, 0
+        pieces.append(text[last:])
+        return "".join(pieces), count
+
+    def summary(self) -> dict:
+        return {
+            "terms": self.terms,
+            "spoken_forms": self.spoken_forms,
+            "hotword_terms": self.hotword_terms,
+        }
+
+
+def combine_reports(reports) -> dict | None:
+    """One 'vocabulary' result field for a recording decoded in parts: corrections summed."""
+    reports = [report for report in reports if report is not None]
+    if not reports:
+        return None
+    return {**reports[0], "corrections": sum(report["corrections"] for report in reports)}
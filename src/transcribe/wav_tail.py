@@ -0,0 +1,176 @@
+"""
+VoicePaste - Recording Tail Pre-Decoding
+Speculative decoding of a WAV file that AudioRecorder is still writing.
+
+The worker is told the recording's path when recording starts
+(stream_start with "path") and follows the file as it grows. Whenever
+WINDOW_SECONDS of audio past the last decoded point are on disk, a
+background thread decodes that window, cut back to its quietest frame in
+the last CUT_SEARCH_SECONDS (as for long recordings, long_audio.py), and
+keeps its segments. On stop only the audio after the last cut, under one
+window, is still to decode.
+
+- The file is read with plain reads, never mapped: it grows while we read.
+  Until the writer closes it, the data chunk is taken to run to the end of
+  the file (its size field isn't filled in yet); whole samples only
+- On stop the writer must have closed the file; the final header then gives
+  the exact length
+- The first window chooses the language; later windows are decoded in it
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_input import BYTES_PER_SAMPLE, SAMPLE_RATE, pcm16_to_float32
+from long_audio import CUT_SEARCH_SECONDS, quietest_cut, read_wav_header
+from postprocess import join_segments
+
+WINDOW_SECONDS = 30.0
+# How often the file size is checked
+POLL_SECONDS = 0.25
+
+
+class TailSession:
+    """
+    One recording being written to `path`; same interface as StreamingSession
+    (finish/cancel), without feed().
+
+    Args:
+        path: WAV file AudioRecorder writes (16 kHz mono 16-bit); it may not
+            exist yet
+        decode: Callable (audio: float32 ndarray, language: str | None) -> dict
+            with 'segments' and 'language', i.e. a bound transcribe_audio
+        window_s: Audio decoded per background pass
+        poll_s: Interval between file size checks
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        decode,
+        window_s: float = WINDOW_SECONDS,
+        poll_s: float = POLL_SECONDS,
+        search_s: float = CUT_SEARCH_SECONDS,
+    ):
+        self.path = path
+        self._decode = decode
+        self._window = int(window_s * SAMPLE_RATE)
+        self._search = int(min(search_s, window_s / 2) * SAMPLE_RATE)
+        self._poll_s = poll_s
+
+        self._stop = threading.Event()
+        self._error: Exception | None = None
+        self._offset: int | None = None  # data chunk offset, once the header is on disk
+        self._decoded_samples = 0
+        self._segments: list[dict] = []
+        self._language: str | None = None
+        self._received = 0
+
+        self.windows_decoded = 0
+        self.background_ms = 0
+
+        self._thread = threading.Thread(target=self._run, name="tail-decode", daemon=True)
+        self._thread.start()
+
+    @property
+    def received_seconds(self) -> float:
+        return self._received / SAMPLE_RATE
+
+    def cancel(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def finish(self) -> dict:
+        """
+        Stop following the file, decode what is left and return the full result.
+
+        Returns:
+            Dict with 'text', 'segments', 'language', 'windows_decoded',
+            'background_ms', 'tail_ms' and 'tail_seconds' keys
+
+        Raises:
+            ValueError: The file isn't a 16 kHz mono 16-bit WAV
+        """
+        self.cancel()
+        if self._error is not None:
+            raise self._error
+
+        tail_start = time.perf_counter()
+        header = read_wav_header(self.path) if self.path.exists() else None
+        if header is None:
+            raise ValueError(f"Not a 16kHz mono 16-bit PCM WAV: {self.path}")
+        self._offset, size = header
+        total = size // BYTES_PER_SAMPLE
+        self._received = total
+        tail_seconds = max(0, total - self._decoded_samples) / SAMPLE_RATE
+        # Usually under one window; more if the background passes fell behind the recording
+        while total - self._decoded_samples > self._window:
+            self._decode_window(total, final=False)
+        if total > self._decoded_samples:
+            self._decode_window(total, final=True)
+        tail_ms = int((time.perf_counter() - tail_start) * 1000)
+
+        return {
+            "text": join_segments(s["text"] for s in self._segments),
+            "segments": self._segments,
+            "language": self._language,
+            "windows_decoded": self.windows_decoded,
+            "background_ms": self.background_ms,
+            "tail_ms": tail_ms,
+            "tail_seconds": round(tail_seconds, 3),
+        }
+
+    def _available(self) -> int:
+        """Whole samples on disk so far (0 until the header is written)."""
+        try:
+            if self._offset is None:
+                header = read_wav_header(self.path)
+                if header is None:
+                    return 0
+                self._offset = header[0]
+            return max(0, self.path.stat().st_size - self._offset) // BYTES_PER_SAMPLE
+        except OSError:
+            return 0
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._received = self._available()
+            if self._received - self._decoded_samples < self._window:
+                self._stop.wait(self._poll_s)
+                continue
+            pass_start = time.perf_counter()
+            try:
+                self._decode_window(self._received, final=False)
+            except Exception as e:
+                print(f"[Tail] Background decode failed: {e}", file=sys.stderr, flush=True)
+                self._error = e
+                return
+            self.background_ms += int((time.perf_counter() - pass_start) * 1000)
+
+    def _read(self, start: int, end: int) -> np.ndarray:
+        with open(self.path, "rb") as f:
+            f.seek(self._offset + start * BYTES_PER_SAMPLE)
+            data = f.read((end - start) * BYTES_PER_SAMPLE)
+        return np.frombuffer(data[:len(data) - len(data) % BYTES_PER_SAMPLE], dtype="<i2")
+
+    def _decode_window(self, total: int, final: bool) -> None:
+        """Decode from the last cut: one window ending in a pause, or (final) everything up to `total`."""
+        start = self._decoded_samples
+        end = total if final else start + self._window
+        samples = self._read(start, end)
+        if not final and self._search:
+            end = start + quietest_cut(samples, len(samples) - self._search, len(samples))
+            samples = samples[:end - start]
+        result = self._decode(pcm16_to_float32(samples), self._language)
+        self.windows_decoded += 1
+        if self._language is None and result.get("segments"):
+            self._language = result.get("language")
+        offset = start / SAMPLE_RATE
+        self._segments.extend(
+            {**s, "start": round(offset + s["start"], 3), "end": round(offset + s["end"], 3)}
+            for s in result.get("segments", [])
+        )
+        self._decoded_samples = end
@@ -0,0 +1,264 @@
+"""
+VoicePaste - Worker Protocol
+Framing for the resident `--wait` worker: one JSON object per line in both
+directions.
+
+Request:
+    {"v": 1, "id": "42", "op": "transcribe", "path": "C:/.../rec.wav",
+     "options": {"language_mode": "bilingual", "beam_size": 5}}
+
+Response (one or more messages per request, always terminated by "end"):
+    {"v": 1, "id": "42", "type": "result", "status": "ok", "text": "...",
+     "language": "uk", "language_prob": 0.98, "timings": {...}}
+    {"v": 1, "id": "42", "type": "end"}
+
+With "options": {"segments": true}, each segment is sent as soon as it is
+decoded, before the result; the result (with "segment_count") marks the end
+of the text:
+    {"v": 1, "id": "42", "type": "segment", "index": 0, "start": 0.0,
+     "end": 4.2, "text": "..."}
+
+With the result cache on (--result-cache), results carry "cached": true when
+they were answered from it without decoding.
+
+Results of requests with an initial prompt carry "prompt" (token counts, see
+prompt_cache.py); with --vocabulary, "vocabulary" ({"corrections",
+"hotword_terms", "hotword_tokens"}, see vocabulary.py); with "adaptive_beam",
+"adaptive_beam" (re-decoded segments and time saved, see adaptive_beam.py).
+
+"timings" holds milliseconds per stage (see metrics.py) plus transcribe_ms and
+total_ms; {"op": "metrics"} returns running per-stage aggregates.
+
+Streaming (audio sent while the recording is still running):
+    {"v": 1, "id": "s1", "op": "stream_start", "options": {...}}
+    {"v": 1, "id": "s1", "op": "stream_audio", "audio": "<base64 int16 LE PCM>"}
+    {"v": 1, "id": "s1", "op": "stream_stop"}    -> result + end
+    {"v": 1, "id": "s1", "op": "stream_cancel"}  -> end
+stream_start/stream_audio are not answered unless they fail.
+
+Recording tail (the worker follows the WAV file as it is written, see
+wav_tail.py; no stream_audio):
+    {"v": 1, "id": "s2", "op": "stream_start", "path": "C:/.../rec.wav", "options": {...}}
+    {"v": 1, "id": "s2", "op": "stream_stop"}    -> result + end, once the file is closed
+
+Transcriptions are queued and may be answered out of order; match replies by
+"id". {"op": "cancel", "id": "42"} cancels request 42, which is then answered
+with "status": "cancelled" (+ end) unless it had already finished.
+
+Binary frames: a request with "bytes": N is followed on stdin by exactly N raw
+bytes of 16 kHz mono int16 LE PCM, right after its newline. Accepted by
+"transcribe" (instead of "path") and "stream_audio" (instead of "audio").
+
+Bare (non-JSON) lines are the legacy protocol: a WAV path in, one text line out.
+"""
+import base64
+import json
+import threading
+
+from audio_input import MAX_FRAME_BYTES
+
+PROTOCOL_VERSION = 1
+
+# Ops understood by the worker. Anything else is answered with an error.
+OPS = (
+    "transcribe", "cancel", "ping", "metrics", "quit",
+    "stream_start", "stream_audio", "stream_stop", "stream_cancel",
+)
+
+# Ops that belong to a request/stream and therefore need an id
+ID_OPS = ("transcribe", "cancel", "stream_start", "stream_audio", "stream_stop", "stream_cancel")
+
+# Ops that may carry a binary PCM frame
+PAYLOAD_OPS = ("transcribe", "stream_audio")
+
+# Per-request overrides of the CLI defaults, with their expected types.
+REQUEST_OPTIONS = {
+    "language_mode": str,
+    "beam_size": int,
+    "initial_prompt": str,
+    "vad": bool,
+    "trim_silence": bool,
+    # Send a "segment" message per decoded segment before the result
+    "segments": bool,
+    # Model selection; the worker keeps recently used models warm (model_pool.py)
+    "model": str,
+    "device": str,
+    "compute_type": str,
+    # CTranslate2 threading (cpu_config.py); other values than the worker's load a separate model copy
+    "cpu_threads": int,
+    "num_workers": int,
+    # Short-utterance fast path (needs --fast-path-model)
+    "fast_path": bool,
+    # Queue order: higher runs first (see request_queue.py)
+    "priority": int,
+    # false: decode even if the result cache holds this audio (see result_cache.py)
+    "cache": bool,
+    # false: no previous-dictation context in the prompt, and this one isn't added (see prompt_cache.py)
+    "context": bool,
+    # false: neither hotwords nor corrections from the --vocabulary terms (see vocabulary.py)
+    "vocabulary": bool,
+    # Greedy decode first, beam_size only for low-confidence segments (see adaptive_beam.py)
+    "adaptive_beam": bool,
+}
+
+LANGUAGE_MODES = ("auto", "en", "ua", "bilingual")
+DEVICES = ("cuda", "cpu")
+
+
+class ProtocolError(ValueError):
+    """Raised for malformed or unsupported requests."""
+
+    def __init__(self, message: str, request_id: str | None = None):
+        super().__init__(message)
+        self.request_id = request_id
+
+
+def is_json_request(line: str) -> bool:
+    return line.lstrip().startswith("{")
+
+
+def frame_size(line: str) -> int:
+    """Payload size announced by a request line ("bytes"), 0 if none or unreadable."""
+    try:
+        size = json.loads(line).get("bytes", 0)
+    except (ValueError, AttributeError):
+        return 0
+    if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+        return 0
+    return size
+
+
+def parse_request(line: str, payload=None) -> dict:
+    """
+    Parse and validate one JSON request line.
+
+    Args:
+        line: The JSON header line
+        payload: Binary frame read after the line, if it announced "bytes"
+
+    Returns:
+        The request dict with 'id', 'op' and a normalized 'options' dict.
+        PCM audio (from a frame or base64) is in 'audio' as bytes-like.
+
+    Raises:
+        ProtocolError: Malformed JSON, wrong version, unknown op or bad options.
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        raise ProtocolError(f"Invalid JSON: {e}") from e
+    if not isinstance(request, dict):
+        raise ProtocolError("Request must be a JSON object")
+
+    request_id = request.get("id")
+    if request_id is not None:
+        request_id = str(request_id)
+        request["id"] = request_id
+
+    version = request.get("v", PROTOCOL_VERSION)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(
+            f"Unsupported protocol version {version!r} (worker speaks {PROTOCOL_VERSION})",
+            request_id,
+        )
+
+    op = request.get("op")
+    if op not in OPS:
+        raise ProtocolError(f"Unknown op: {op!r}", request_id)
+    if op in ID_OPS and request_id is None:
+        raise ProtocolError(f"{op!r} requires an 'id'")
+    if "bytes" in request:
+        request["audio"] = parse_payload(request, payload)
+    if op == "transcribe" and "audio" not in request:
+        if not isinstance(request.get("path"), str) or not request["path"]:
+            raise ProtocolError("'transcribe' requires a 'path' or a PCM frame", request_id)
+    if op == "stream_start" and "path" in request:
+        if not isinstance(request["path"], str) or not request["path"]:
+            raise ProtocolError("'path' must be a non-empty string", request_id)
+    if op == "stream_audio" and "bytes" not in request:
+        if not isinstance(request.get("audio"), str):
+            raise ProtocolError("'stream_audio' requires base64 'audio'", request_id)
+        try:
+            request["audio"] = base64.b64decode(request["audio"], validate=True)
+        except ValueError as e:
+            raise ProtocolError(f"Invalid base64 audio: {e}", request_id) from e
+        if len(request["audio"]) % 2:
+            raise ProtocolError("'audio' must be whole int16 samples", request_id)
+
+    request["options"] = parse_options(request.get("options") or {}, request_id)
+    return request
+
+
+def parse_payload(request: dict, payload):
+    request_id = request.get("id")
+    size = request["bytes"]
+    if request["op"] not in PAYLOAD_OPS:
+        raise ProtocolError(f"{request['op']!r} does not take a binary frame", request_id)
+    if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+        raise ProtocolError("'bytes' must be a non-negative int", request_id)
+    if size > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Frame too large: {size} bytes (max {MAX_FRAME_BYTES})", request_id)
+    if size % 2:
+        raise ProtocolError("PCM frame must be whole int16 samples", request_id)
+    if payload is None or len(payload) != size:
+        raise ProtocolError("PCM frame missing or truncated", request_id)
+    return payload
+
+
+def parse_options(options: dict, request_id: str | None = None) -> dict:
+    if not isinstance(options, dict):
+        raise ProtocolError("'options' must be an object", request_id)
+    for key, value in options.items():
+        expected = REQUEST_OPTIONS.get(key)
+        if expected is None:
+            raise ProtocolError(f"Unknown option: {key!r}", request_id)
+        # bool is an int subclass; don't let true/false pass as a beam size
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            raise ProtocolError(f"Option {key!r} must be {expected.__name__}", request_id)
+    if "language_mode" in options and options["language_mode"] not in LANGUAGE_MODES:
+        raise ProtocolError(f"Unknown language_mode: {options['language_mode']!r}", request_id)
+    if "device" in options and options["device"] not in DEVICES:
+        raise ProtocolError(f"Unknown device: {options['device']!r}", request_id)
+    for key in ("model", "compute_type"):
+        if key in options and not options[key]:
+            raise ProtocolError(f"{key!r} must not be empty", request_id)
+    if "beam_size" in options and options["beam_size"] < 1:
+        raise ProtocolError("'beam_size' must be >= 1", request_id)
+    if "cpu_threads" in options and options["cpu_threads"] < 0:
+        raise ProtocolError("'cpu_threads' must be >= 0", request_id)
+    if "num_workers" in options and options["num_workers"] < 1:
+        raise ProtocolError("'num_workers' must be >= 1", request_id)
+    return dict(options)
+
+
+def message(msg_type: str, request_id: str | None, **fields) -> dict:
+    return {"v": PROTOCOL_VERSION, "id": request_id, "type": msg_type, **fields}
+
+
+class MessageWriter:
+    """Writes protocol messages as single UTF-8 lines; safe to share between threads."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def send(self, msg: dict) -> None:
+        line = json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def send_raw(self, line: str) -> None:
+        """Write a bare line (READY, legacy results)."""
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def result(self, request_id: str, **fields) -> None:
+        self.send(message("result", request_id, **fields))
+
+    def error(self, request_id: str | None, error: str) -> None:
+        self.send(message("result", request_id, status="error", error=error))
+
+    def end(self, request_id: str | None) -> None:
+        self.send(message("end", request_id))
@@ -0,0 +1,33 @@
+using VoicePaste.Transcription;
+using Xunit;
+
+namespace VoicePaste.Tests;
+
+public class ModelDownloadServiceTests
+{
+    [Fact]
+    public void TryParseProgress_ScalesModelProgressIntoOverallPercentage()
+    {
+        var line = "PROGRESS {\"file\": \"model.bin\", \"downloaded\": 5, \"total\": 10, \"percent\": 50.0, "
+            + "\"overall_downloaded\": 524288000, \"overall_total\": 1048576000, \"bytes_per_s\": 1}";
+
+        Assert.True(ModelDownloadService.TryParseProgress(line, "large-v2", 1, 2, out var progress));
+
+        Assert.Equal("large-v2", progress.ModelName);
+        Assert.Equal(75, progress.Percentage);
+        Assert.Equal(524288000, progress.DownloadedBytes);
+        Assert.Equal(1048576000, progress.TotalBytes);
+        Assert.Contains("model.bin", progress.Status);
+    }
+
+    [Theory]
+    [InlineData("DOWNLOAD_COMPLETE")]
+    [InlineData("Downloading model: large-v2")]
+    [InlineData("PROGRESS {not json")]
+    [InlineData("PROGRESS {\"file\": \"model.bin\"}")]
+    [InlineData("")]
+    public void TryParseProgress_IgnoresOtherLines(string line)
+    {
+        Assert.False(ModelDownloadService.TryParseProgress(line, "large-v2", 0, 1, out _));
+    }
+}
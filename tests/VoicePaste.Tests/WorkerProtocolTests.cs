@@ -0,0 +1,69 @@
+using System.Text.Json;
+using VoicePaste.Transcription;
+using Xunit;
+
+namespace VoicePaste.Tests;
+
+public class WorkerProtocolTests
+{
+    [Fact]
+    public void BuildTranscribeRequest_IsSingleLineVersionedJson()
+    {
+        var line = WorkerProtocol.BuildTranscribeRequest("7", @"C:\Temp\VoicePaste\rec ""1"".wav", new WorkerRequestOptions
+        {
+            LanguageMode = "bilingual",
+            BeamSize = 3,
+            InitialPrompt = "line1\nline2",
+            Vad = true
+        });
+
+        Assert.DoesNotContain("\n", line);
+        using var doc = JsonDocument.Parse(line);
+        var root = doc.RootElement;
+        Assert.Equal(WorkerProtocol.Version, root.GetProperty("v").GetInt32());
+        Assert.Equal("7", root.GetProperty("id").GetString());
+        Assert.Equal("transcribe", root.GetProperty("op").GetString());
+        Assert.Equal(@"C:\Temp\VoicePaste\rec ""1"".wav", root.GetProperty("path").GetString());
+        var options = root.GetProperty("options");
+        Assert.Equal("bilingual", options.GetProperty("language_mode").GetString());
+        Assert.Equal(3, options.GetProperty("beam_size").GetInt32());
+        Assert.Equal("line1\nline2", options.GetProperty("initial_prompt").GetString());
+        Assert.True(options.GetProperty("vad").GetBoolean());
+    }
+
+    [Fact]
+    public void TryParseMessage_ParsesResultWithMultilineText()
+    {
+        var line = "{\"v\":1,\"id\":\"7\",\"type\":\"result\",\"status\":\"ok\",\"text\":\"Привіт\\nсвіт\","
+            + "\"language\":\"uk\",\"language_prob\":0.9,\"timings\":{\"transcribe_ms\":120,\"total_ms\":125}}";
+
+        Assert.True(WorkerProtocol.TryParseMessage(line, out var message));
+        Assert.Equal("result", message.Type);
+        Assert.Equal("7", message.Id);
+        Assert.True(message.IsOk);
+        Assert.Equal("Привіт\nсвіт", message.Text);
+        Assert.Equal("uk", message.Language);
+        Assert.Equal(120, message.Timings["transcribe_ms"]);
+    }
+
+    [Fact]
+    public void TryParseMessage_ParsesErrorAndEnd()
+    {
+        Assert.True(WorkerProtocol.TryParseMessage("{\"v\":1,\"id\":\"3\",\"type\":\"result\",\"status\":\"error\",\"error\":\"boom\"}", out var error));
+        Assert.False(error.IsOk);
+        Assert.Equal("boom", error.Error);
+
+        Assert.True(WorkerProtocol.TryParseMessage("{\"v\":1,\"id\":\"3\",\"type\":\"end\"}", out var end));
+        Assert.Equal("end", end.Type);
+    }
+
+    [Theory]
+    [InlineData("READY")]
+    [InlineData("")]
+    [InlineData("{not json")]
+    [InlineData("{\"id\":\"1\"}")]
+    public void TryParseMessage_IgnoresNonProtocolLines(string line)
+    {
+        Assert.False(WorkerProtocol.TryParseMessage(line, out _));
+    }
+}
@@ -0,0 +1,160 @@
+"""Shared fixtures for the Python transcription worker tests."""
+import io
+import json
+import sys
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Make src/transcribe importable (transcribe.py is run as a script in production)
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "transcribe"))
+
+
+# Worker defaults for protocol tests; requests override them through "options"
+DEFAULTS = {"language_mode": "auto", "beam_size": 5, "initial_prompt": "", "vad": False}
+
+# DEFAULTS with the worker's model settings, for tests where the model key matters
+MODEL_DEFAULTS = {**DEFAULTS, "model": "medium", "device": "cpu", "compute_type": "int8"}
+
+# Ids handed out by FakeTokenizer.encode (one per distinct word), above any vocab id
+WORD_ID_BASE = 1000
+
+
+class FakeTokenizer:
+    """
+    Minimal stand-in for tokenizers.Tokenizer used by the suppress-token scan
+    and prompt encoding (one token per whitespace-separated word).
+    """
+
+    def __init__(self, vocab: list[str]):
+        self.vocab = vocab
+        self.words = []
+        self.decode_calls = 0
+        self.encode_calls = 0
+
+    def get_vocab_size(self) -> int:
+        return len(self.vocab)
+
+    def decode(self, ids: list[int]) -> str:
+        self.decode_calls += 1
+        return "".join(self.vocab[i] if i < WORD_ID_BASE else " " + self.words[i - WORD_ID_BASE] for i in ids)
+
+    def encode(self, text: str, add_special_tokens: bool = True):
+        self.encode_calls += 1
+        ids = []
+        for word in text.split():
+            if word not in self.words:
+                self.words.append(word)
+            ids.append(WORD_ID_BASE + self.words.index(word))
+        return SimpleNamespace(ids=ids)
+
+    def to_str(self) -> str:
+        return "\n".join(self.vocab)
+
+
+class FakeWhisperModel:
+    """
+    Stand-in for faster_whisper.WhisperModel.
+
+    Returns the configured segments for every call and records the kwargs so
+    tests can assert on language, prompt and suppress tokens. Language
+    detection calls are recorded in `detect_calls`, not `calls`;
+    `language_probs` sets the (language, probability) list it returns.
+    """
+
+    def __init__(
+        self, texts=("Hello", "world"), language="en", vocab=None, language_probs=None, avg_logprob=-0.2
+    ):
+        self.texts = list(texts)
+        self.avg_logprob = avg_logprob
+        self.language = language
+        self.language_probs = language_probs
+        self.hf_tokenizer = FakeTokenizer(vocab or ["a", "b", "ы", "ї", "Ёж"])
+        self.calls = []
+        self.detect_calls = []
+
+    def detect_language(self, audio=None, **kwargs):
+        self.detect_calls.append(audio)
+        probs = self.language_probs or [(self.language, 0.93)]
+        return probs[0][0], probs[0][1], probs
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append({"audio": audio, **kwargs})
+        language = kwargs.get("language") or self.language
+        segments = (
+            SimpleNamespace(
+                id=i,
+                start=float(i),
+                end=float(i + 1),
+                text=f" {text} ",
+                avg_logprob=self.avg_logprob,
+                no_speech_prob=0.01,
+                compression_ratio=1.2,
+            )
+            for i, text in enumerate(self.texts)
+        )
+        info = SimpleNamespace(language=language, language_probability=0.97, duration=float(len(self.texts)))
+        return segments, info
+
+
+def run_worker(model, requests, payloads=None, **worker_kwargs) -> list:
+    """
+    Pipe requests through transcribe.serve() and return what it sent after
+    READY, JSON lines decoded.
+
+    Args:
+        requests: dicts (sent as JSON lines), str lines, or bytes sent as
+            they are (e.g. a hand-built frame)
+        payloads: request id -> binary frame sent after that request's line
+        worker_kwargs: serve() arguments; `defaults` replaces DEFAULTS, a
+            `stdout` of the caller's lets it watch the output while serving
+    """
+    import transcribe
+
+    payloads = payloads or {}
+    chunks = []
+    for request in requests:
+        if isinstance(request, bytes):
+            chunks.append(request)
+        elif isinstance(request, str):
+            chunks.append(request.encode("utf-8") + b"\n")
+        else:
+            chunks.append(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            chunks.append(payloads.get(request.get("id"), b""))
+    stdout = worker_kwargs.pop("stdout", None) or io.StringIO()
+    worker_kwargs.setdefault("defaults", DEFAULTS)
+    transcribe.serve(model, stdin=io.BytesIO(b"".join(chunks)), stdout=stdout, **worker_kwargs)
+    lines = stdout.getvalue().splitlines()
+    assert lines[0] == "READY"
+    return [json.loads(line) if line.startswith("{") else line for line in lines[1:]]
+
+
+@pytest.fixture
+def fake_model():
+    return FakeWhisperModel()
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point all on-disk worker caches at a per-test directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("VOICEPASTE_CACHE_DIR", str(path))
+    return path
+
+
+def write_wav(path: Path, pcm: bytes) -> Path:
+    """Write 16kHz mono int16 PCM as a WAV file, like AudioRecorder does."""
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(pcm)
+    return path
+
+
+@pytest.fixture
+def wav_file(tmp_path):
+    """One second of silence as a WAV file."""
+    return write_wav(tmp_path / "recording.wav", b"\0\0" * 16000)
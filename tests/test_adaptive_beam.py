@@ -0,0 +1,104 @@
+"""Tests for adaptive beam decoding: greedy first, beam search for low-confidence segments."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import transcribe
+from adaptive_beam import AdaptiveDecode, BeamCost
+from audio_input import SAMPLE_RATE
+from conftest import DEFAULTS, FakeWhisperModel, run_worker, write_wav
+
+
+def segment(start, end, text, avg_logprob=-0.2):
+    return SimpleNamespace(
+        start=start, end=end, text=text, avg_logprob=avg_logprob, no_speech_prob=0.01, compression_ratio=1.2
+    )
+
+
+class MumbleModel(FakeWhisperModel):
+    """Greedy search mishears the second word ("wrld", low avg_logprob); beam search gets it right."""
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append({"audio": audio, **kwargs})
+        if kwargs["beam_size"] == 1:
+            segments = [segment(0.0, 1.0, " Hello"), segment(1.0, 2.0, " wrld", -1.3), segment(2.0, 3.0, " again")]
+        else:
+            segments = [segment(0.0, len(audio) / SAMPLE_RATE, " world")]
+        return iter(segments), SimpleNamespace(language="en", language_probability=0.97)
+
+
+def test_only_low_confidence_segments_are_decoded_with_the_beam():
+    model = MumbleModel()
+    seen = []
+
+    result = transcribe.transcribe_audio(
+        np.zeros(3 * SAMPLE_RATE, dtype=np.float32), model, language_mode="en", beam_size=5,
+        on_segment=seen.append, adaptive_beam=True,
+    )
+
+    assert result["text"] == "Hello world again"
+    assert [(s["text"], s["beam"]) for s in seen] == [("Hello", 1), ("world", 5), ("again", 1)]
+    assert [call["beam_size"] for call in model.calls] == [1, 5]
+    # The re-decode stays between the confident neighbours
+    assert len(model.calls[1]["audio"]) == SAMPLE_RATE
+    assert (seen[1]["start"], seen[1]["end"]) == (1.0, 2.0)
+    report = result["adaptive_beam"]
+    assert report["beam_size"] == 5 and report["segments"] == 3 and report["redecoded_segments"] == 1
+    assert report["redecoded_seconds"] == 1.0
+    assert set(report) >= {"greedy_ms", "redecode_ms", "estimated_beam_ms", "saved_ms", "beam_cost"}
+
+
+def test_confident_or_greedy_decodes_run_once():
+    model = FakeWhisperModel()
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    result = transcribe.transcribe_audio(audio, model, beam_size=5, adaptive_beam=True)
+    assert [call["beam_size"] for call in model.calls] == [1]
+    assert result["adaptive_beam"]["redecoded_segments"] == 0
+    assert all(s["beam"] == 1 for s in result["segments"])
+    # Nothing to adapt with a beam of 1, and off by default
+    assert transcribe.transcribe_audio(audio, model, beam_size=1, adaptive_beam=True)["adaptive_beam"] is None
+    assert "beam" not in transcribe.transcribe_audio(audio, model)["segments"][0]
+
+
+def test_neighbouring_low_confidence_segments_are_redecoded_together():
+    spans = []
+
+    def redecode(start, end):
+        spans.append((start, end))
+        return [segment(0.1, end - start + 1.0, " fixed")]
+
+    greedy = [
+        segment(0.0, 1.0, " ok"), segment(1.5, 2.0, " a", -2.0), segment(2.0, 3.0, "  "), segment(3.0, 3.5, " b", -2.0),
+    ]
+    decode = AdaptiveDecode(iter(greedy), redecode, beam_size=4, audio_seconds=3.6, cost=BeamCost())
+
+    out = list(decode)
+
+    # One span from the last kept segment's end to the end of the audio
+    assert spans == [(1.2, 3.6)]
+    assert [(s.text, s.beam) for s in out] == [(" ok", 1), (" fixed", 4)]
+    # Clipped to the span
+    assert (out[1].start, out[1].end) == (pytest.approx(1.3), 3.6)
+    assert decode.report()["redecoded_segments"] == 3
+
+
+def test_beam_cost_is_a_running_average():
+    cost = BeamCost(default=2.0, weight=0.5)
+    assert cost.ratio == 2.0 and not cost.measured
+
+    cost.record(3.0)
+    assert cost.ratio == 3.0
+    cost.record(1.0)
+    assert cost.ratio == 2.0
+
+
+def test_worker_option_turns_adaptive_beam_on(tmp_path):
+    wav = write_wav(tmp_path / "rec.wav", b"\0\0" * 3 * SAMPLE_RATE)
+    requests = [{"id": "1", "op": "transcribe", "path": str(wav), "options": {"adaptive_beam": True}}]
+
+    result = run_worker(MumbleModel(), requests, defaults={**DEFAULTS, "language_mode": "en"})[0]
+
+    assert result["text"] == "Hello world again"
+    assert result["adaptive_beam"]["redecoded_segments"] == 1
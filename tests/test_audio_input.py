@@ -0,0 +1,104 @@
+"""Tests for the in-memory PCM ingest path."""
+import base64
+import io
+import json
+
+import numpy as np
+import pytest
+
+import audio_input
+import transcribe
+import worker_protocol
+from audio_input import SAMPLE_RATE, pcm16_to_float32, read_frame
+from conftest import run_worker, write_wav
+
+
+@pytest.fixture
+def pcm():
+    rng = np.random.default_rng(1234)
+    samples = rng.integers(-32768, 32768, SAMPLE_RATE * 3, dtype=np.int16)
+    samples[:4] = [-32768, -1, 0, 32767]  # extremes must survive the conversion
+    return samples.astype("<i2").tobytes()
+
+
+def frame(request: dict, payload: bytes) -> bytes:
+    return (json.dumps({**request, "bytes": len(payload)}) + "\n").encode("utf-8") + payload
+
+
+def test_pcm_matches_faster_whisper_file_decode_bit_for_bit(pcm, tmp_path):
+    decode_audio = pytest.importorskip("faster_whisper.audio").decode_audio
+    path = tmp_path / "clip.wav"
+    write_wav(path, pcm)
+
+    from_file = decode_audio(str(path), sampling_rate=SAMPLE_RATE)
+    from_pcm = pcm16_to_float32(pcm)
+
+    assert from_pcm.dtype == from_file.dtype == np.float32
+    assert np.array_equal(from_pcm.view(np.uint32), from_file.view(np.uint32))
+
+
+def test_conversion_reads_the_frame_in_place(pcm):
+    buffer = read_frame(io.BytesIO(pcm), len(pcm))
+    view = np.frombuffer(buffer, dtype="<i2")
+
+    assert np.shares_memory(view, np.frombuffer(buffer, dtype=np.uint8))
+    assert pcm16_to_float32(memoryview(buffer)).shape == (len(pcm) // 2,)
+
+
+def test_transcribe_pcm_frame_reaches_model_as_float32(fake_model, pcm, tmp_path):
+    out = run_worker(fake_model, [frame({"id": "pcm", "op": "transcribe"}, pcm)])
+
+    assert out[0]["status"] == "ok" and out[0]["text"] == "Hello world"
+    audio = fake_model.calls[0]["audio"]
+    assert isinstance(audio, np.ndarray) and audio.dtype == np.float32
+    assert np.array_equal(audio, pcm16_to_float32(pcm))
+
+
+def test_frames_keep_the_stream_in_sync(fake_model, pcm):
+    newline_heavy = b"\n\n{\n" * 100  # payload bytes must never be read as requests
+    out = run_worker(fake_model, [
+        frame({"id": "a", "op": "transcribe"}, pcm),
+        frame({"id": "b", "op": "transcribe"}, newline_heavy),
+        frame({"id": "c", "op": "ping"}, b"ab"),
+        {"id": "d", "op": "ping"},
+    ])
+    by_id = {(m["id"], m["type"]): m for m in out}
+
+    assert by_id[("a", "result")]["status"] == "ok"
+    assert by_id[("b", "result")]["status"] == "ok"
+    assert "binary frame" in by_id[("c", "result")]["error"]
+    assert ("d", "pong") in by_id
+
+
+def test_oversized_frame_is_skipped(fake_model, monkeypatch):
+    monkeypatch.setattr(worker_protocol, "MAX_FRAME_BYTES", 8)
+    monkeypatch.setattr(transcribe, "MAX_FRAME_BYTES", 8)
+    out = run_worker(fake_model, [frame({"id": "big", "op": "transcribe"}, b"\0" * 64), {"id": "after", "op": "ping"}])
+
+    assert "too large" in out[0]["error"]
+    assert out[2]["type"] == "pong"
+    assert fake_model.calls == []
+
+
+def test_truncated_frame_stops_the_worker(fake_model):
+    out = run_worker(fake_model, [frame({"id": "t", "op": "transcribe"}, b"\0" * 64)[:-10]])
+
+    assert out == []
+
+
+def test_stream_audio_accepts_frames_and_base64(fake_model, pcm):
+    half = len(pcm) // 2
+    out = run_worker(fake_model, [
+        {"id": "s", "op": "stream_start"},
+        frame({"id": "s", "op": "stream_audio"}, pcm[:half]),
+        {"id": "s", "op": "stream_audio", "audio": base64.b64encode(pcm[half:]).decode()},
+        {"id": "s", "op": "stream_stop"},
+    ])
+
+    assert out[0]["status"] == "ok"
+    assert np.array_equal(fake_model.calls[-1]["audio"], pcm16_to_float32(pcm))
+
+
+def test_odd_sized_frame_is_rejected():
+    with pytest.raises(worker_protocol.ProtocolError, match="whole int16"):
+        worker_protocol.parse_request('{"id": "1", "op": "transcribe", "bytes": 3}', b"abc")
@@ -0,0 +1,101 @@
+"""Tests for compute-type auto-tuning and the per-machine profile."""
+import time
+
+import numpy as np
+import pytest
+
+import autotune
+
+# Per compute type: (seconds per transcription, transcript)
+BEHAVIOR = {
+    "float32": (0.04, "the quick brown fox jumps over the lazy dog"),
+    "int8_float32": (0.02, "the quick brown fox jumps over the lazy dog"),
+    "int8": (0.0, "a quick frown box dumps over a hazy log"),
+}
+
+
+class TimedModel:
+    def __init__(self, compute_type, cpu_threads):
+        self.delay, self.text = BEHAVIOR[compute_type]
+        # More threads are faster, down to half the delay
+        self.delay *= 1.0 if cpu_threads == 1 else 0.5
+
+
+def loader(model, device, compute_type, cpu_threads):
+    if compute_type == "bfloat16":
+        raise ValueError("unsupported compute type")
+    return TimedModel(compute_type, cpu_threads)
+
+
+def transcribe(model, audio):
+    time.sleep(model.delay)
+    return model.text
+
+
+def test_fastest_accurate_candidate_is_chosen():
+    entry = autotune.autotune(
+        "tiny", "cpu", np.zeros(16000, np.float32), transcribe, loader,
+        compute_types=["float32", "int8_float32", "int8"], thread_counts=[1, 4], repeat=2,
+    )
+
+    # int8 is fastest but its transcript disagrees with float32
+    assert entry["compute_type"] == "int8_float32"
+    assert entry["cpu_threads"] == 4
+    assert entry["num_workers"] == 1
+    assert entry["agreement"] == 1.0
+    rejected = [c for c in entry["candidates"] if c["compute_type"] == "int8"]
+    assert all(c["agreement"] < autotune.MIN_AGREEMENT for c in rejected)
+    assert len(entry["candidates"]) == 6
+
+
+def test_unloadable_compute_types_are_skipped():
+    entry = autotune.autotune(
+        "tiny", "cpu", np.zeros(16000, np.float32), transcribe, loader,
+        compute_types=["bfloat16", "float32"], thread_counts=[4], repeat=1,
+    )
+
+    assert entry["compute_type"] == "float32"
+    assert "unsupported" in entry["candidates"][0]["error"]
+
+    with pytest.raises(RuntimeError, match="No compute type"):
+        autotune.autotune("tiny", "cpu", None, transcribe, loader, compute_types=["bfloat16"], thread_counts=[1])
+
+
+def test_agreement():
+    assert autotune.agreement("Hello world", "hello world") == 1.0
+    assert autotune.agreement("", "") == 1.0
+    assert autotune.agreement("hello there world", "hello world") == pytest.approx(0.8)
+
+
+def test_profile_round_trip_and_startup_settings(tmp_path):
+    path = tmp_path / autotune.PROFILE_NAME
+    assert autotune.startup_settings(path, "tiny", "cpu")["source"] == "default"
+
+    autotune.save_profile(path, "tiny", "cpu", {"compute_type": "int8_float32", "cpu_threads": 6, "num_workers": 1})
+    autotune.save_profile(path, "medium", "cpu", {"compute_type": "int8", "cpu_threads": 2, "num_workers": 1})
+
+    assert autotune.startup_settings(path, "tiny", "cpu") == {
+        "compute_type": "int8_float32", "cpu_threads": 6, "num_workers": 1, "source": "profile",
+    }
+    assert autotune.load_profile(path, "medium", "cpu")["cpu_threads"] == 2
+    # Other devices and explicit compute types don't use the profile
+    assert autotune.startup_settings(path, "tiny", "cuda")["compute_type"] == "float16"
+    assert autotune.startup_settings(path, "tiny", "cpu", "float32")["source"] == "cli"
+
+
+def test_profile_of_another_machine_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / autotune.PROFILE_NAME
+    autotune.save_profile(path, "tiny", "cpu", {"compute_type": "int8_float32", "cpu_threads": 6})
+
+    monkeypatch.setattr(autotune, "machine_id", lambda: "other-machine")
+
+    assert autotune.load_profile(path, "tiny", "cpu") is None
+
+
+def test_corrupt_profile_falls_back_to_defaults(tmp_path):
+    path = tmp_path / autotune.PROFILE_NAME
+    path.write_text("{not json")
+
+    assert autotune.startup_settings(path, "tiny", "cpu")["compute_type"] == "int8"
+    autotune.save_profile(path, "tiny", "cpu", {"compute_type": "float32"})
+    assert autotune.load_profile(path, "tiny", "cpu")["compute_type"] == "float32"
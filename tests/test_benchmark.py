@@ -0,0 +1,156 @@
+"""Tests for the transcription benchmark harness."""
+import json
+import wave
+
+import pytest
+
+import benchmark
+from conftest import FakeWhisperModel
+
+
+@pytest.fixture
+def clips_dir(tmp_path):
+    path = tmp_path / "clips"
+    path.mkdir()
+    for name, seconds in (("short.wav", 1.0), ("long.wav", 4.0)):
+        with wave.open(str(path / name), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(b"\0\0" * int(16000 * seconds))
+    return path
+
+
+def test_expand_settings_is_full_cartesian_product():
+    settings = benchmark.expand_settings({
+        "model": ["tiny", "base"],
+        "compute_type": ["int8"],
+        "beam_size": [1, 5],
+        "vad": [False, True],
+        "language_mode": ["auto"],
+    })
+
+    assert len(settings) == 8
+    assert settings[0] == {"model": "tiny", "compute_type": "int8", "beam_size": 1, "vad": False, "language_mode": "auto"}
+
+
+def test_percentiles():
+    stats = benchmark.percentiles(list(range(1, 101)))
+
+    assert stats["p50"] == 50.5
+    assert stats["p95"] == pytest.approx(95.05)
+    assert stats["p99"] == pytest.approx(99.01)
+    assert stats["min"] == 1 and stats["max"] == 100
+    assert benchmark.percentiles([]) == {}
+
+
+def test_find_clips_reads_durations(clips_dir):
+    clips = benchmark.find_clips(clips_dir)
+
+    assert [(c["name"], c["duration_s"]) for c in clips] == [("long.wav", 4.0), ("short.wav", 1.0)]
+
+
+def test_run_setting_reports_latency_and_rtf(clips_dir, cache_dir):
+    setting = {"model": "tiny", "compute_type": "int8", "beam_size": 1, "vad": False, "language_mode": "auto"}
+    model = FakeWhisperModel()
+
+    report = benchmark.run_setting(
+        setting, benchmark.find_clips(clips_dir), "cpu", repeat=3, warmup=1, model_factory=lambda s, d: model
+    )
+
+    assert report["error"] is None
+    assert len(report["runs"]) == 6
+    assert len(model.calls) == 7  # warmup included
+    assert report["model_load_ms"] >= 0
+    assert report["peak_rss_mb"] is None or report["peak_rss_mb"] > 0
+    run = report["runs"][0]
+    assert 0 <= run["first_segment_ms"] <= run["total_ms"]
+    assert run["rtf"] == pytest.approx(run["total_ms"] / 1000 / 4.0, abs=1e-3)
+    assert set(report["summary"]["total_ms"]) == {"p50", "p95", "p99", "mean", "min", "max"}
+
+
+def test_failed_setting_is_reported_not_raised(clips_dir):
+    def broken_factory(setting, device):
+        raise RuntimeError("unsupported compute type")
+
+    setting = {"model": "tiny", "compute_type": "bogus", "beam_size": 1, "vad": False, "language_mode": "auto"}
+    report = benchmark.run_setting(setting, benchmark.find_clips(clips_dir), "cpu", 1, 0, broken_factory)
+
+    assert "unsupported compute type" in report["error"]
+    assert "runs" not in report
+
+
+def test_main_writes_json_for_every_setting(clips_dir, tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setattr(benchmark, "load_model", lambda setting, device: FakeWhisperModel())
+    output = tmp_path / "bench.json"
+
+    code = benchmark.main([
+        "--clips", str(clips_dir), "--in-process", "--beam-sizes", "1,5",
+        "--language-modes", "auto,bilingual", "--repeat", "1", "--warmup", "0", "--output", str(output),
+    ])
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert code == 0
+    assert results["version"] == benchmark.RESULTS_VERSION
+    assert len(results["results"]) == 4
+    assert {r["setting"]["language_mode"] for r in results["results"]} == {"auto", "bilingual"}
+    assert results["machine"]["cpu_count"]
+
+
+def test_isolated_run_with_real_tiny_model_on_cpu(clips_dir, tmp_path):
+    utils = pytest.importorskip("faster_whisper.utils")
+    try:
+        utils.download_model("tiny", local_files_only=True)
+    except Exception:
+        pytest.skip("tiny model not in the local HF cache")
+    output = tmp_path / "bench.json"
+
+    code = benchmark.main(["--clips", str(clips_dir), "--repeat", "1", "--output", str(output)])
+
+    report = json.loads(output.read_text(encoding="utf-8"))["results"][0]
+    assert code == 0, report.get("error")
+    assert report["model_load_ms"] > 0 and report["peak_rss_mb"] > 0
+
+
+def test_thread_scaling_compares_throughput_per_thread_count(clips_dir, tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setattr(benchmark, "load_model", lambda setting, device: FakeWhisperModel())
+    output = tmp_path / "bench.json"
+
+    code = benchmark.main([
+        "--clips", str(clips_dir), "--in-process", "--cpu-threads", "2,1", "--repeat", "1", "--warmup", "0",
+        "--output", str(output),
+    ])
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    assert code == 0
+    assert [r["setting"]["cpu_threads"] for r in results["results"]] == [1, 2]
+    assert all(r["throughput"] > 0 for r in results["results"])
+    (scaling,) = results["thread_scaling"]
+    assert "cpu_threads" not in scaling["setting"]
+    base, doubled = scaling["points"]
+    assert base == {**base, "cpu_threads": 1, "speedup": 1.0, "efficiency": 1.0}
+    assert doubled["efficiency"] == pytest.approx(doubled["speedup"] / 2, abs=1e-3)
+
+
+def test_thread_scaling_speedup_and_efficiency():
+    def report(threads, throughput):
+        return {"setting": {"model": "tiny", "cpu_threads": threads}, "throughput": throughput}
+
+    (scaling,) = benchmark.thread_scaling([report(4, 30.0), report(1, 10.0), report(2, 18.0)])
+
+    assert [(p["cpu_threads"], p["speedup"], p["efficiency"]) for p in scaling["points"]] == [
+        (1, 1.0, 1.0), (2, 1.8, 0.9), (4, 3.0, 0.75),
+    ]
+
+
+def test_process_scaling_reports_cores_in_use():
+    def report(processes, throughput):
+        setting = {"model": "tiny", "cpu_threads": 2, "processes": processes}
+        return {"setting": setting, "throughput": throughput}
+
+    (scaling,) = benchmark.process_scaling([report(1, 10.0), report(4, 32.0), report(2, 19.0)])
+
+    assert scaling["setting"] == {"model": "tiny", "cpu_threads": 2}
+    assert [(p["processes"], p["cores"], p["speedup"], p["efficiency"]) for p in scaling["points"]] == [
+        (1, 2, 1.0, 1.0), (2, 4, 1.9, 0.95), (4, 8, 3.2, 0.8),
+    ]
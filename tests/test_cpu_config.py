@@ -0,0 +1,73 @@
+"""Tests for CPU thread defaults, affinity and the OpenMP environment."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import autotune
+import cpu_config
+
+WORKER = Path(__file__).parent.parent / "src" / "transcribe" / "transcribe.py"
+
+
+def test_parse_affinity():
+    assert cpu_config.parse_affinity("0-3,6") == [0, 1, 2, 3, 6]
+    assert cpu_config.parse_affinity(" 2, 1,2 ") == [1, 2]
+    for spec in ("", "3-1", "a", "-1"):
+        with pytest.raises(ValueError):
+            cpu_config.parse_affinity(spec)
+
+
+def test_physical_cores_stay_within_the_allowed_cpus():
+    cpus = cpu_config.available_cpus()
+
+    assert cpus and 1 <= cpu_config.physical_cores() <= len(cpus)
+    assert cpu_config.default_cpu_threads("cpu") == cpu_config.physical_cores()
+    assert cpu_config.default_cpu_threads("cuda") == 0
+
+
+def test_linux_topology_counts_hyperthread_siblings_once(monkeypatch):
+    siblings = {0: "0,2", 1: "1,3", 2: "0,2", 3: "1,3"}
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.setattr(cpu_config, "available_cpus", lambda: [0, 1, 2, 3])
+    monkeypatch.setattr(cpu_config, "_linux_physical_cores", lambda cpus: len({siblings[c] for c in cpus}))
+
+    assert cpu_config.physical_cores() == 2
+
+
+def test_environment_is_set_only_where_unset(monkeypatch):
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    assert cpu_config.configure_environment(3) == {"OMP_NUM_THREADS": "3"}
+
+    monkeypatch.setenv("OMP_NUM_THREADS", "1")
+    assert cpu_config.configure_environment(3) == {"OMP_NUM_THREADS": "1"}
+
+
+def test_explicit_threads_override_profile_and_default(tmp_path):
+    path = tmp_path / autotune.PROFILE_NAME
+    autotune.save_profile(path, "tiny", "cpu", {"compute_type": "int8_float32", "cpu_threads": 6, "num_workers": 1})
+
+    assert autotune.startup_settings(path, "tiny", "cpu", cpu_threads=2, num_workers=2) == {
+        "compute_type": "int8_float32", "cpu_threads": 2, "num_workers": 2, "source": "profile",
+    }
+    # 0 (or no setting at all) means one thread per physical core
+    assert autotune.startup_settings(path, "base", "cpu")["cpu_threads"] == cpu_config.physical_cores()
+    assert autotune.startup_settings(path, "tiny", "cpu", cpu_threads=0)["cpu_threads"] == cpu_config.physical_cores()
+    assert autotune.startup_settings(path, "tiny", "cuda")["cpu_threads"] == 0
+
+
+@pytest.mark.parametrize("args, fragment", [
+    (["--cpu-threads", "-1"], "--cpu-threads must be >= 0"),
+    (["--num-workers", "0"], "--num-workers must be >= 1"),
+    (["--cpu-affinity", "3-1"], "--cpu-affinity 3-1"),
+])
+def test_bad_thread_flags_fail_before_loading(args, fragment):
+    proc = subprocess.run(
+        [sys.executable, str(WORKER), "--device", "cpu", *args],
+        capture_output=True, text=True, timeout=60, env={**os.environ, "HF_HUB_OFFLINE": "1"},
+    )
+
+    assert proc.returncode != 0
+    assert fragment in proc.stderr
@@ -0,0 +1,94 @@
+"""Tests for the built-in energy VAD (silence trimming with a timestamp map)."""
+import time
+
+import numpy as np
+import pytest
+
+from conftest import write_wav
+from energy_vad import TimestampMap, trim_silence
+import transcribe
+
+SR = 16000
+
+
+def tone(seconds, amplitude=0.2):
+    t = np.arange(int(seconds * SR), dtype=np.float32)
+    return (amplitude * np.sin(2 * np.pi * 220 * t / SR)).astype(np.float32)
+
+
+def noise(seconds, amplitude=0.001, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * SR)) * amplitude).astype(np.float32)
+
+
+def test_long_pauses_are_dropped_and_short_ones_kept():
+    audio = np.concatenate([tone(2), noise(5), tone(1), noise(0.5), tone(1), noise(3)])
+
+    trimmed, time_map, stats = trim_silence(audio, min_silence_ms=1000, pad_ms=200)
+
+    assert stats["chunks"] == 2
+    # 5s and 3s pauses go (minus padding); the 0.5s one stays
+    assert 7.0 < stats["dropped_seconds"] < 8.0
+    assert stats["kept_seconds"] == pytest.approx(len(trimmed) / SR, abs=1e-3)
+    assert time_map.chunks[1][0] == pytest.approx(7.0 - 0.2, abs=0.05)
+
+
+def test_quiet_speech_without_pauses_is_kept():
+    # 16 dB quieter speech (about -33 dBFS) is the quietest 30% of a clip with no real pauses
+    audio = np.concatenate([tone(3), tone(2.5, amplitude=0.2 / 6.3), tone(2.5)])
+
+    trimmed, _, stats = trim_silence(audio)
+
+    assert stats["dropped_seconds"] == 0.0
+    assert len(trimmed) == len(audio)
+
+
+def test_silence_only_audio_is_left_alone():
+    audio = noise(3)
+
+    trimmed, time_map, stats = trim_silence(audio)
+
+    assert trimmed is audio
+    assert stats["dropped_seconds"] == 0.0
+    assert time_map.to_original(1.5) == 1.5
+
+
+def test_timestamp_map_round_trip_and_boundaries():
+    time_map = TimestampMap([(0.0, 2.0), (10.0, 13.0)])
+
+    assert time_map.to_original(1.0) == 1.0
+    assert time_map.to_original(2.5) == 10.5
+    # Exactly on the boundary: a start belongs to the later chunk, an end to the earlier one
+    assert time_map.to_original(2.0) == 10.0
+    assert time_map.to_original(2.0, is_end=True) == 2.0
+    assert time_map.to_original(99.0) == 13.0
+
+
+def test_trimming_costs_little_compared_to_decoding():
+    audio = np.concatenate([np.concatenate([tone(8), noise(12, seed=i)]) for i in range(30)])  # 10 minutes
+
+    start = time.perf_counter()
+    trim_silence(audio)
+    elapsed = time.perf_counter() - start
+
+    # Decoding 10 minutes takes minutes even on a GPU; 1% of that is seconds
+    assert elapsed < 0.5
+
+
+def test_transcribe_audio_reports_original_times(fake_model, tmp_path):
+    audio = np.concatenate([noise(4), tone(1), noise(6), tone(1)])
+    pcm = (audio * 32767).astype("<i2").tobytes()
+    path = write_wav(tmp_path / "pauses.wav", pcm)
+
+    result = transcribe.transcribe_audio(path, fake_model, trim_silence=True)
+
+    decoded = fake_model.calls[0]["audio"]
+    assert len(decoded) < len(audio) / 2
+    assert result["silence"]["dropped_seconds"] > 8
+    assert result["audio_seconds"] == 12.0
+    assert "silence_trim" in result["timings"]
+    # Fake segments are at 0-1s and 1-2s of the trimmed audio. The first kept
+    # chunk is the first tone with 0.2s padding (3.8-5.2s), the second starts at 10.8s
+    first, second = result["segments"]
+    assert first["start"] == pytest.approx(3.8, abs=0.05)
+    assert second["start"] == pytest.approx(4.8, abs=0.05)
+    assert second["end"] == pytest.approx(10.8 + 0.6, abs=0.05)
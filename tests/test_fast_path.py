@@ -0,0 +1,82 @@
+"""Tests for the short-utterance fast path (draft model + escalation)."""
+import pytest
+
+from conftest import DEFAULTS, FakeWhisperModel, run_worker, write_wav
+from fast_path import confidence_failures
+from model_pool import ModelPool
+import transcribe
+
+OPTIONS = {**DEFAULTS, "fast_path_max_seconds": 8.0}
+
+
+def segment(text="hi", avg_logprob=-0.2, no_speech_prob=0.01, compression_ratio=1.2):
+    return {"text": text, "avg_logprob": avg_logprob, "no_speech_prob": no_speech_prob,
+            "compression_ratio": compression_ratio}
+
+
+@pytest.mark.parametrize("segments, reasons", [
+    ([segment()], []),
+    ([segment(), segment(avg_logprob=-1.1)], ["avg_logprob"]),
+    ([segment(no_speech_prob=0.8, compression_ratio=3.0)], ["no_speech_prob", "compression_ratio"]),
+    ([segment(text="")], ["empty"]),
+    ([], ["empty"]),
+])
+def test_confidence_failures(segments, reasons):
+    assert confidence_failures(segments) == reasons
+
+
+def test_confident_draft_is_accepted_with_greedy_search(wav_file):
+    model, draft = FakeWhisperModel(texts=["big"]), FakeWhisperModel(texts=["draft"])
+
+    result = transcribe.run_tiered(model, draft, wav_file, OPTIONS)
+
+    assert result["text"] == "draft"
+    assert result["fast_path"]["decision"] == "accepted"
+    assert draft.calls[0]["beam_size"] == 1
+    assert model.calls == []
+
+
+def test_low_confidence_draft_escalates(wav_file):
+    model, draft = FakeWhisperModel(texts=["big"]), FakeWhisperModel(texts=["draft"], avg_logprob=-1.5)
+
+    result = transcribe.run_tiered(model, draft, wav_file, OPTIONS)
+
+    assert result["text"] == "big"
+    assert result["fast_path"]["decision"] == "escalated"
+    assert result["fast_path"]["reasons"] == ["avg_logprob"]
+    assert model.calls[0]["beam_size"] == 5
+    assert {"audio_load", "fast_path_draft", "decode"} <= set(result["timings"])
+
+
+def test_only_the_kept_tier_reaches_on_segment(wav_file):
+    model, draft = FakeWhisperModel(texts=["big"]), FakeWhisperModel(texts=["draft"], avg_logprob=-1.5)
+    streamed = []
+
+    transcribe.run_tiered(model, draft, wav_file, OPTIONS, on_segment=streamed.append)
+
+    assert [segment["text"] for segment in streamed] == ["big"]
+
+
+def test_long_clip_skips_the_draft(tmp_path):
+    path = write_wav(tmp_path / "long.wav", b"\0\0" * 16000 * 9)
+    model, draft = FakeWhisperModel(texts=["big"]), FakeWhisperModel()
+
+    result = transcribe.run_tiered(model, draft, path, OPTIONS)
+
+    assert result["fast_path"]["decision"] == "long"
+    assert result["fast_path"]["draft_ms"] is None
+    assert draft.calls == []
+
+
+def test_worker_reports_fast_path_and_honors_per_request_opt_out(wav_file):
+    pool = ModelPool(lambda key: FakeWhisperModel(texts=["draft"]), size_of=lambda key: None)
+    defaults = {**OPTIONS, "model": "large-v3-turbo", "device": "cpu", "compute_type": "int8",
+                "fast_path": True, "fast_path_model": "base"}
+    requests = [
+        {"v": 1, "id": "1", "op": "transcribe", "path": str(wav_file)},
+        {"v": 1, "id": "2", "op": "transcribe", "path": str(wav_file), "options": {"fast_path": False}},
+    ]
+    results = run_worker(FakeWhisperModel(texts=["big"]), requests, defaults=defaults, pool=pool)
+
+    assert results[0]["text"] == "draft" and results[0]["fast_path"]["decision"] == "accepted"
+    assert results[2]["text"] == "big" and "fast_path" not in results[2]
@@ -0,0 +1,77 @@
+"""Tests for choosing the decode language before the full transcription."""
+import pytest
+
+from conftest import FakeWhisperModel
+import transcribe
+
+
+@pytest.mark.parametrize("probs, expected", [
+    # Top language outside the allowed set: Russian counts towards Ukrainian
+    ([("ru", 0.6), ("uk", 0.2), ("en", 0.1), ("be", 0.1)], "uk"),
+    ([("de", 0.5), ("en", 0.3), ("uk", 0.1), ("ru", 0.05)], "en"),
+    ([("uk", 0.9), ("en", 0.05)], "uk"),
+])
+def test_bilingual_decodes_once_in_restricted_language(probs, expected, wav_file, cache_dir):
+    model = FakeWhisperModel(language_probs=probs)
+
+    result = transcribe.transcribe_audio(wav_file, model, language_mode="bilingual")
+
+    assert len(model.detect_calls) == 1
+    assert len(model.calls) == 1
+    assert model.calls[0]["language"] == expected
+    assert result["language"] == expected
+    assert result["language_route"] == "restricted"
+    assert set(result["language_candidates"]) == {"en", "uk"}
+    assert "language_detect" in result["timings"]
+
+
+def test_restricted_probability_is_renormalized():
+    model = FakeWhisperModel(language_probs=[("ru", 0.5), ("uk", 0.1), ("en", 0.2), ("pl", 0.2)])
+
+    language, probability, candidates = transcribe.detect_restricted_language(
+        model, [0.0], ("en", "uk"), {"ru": "uk"}
+    )
+
+    assert language == "uk"
+    assert probability == pytest.approx(0.75)
+    assert candidates == {"en": 0.2, "uk": 0.6}
+
+
+def test_vad_is_applied_to_restricted_detection(wav_file, cache_dir, monkeypatch):
+    model = FakeWhisperModel(language_probs=[("uk", 0.8), ("en", 0.2)])
+    seen = []
+    real_detect = model.detect_language
+    monkeypatch.setattr(model, "detect_language", lambda audio, **kw: seen.append(kw) or real_detect(audio, **kw))
+
+    transcribe.transcribe_audio(wav_file, model, language_mode="bilingual", enable_vad=True)
+
+    assert seen == [{"vad_filter": True}]
+    assert model.calls[0]["vad_filter"] is True
+
+
+@pytest.mark.parametrize("mode, vad, route, detects", [
+    ("en", False, "fixed", 0),
+    ("ua", False, "fixed", 0),
+    ("auto", False, "detect", 1),
+    ("auto", True, "model", 0),
+])
+def test_language_route_per_mode(mode, vad, route, detects, fake_model, wav_file, cache_dir):
+    result = transcribe.transcribe_audio(wav_file, fake_model, language_mode=mode, enable_vad=vad)
+
+    assert result["language_route"] == route
+    assert len(fake_model.detect_calls) == detects
+    assert len(fake_model.calls) == 1
+
+
+def test_missing_vad_dependency_in_restricted_detection_is_reported(wav_file, cache_dir, monkeypatch, capfd):
+    model = FakeWhisperModel()
+
+    def detect_language(audio, vad_filter=False):
+        raise ModuleNotFoundError("No module named 'onnxruntime'")
+
+    monkeypatch.setattr(model, "detect_language", detect_language)
+
+    with pytest.raises(ModuleNotFoundError):
+        transcribe.transcribe_audio(wav_file, model, language_mode="bilingual", enable_vad=True)
+    assert "[VAD] Missing dependency" in capfd.readouterr().err
+    assert model.calls == []
@@ -0,0 +1,146 @@
+"""Tests for memory-mapped, windowed reading and transcription of long WAV files."""
+import tracemalloc
+import wave
+
+import numpy as np
+import pytest
+
+import long_audio
+import transcribe
+from conftest import FakeWhisperModel, write_wav
+
+RATE = 16000
+
+
+class AudioDroppingModel(FakeWhisperModel):
+    """FakeWhisperModel that records call options but not the audio, so windows can be freed."""
+
+    def transcribe(self, audio, **kwargs):
+        self.samples = getattr(self, "samples", 0) + len(audio)
+        segments, info = super().transcribe(audio, **kwargs)
+        self.calls[-1]["audio"] = None
+        return segments, info
+
+
+def write_long_wav(path, minutes: int):
+    """A recording of `minutes`: each minute is 58s of tone then 2s of silence."""
+    t = np.arange(58 * RATE) / RATE
+    minute = np.concatenate([
+        (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype("<i2"),
+        np.zeros(2 * RATE, dtype="<i2"),
+    ]).tobytes()
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        for _ in range(minutes):
+            wav.writeframes(minute)
+    return path
+
+
+def peak_mb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def test_header_of_recorder_wav(tmp_path):
+    path = write_wav(tmp_path / "a.wav", b"\1\0" * RATE * 3)
+    offset, size = long_audio.read_wav_header(path)
+    assert offset == 44
+    assert size == RATE * 3 * 2
+    assert long_audio.wav_seconds(path) == pytest.approx(3.0)
+
+
+def test_header_skips_extra_chunks_and_fills_unwritten_size(tmp_path):
+    fmt = (1).to_bytes(2, "little") + (1).to_bytes(2, "little") + RATE.to_bytes(4, "little")
+    fmt += (RATE * 2).to_bytes(4, "little") + (2).to_bytes(2, "little") + (16).to_bytes(2, "little")
+    data = b"\0\0" * 100
+    body = b"WAVE" + b"fmt " + (16).to_bytes(4, "little") + fmt
+    body += b"LIST" + (3).to_bytes(4, "little") + b"abc\0"  # odd size, padded
+    body += b"data" + (0).to_bytes(4, "little") + data  # size never filled in
+    path = tmp_path / "b.wav"
+    path.write_bytes(b"RIFF" + len(body).to_bytes(4, "little") + body)
+
+    offset, size = long_audio.read_wav_header(path)
+    assert size == len(data)
+    assert path.read_bytes()[offset:] == data
+
+
+def test_other_formats_are_not_mapped(tmp_path):
+    path = tmp_path / "stereo.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(b"\0\0\0\0" * 10)
+    assert long_audio.wav_seconds(path) is None
+    (tmp_path / "x.wav").write_bytes(b"not a wav")
+    assert long_audio.wav_seconds(tmp_path / "x.wav") is None
+    with pytest.raises(ValueError):
+        long_audio.mmap_wav(path)
+
+
+def test_windows_cover_file_and_cut_at_silence(tmp_path):
+    path = write_long_wav(tmp_path / "long.wav", 3)
+    windows = list(long_audio.iter_wav_windows(path, window_s=61, search_s=5))
+
+    assert sum(len(samples) for _, samples in windows) == 3 * 60 * RATE
+    assert [offset for offset, _ in windows][0] == 0
+    # Cuts land in the 2s pauses at 58-60s and 118-120s
+    for offset, _ in windows[1:]:
+        assert 58 <= offset % 60 < 60
+    # Samples match a plain read of the file
+    first = windows[0][1]
+    with wave.open(str(path)) as wav:
+        pcm = wav.readframes(len(first))
+    np.testing.assert_array_equal(first, np.frombuffer(pcm, "<i2") / np.float32(32768))
+
+
+def test_long_file_is_transcribed_in_windows(tmp_path, cache_dir):
+    path = write_long_wav(tmp_path / "long.wav", 12)
+    model = AudioDroppingModel(texts=["one", "two"])
+    streamed = []
+
+    result = transcribe.transcribe_audio(path, model, language_mode="en", on_segment=streamed.append)
+
+    windows = len(model.calls)
+    assert windows == result["windows"] == 3
+    assert model.samples == 12 * 60 * RATE
+    assert result["audio_seconds"] == pytest.approx(720.0)
+    assert result["text"] == " ".join(["one two"] * windows)
+    # Segment times are shifted into the whole file's timeline
+    starts = [segment["start"] for segment in result["segments"]]
+    assert starts == sorted(starts)
+    assert starts[2] > 290
+    assert streamed == result["segments"]
+    assert result["timings"]["audio_load"] > 0
+
+
+def test_later_windows_reuse_first_language(tmp_path, cache_dir):
+    path = write_long_wav(tmp_path / "long.wav", 11)
+    model = AudioDroppingModel(language="uk", language_probs=[("uk", 0.8), ("en", 0.2)])
+
+    result = transcribe.transcribe_audio(path, model, language_mode="bilingual")
+
+    assert len(model.detect_calls) == 1
+    assert [call["language"] for call in model.calls] == ["uk", "uk", "uk"]
+    assert result["language"] == "uk"
+
+
+def test_peak_memory_is_flat_for_an_hour_long_file(tmp_path, cache_dir):
+    short = write_long_wav(tmp_path / "short.wav", 10)
+    hour = write_long_wav(tmp_path / "hour.wav", 60)
+    whole_file_mb = 60 * 60 * RATE * 4 / (1024 * 1024)  # float32 samples of the full hour
+
+    def run(path):
+        return lambda: transcribe.transcribe_audio(path, AudioDroppingModel(), language_mode="en")
+
+    short_peak = peak_mb(run(short))
+    hour_peak = peak_mb(run(hour))
+
+    assert hour_peak < whole_file_mb / 4
+    assert hour_peak < short_peak * 1.25 + 1
@@ -0,0 +1,63 @@
+"""Tests for per-stage timings and the worker's metrics op."""
+import io
+import json
+
+from conftest import DEFAULTS
+from metrics import MetricsAggregator, StageTimer
+import transcribe
+
+
+def test_stage_timer_accumulates_repeated_stages():
+    timer = StageTimer()
+    timer.add("decode", 1.5)
+    timer.add("decode", 2.25)
+    with timer.stage("postprocess"):
+        pass
+
+    timings = timer.as_dict()
+    assert timings["decode"] == 3.75
+    assert timings["postprocess"] >= 0
+
+
+def test_aggregator_snapshot_percentiles_and_counts():
+    metrics = MetricsAggregator(window=10)
+    for ms in range(1, 21):
+        metrics.record({"decode": float(ms)}, audio_seconds=1.0)
+    metrics.record_error()
+
+    snapshot = metrics.snapshot()
+    decode = snapshot["stages"]["decode"]
+    assert snapshot["requests"] == 20 and snapshot["errors"] == 1
+    assert snapshot["audio_seconds"] == 20.0
+    assert decode["count"] == 20 and decode["total_ms"] == 210.0 and decode["max_ms"] == 20.0
+    # Percentiles only look at the last `window` samples (11..20)
+    assert decode["p50_ms"] == 15.0 and decode["p95_ms"] == 20.0
+
+
+def test_transcribe_audio_reports_stage_timings(fake_model, wav_file, cache_dir):
+    result = transcribe.transcribe_audio(wav_file, fake_model, language_mode="bilingual")
+
+    assert set(result["timings"]) >= {"audio_load", "suppress_tokens", "language_detect", "prepare", "decode", "postprocess"}
+    assert len(result["segment_decode_ms"]) == len(result["segments"]) == 2
+    assert result["audio_seconds"] == 1.0
+    # Detection ran separately, so its probability (renormalized over en/uk) is reported
+    assert result["language_prob"] == 1.0
+
+
+def test_worker_result_timings_and_metrics_op(fake_model, wav_file):
+    request = {"v": 1, "id": "1", "op": "transcribe", "path": str(wav_file)}
+    stdin = io.BytesIO("".join(json.dumps(r) + "\n" for r in (request, {**request, "id": "2"})).encode("utf-8"))
+    stdout = io.StringIO()
+    worker = transcribe.Worker(fake_model, DEFAULTS, stdout)
+    worker.serve(stdin)
+    # Transcriptions run on the dispatcher, so ask for metrics once they're done
+    worker.handle_json_request(json.dumps({"v": 1, "id": "m", "op": "metrics"}))
+    out = [json.loads(line) for line in stdout.getvalue().splitlines()[1:]]
+
+    result = out[0]
+    assert set(result["timings"]) >= {"audio_load", "decode", "postprocess", "transcribe_ms", "total_ms"}
+    metrics = out[-1]
+    assert metrics["type"] == "metrics" and metrics["id"] == "m"
+    assert metrics["requests"] == 2 and metrics["errors"] == 0
+    assert metrics["stages"]["decode"]["count"] == 2
+    assert "total_ms" not in metrics["stages"]
@@ -0,0 +1,145 @@
+"""Tests for the cache-only model lookup behind --check-model."""
+import hashlib
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import model_cache
+
+WORKER = Path(__file__).parent.parent / "src" / "transcribe" / "transcribe.py"
+
+
+def add_snapshot(cache, repo_id, revision="abc123", files=("config.json", "model.bin", "vocabulary.txt"), main=True):
+    repo_dir = cache / ("models--" + repo_id.replace("/", "--"))
+    snapshot = repo_dir / "snapshots" / revision
+    snapshot.mkdir(parents=True)
+    for name in files:
+        (snapshot / name).write_bytes(b"x")
+    if main:
+        (repo_dir / "refs").mkdir()
+        (repo_dir / "refs" / "main").write_text(revision)
+    return snapshot
+
+
+def test_finds_complete_snapshot_by_name_and_repo_id(tmp_path):
+    snapshot = add_snapshot(tmp_path, "Systran/faster-whisper-medium")
+
+    assert model_cache.find_cached_model("medium", tmp_path) == snapshot
+    assert model_cache.find_cached_model("Systran/faster-whisper-medium", tmp_path) == snapshot
+    assert model_cache.find_cached_model("small", tmp_path) is None
+
+
+def test_incomplete_download_is_missing(tmp_path):
+    add_snapshot(tmp_path, "Systran/faster-whisper-medium", files=("config.json", "vocabulary.txt"))
+
+    assert model_cache.find_cached_model("medium", tmp_path) is None
+
+
+def test_snapshot_without_refs_main_is_found(tmp_path):
+    snapshot = add_snapshot(tmp_path, "mobiuslabsgmbh/faster-whisper-large-v3-turbo", main=False)
+
+    assert model_cache.find_cached_model("turbo", tmp_path) == snapshot
+
+
+def test_unknown_name_raises():
+    with pytest.raises(ValueError, match="Invalid model size"):
+        model_cache.repo_id_for("huge")
+
+
+def test_hub_cache_dir_follows_environment(monkeypatch, tmp_path):
+    for var in ("HF_HUB_CACHE", "HUGGINGFACE_HUB_CACHE", "HF_HOME", "XDG_CACHE_HOME"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setenv("HF_HOME", str(tmp_path))
+    assert model_cache.hub_cache_dir() == tmp_path / "hub"
+    monkeypatch.setenv("HF_HUB_CACHE", str(tmp_path / "direct"))
+    assert model_cache.hub_cache_dir() == tmp_path / "direct"
+
+
+def test_check_reports_sizes_against_the_manifest(tmp_path):
+    snapshot = add_snapshot(tmp_path, "Systran/faster-whisper-medium")
+    repo_dir = snapshot.parent.parent
+    model_cache.write_manifest(repo_dir, "abc123", {"model.bin": {"size": 1}, "config.json": {"size": 1}})
+
+    report = model_cache.check_model("medium", tmp_path)
+    assert report["present"] and report["revision"] == "abc123"
+    assert report["files"]["model.bin"] == {"size": 1, "expected_size": 1, "ok": True, "error": None}
+
+    (snapshot / "model.bin").write_bytes(b"truncated")
+    report = model_cache.check_model("medium", tmp_path)
+    assert not report["present"]
+    assert report["files"]["model.bin"]["error"] == "size mismatch"
+
+
+def test_check_reports_files_missing_from_the_manifest(tmp_path):
+    snapshot = add_snapshot(tmp_path, "Systran/faster-whisper-medium")
+    model_cache.write_manifest(snapshot.parent.parent, "abc123", {"tokenizer.json": {"size": 10}})
+
+    report = model_cache.check_model("medium", tmp_path)
+
+    assert not report["present"]
+    assert report["missing"] == ["tokenizer.json"]
+
+
+def test_verify_checks_blob_sha256(tmp_path):
+    data = b"weights"
+    good = hashlib.sha256(data).hexdigest()
+    snapshot = add_snapshot(tmp_path, "Systran/faster-whisper-small", files=("config.json", "vocabulary.txt"))
+    blobs = snapshot.parent.parent / "blobs"
+    blobs.mkdir()
+    (blobs / good).write_bytes(data)
+    (snapshot / "model.bin").symlink_to(blobs / good)
+
+    report = model_cache.check_model("small", tmp_path, verify=True)
+    assert report["present"] and report["files"]["model.bin"]["sha256"] == good
+
+    (blobs / good).write_bytes(b"corrupt")
+    report = model_cache.check_model("small", tmp_path, verify=True)
+    assert report["files"]["model.bin"]["error"] == "checksum mismatch"
+    # Without verify only sizes are checked
+    assert model_cache.check_model("small", tmp_path)["present"]
+
+
+def test_check_unknown_and_missing_models(tmp_path):
+    assert "Invalid model size" in model_cache.check_model("huge", tmp_path)["error"]
+    report = model_cache.check_model("tiny", tmp_path)
+    assert report["present"] is False and report["path"] is None
+    assert "model.bin" in report["missing"]
+
+
+def test_check_model_json_output(tmp_path):
+    add_snapshot(tmp_path, "Systran/faster-whisper-tiny")
+    proc = subprocess.run(
+        [sys.executable, str(WORKER), "--check-model", "--model", "tiny", "--json", "--verify"],
+        env={"HF_HUB_CACHE": str(tmp_path), "PATH": "", "SYSTEMROOT": ""},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    report = json.loads(proc.stdout)
+    assert proc.returncode == 0
+    assert report["present"] and report["repo_id"] == "Systran/faster-whisper-tiny"
+    assert set(report["files"]) == {"config.json", "model.bin", "vocabulary.txt"}
+
+
+@pytest.mark.parametrize("present", [True, False])
+def test_check_model_does_not_import_faster_whisper(tmp_path, present):
+    if present:
+        add_snapshot(tmp_path, "Systran/faster-whisper-tiny")
+    code = (
+        "import sys; sys.argv = ['transcribe.py', '--check-model', '--model', 'tiny', '--startup-profile'];"
+        "import transcribe; code = transcribe.main();"
+        "print('IMPORTED' if 'faster_whisper' in sys.modules else 'LAZY'); sys.exit(code)"
+    )
+    env = {"HF_HUB_CACHE": str(tmp_path), "PATH": "", "SYSTEMROOT": ""}
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=WORKER.parent, env=env, capture_output=True, text=True, timeout=60
+    )
+
+    assert proc.returncode == (0 if present else 1)
+    assert ("MODEL_PRESENT" in proc.stdout) == present
+    assert "LAZY" in proc.stdout
+    assert "[Startup]" in proc.stderr and '"cache_check"' in proc.stderr
@@ -0,0 +1,209 @@
+"""Tests for the resumable model downloader, against a local stand-in for the Hub."""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+import pytest
+
+import model_cache
+import model_download
+
+REPO = "test-org/faster-whisper-test"
+COMMIT = "0123456789abcdef0123456789abcdef01234567"
+CHUNK = 64 * 1024
+WORKER = Path(__file__).parent.parent / "src" / "transcribe" / "transcribe.py"
+
+
+def git_blob_id(data: bytes) -> str:
+    return hashlib.sha1(f"blob {len(data)}\0".encode() + data).hexdigest()
+
+
+class FakeHub:
+    """Repo contents plus knobs for the handler: range support, dropped ranges, corruption."""
+
+    def __init__(self):
+        self.files = {
+            "config.json": b'{"alignment_heads": []}',
+            "vocabulary.txt": "\n".join(f"token{i}" for i in range(100)).encode(),
+            "model.bin": os.urandom(5 * CHUNK - 1000),
+            "README.md": b"# not a model file",
+        }
+        self.lfs = {"model.bin"}
+        self.ranges = True
+        self.drop_ranges: list[int] = []  # range starts whose next response is cut short
+        self.corrupt = False
+        self.requests: list[tuple[str, str | None]] = []
+        self.lock = threading.Lock()
+
+    def info(self) -> dict:
+        siblings = []
+        for name, data in self.files.items():
+            sibling = {"rfilename": name, "size": len(data), "blobId": git_blob_id(data)}
+            if name in self.lfs:
+                sibling["lfs"] = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+            siblings.append(sibling)
+        return {"id": REPO, "sha": COMMIT, "siblings": siblings}
+
+    def file_requests(self, name: str) -> list:
+        return [rng for path, rng in self.requests if path.endswith("/" + name)]
+
+
+class HubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        hub = self.server.hub
+        with hub.lock:
+            hub.requests.append((self.path, self.headers.get("Range")))
+        if self.path.startswith(f"/api/models/{REPO}/revision/"):
+            self.reply(200, json.dumps(hub.info()).encode())
+            return
+        prefix = f"/{REPO}/resolve/{COMMIT}/"
+        name = unquote(self.path[len(prefix):]) if self.path.startswith(prefix) else None
+        if name not in hub.files:
+            self.reply(404, b"not found")
+            return
+        data = hub.files[name]
+        if hub.corrupt and name in hub.lfs:
+            data = b"\xff" + data[1:]
+
+        range_header = self.headers.get("Range")
+        if not (range_header and hub.ranges):
+            self.reply(200, data)
+            return
+        start, end = (int(x) for x in range_header.split("=")[1].split("-"))
+        body = data[start:end + 1]
+        with hub.lock:
+            drop = start in hub.drop_ranges
+            if drop:
+                hub.drop_ranges.remove(start)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if drop:
+            # Connection drops half way through the range
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def reply(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HubHandler)
+    server.hub = FakeHub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("HF_ENDPOINT", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(model_download, "RETRY_DELAY_S", 0)
+    yield server.hub
+    server.shutdown()
+    server.server_close()
+
+
+def download(tmp_path, **kwargs):
+    lines = []
+    kwargs.setdefault("chunk_bytes", CHUNK)
+    snapshot = model_download.download_model(REPO, tmp_path, emit=lines.append, **kwargs)
+    return snapshot, [json.loads(line.split(" ", 1)[1]) for line in lines]
+
+
+def test_download_fetches_ranges_in_parallel_and_verifies(tmp_path, hub):
+    snapshot, progress = download(tmp_path, workers=4)
+
+    assert snapshot == tmp_path / f"models--{REPO.replace('/', '--')}" / "snapshots" / COMMIT
+    assert sorted(p.name for p in snapshot.iterdir()) == ["config.json", "model.bin", "vocabulary.txt"]
+    assert (snapshot / "model.bin").read_bytes() == hub.files["model.bin"]
+    assert len(hub.file_requests("model.bin")) == 5
+    assert hub.file_requests("README.md") == []
+    # The result is a normal, verifiable cache entry
+    report = model_cache.check_model(REPO, tmp_path, verify=True)
+    assert report["present"] and report["revision"] == COMMIT
+    assert report["files"]["model.bin"]["expected_size"] == len(hub.files["model.bin"])
+    # Progress is reported per file and overall
+    final = progress[-1]
+    assert final["percent"] == 100.0
+    assert final["overall_downloaded"] == final["overall_total"] == sum(
+        len(hub.files[n]) for n in ("config.json", "vocabulary.txt", "model.bin")
+    )
+
+
+def test_dropped_connection_retries_only_that_range(tmp_path, hub):
+    hub.drop_ranges = [2 * CHUNK]
+
+    snapshot, _ = download(tmp_path, workers=4)
+
+    assert (snapshot / "model.bin").read_bytes() == hub.files["model.bin"]
+    ranges = hub.file_requests("model.bin")
+    assert len(ranges) == 6
+    assert ranges.count(f"bytes={2 * CHUNK}-{3 * CHUNK - 1}") == 2
+
+
+def test_interrupted_download_resumes_where_it_stopped(tmp_path, hub, monkeypatch):
+    monkeypatch.setattr(model_download, "ATTEMPTS", 1)
+    hub.drop_ranges = [2 * CHUNK]
+    with pytest.raises(model_download.DownloadError, match="model.bin"):
+        download(tmp_path, workers=1)
+    assert len(hub.file_requests("model.bin")) == 3
+
+    hub.requests.clear()
+    snapshot, progress = download(tmp_path, workers=1)
+
+    # Chunks 0 and 1 were kept; only 2, 3 and 4 are fetched again
+    assert len(hub.file_requests("model.bin")) == 3
+    assert (snapshot / "model.bin").read_bytes() == hub.files["model.bin"]
+    assert not list((snapshot.parent.parent / "blobs").glob("*.incomplete*"))
+    # The second run doesn't fetch files that were already in place
+    assert hub.file_requests("config.json") == []
+
+
+def test_corrupt_download_is_rejected(tmp_path, hub):
+    hub.corrupt = True
+
+    with pytest.raises(model_download.DownloadError, match="checksum mismatch"):
+        download(tmp_path)
+
+    repo_dir = tmp_path / f"models--{REPO.replace('/', '--')}"
+    assert not (repo_dir / "snapshots" / COMMIT / "model.bin").exists()
+    assert not list((repo_dir / "blobs").glob("*.incomplete*"))
+    assert model_cache.find_cached_model(REPO, tmp_path) is None
+
+
+def test_server_without_range_support(tmp_path, hub):
+    hub.ranges = False
+
+    snapshot, progress = download(tmp_path, workers=4)
+
+    assert (snapshot / "model.bin").read_bytes() == hub.files["model.bin"]
+    assert progress[-1]["overall_downloaded"] == progress[-1]["overall_total"]
+
+
+def test_cli_prints_progress_and_complete(tmp_path, hub):
+    env = {
+        "HF_ENDPOINT": os.environ["HF_ENDPOINT"], "HF_HUB_CACHE": str(tmp_path), "PATH": "", "SYSTEMROOT": "",
+    }
+    proc = subprocess.run(
+        [sys.executable, str(WORKER), "--download-model", "--model", REPO],
+        env=env, capture_output=True, text=True, timeout=60,
+    )
+
+    lines = proc.stdout.splitlines()
+    assert proc.returncode == 0, proc.stderr
+    assert lines[0] == f"Downloading model: {REPO}"
+    assert lines[-1] == "DOWNLOAD_COMPLETE"
+    assert all(line.startswith("PROGRESS {") for line in lines[1:-1])
+    assert model_cache.find_cached_model(REPO, tmp_path) is not None
@@ -0,0 +1,148 @@
+"""Tests for the worker's warm model pool."""
+import json
+import time
+
+import pytest
+
+from conftest import MODEL_DEFAULTS, FakeWhisperModel, run_worker
+from metrics import StageTimer
+from model_pool import ModelPool, estimate_model_mb, model_key
+
+class Loader:
+    def __init__(self):
+        self.loaded = []
+
+    def __call__(self, key):
+        self.loaded.append(key)
+        return FakeWhisperModel(texts=[key[0]])
+
+
+def make_pool(**kwargs):
+    loader = Loader()
+    kwargs.setdefault("size_of", lambda key: None)
+    return ModelPool(loader, **kwargs), loader
+
+
+def test_get_reuses_loaded_model_and_times_the_load():
+    pool, loader = make_pool()
+    key = ("tiny", "cpu", "int8")
+    timer = StageTimer()
+
+    first = pool.get(key, timer)
+    assert pool.get(key) is first
+    assert loader.loaded == [key]
+    assert "model_load" in timer.as_dict()
+
+
+def test_lru_eviction_keeps_pinned_model():
+    pool, loader = make_pool(max_models=2)
+    pinned = ("medium", "cpu", "int8")
+    pool.put(pinned, FakeWhisperModel(), pinned=True)
+
+    pool.get(("tiny", "cpu", "int8"))
+    pool.get(("small", "cpu", "int8"))
+
+    assert pinned in pool
+    assert ("tiny", "cpu", "int8") not in pool
+    assert ("small", "cpu", "int8") in pool
+    assert pool.snapshot()["evictions"] == 1
+
+
+def test_single_slot_pool_swaps_the_pinned_model_out():
+    pool, loader = make_pool(max_models=1, idle_ttl_s=10)
+    pinned = ("medium", "cpu", "int8")
+    pool.put(pinned, FakeWhisperModel(), pinned=True)
+
+    pool.get(("tiny", "cpu", "int8"))
+    assert [m["model"] for m in pool.snapshot()["models"]] == ["tiny"]
+
+    # Reloaded pinned: it doesn't expire
+    pool.get(pinned)
+    assert [(m["model"], m["pinned"]) for m in pool.snapshot()["models"]] == [("medium", True)]
+    assert pool.evict_idle(now=time.monotonic() + 11) == []
+    assert loader.loaded == [("tiny", "cpu", "int8"), pinned]
+
+
+def test_memory_budget_evicts_before_loading():
+    sizes = {"tiny": 40, "small": 250, "large-v3-turbo": 800}
+    pool, _ = make_pool(max_models=5, memory_budget_mb=1000, size_of=lambda key: sizes[key[0]])
+
+    pool.get(("tiny", "cpu", "int8"))
+    pool.get(("small", "cpu", "int8"))
+    pool.get(("large-v3-turbo", "cpu", "int8"))
+
+    # tiny (LRU) alone frees too little: 250 + 800 > 1000, so small goes too
+    assert [m["model"] for m in pool.snapshot()["models"]] == ["large-v3-turbo"]
+
+
+def test_idle_models_expire_but_pinned_stay():
+    pool, _ = make_pool(idle_ttl_s=10)
+    pool.put(("medium", "cpu", "int8"), FakeWhisperModel(), pinned=True)
+    pool.get(("tiny", "cpu", "int8"))
+
+    assert pool.evict_idle() == []
+    assert pool.evict_idle(now=time.monotonic() + 11) == [("tiny", "cpu", "int8")]
+    assert len(pool) == 1
+
+
+def test_estimate_scales_model_bin_by_compute_type(tmp_path):
+    (tmp_path / "model.bin").write_bytes(b"\0" * (2 * 1024 * 1024))
+
+    assert estimate_model_mb((str(tmp_path), "cuda", "float16")) == 2.0
+    assert estimate_model_mb((str(tmp_path), "cpu", "int8")) == 1.0
+    assert estimate_model_mb((str(tmp_path / "missing"), "cpu", "int8")) is None
+
+
+def test_device_override_picks_its_default_compute_type():
+    assert model_key({"model": "tiny", "device": "cuda"}) == ("tiny", "cuda", "float16")
+
+
+def test_worker_switches_models_per_request(wav_file):
+    pool, loader = make_pool()
+    default_model = FakeWhisperModel(texts=["default"])
+    requests = [
+        {"v": 1, "id": "1", "op": "transcribe", "path": str(wav_file)},
+        {"v": 1, "id": "2", "op": "transcribe", "path": str(wav_file), "options": {"model": "tiny"}},
+        {"v": 1, "id": "3", "op": "transcribe", "path": str(wav_file), "options": {"model": "tiny"}},
+        {"v": 1, "id": "4", "op": "transcribe", "path": str(wav_file), "options": {"device": "cuda"}},
+    ]
+    out = run_worker(default_model, requests, defaults=MODEL_DEFAULTS, pool=pool)
+
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+    assert results["1"]["text"] == "default"
+    assert results["2"]["text"] == "tiny" and "model_load" in results["2"]["timings"]
+    assert "model_load" not in results["3"]["timings"]
+    assert loader.loaded == [("tiny", "cpu", "int8"), ("medium", "cuda", "float16")]
+    assert pool.snapshot()["loads"] == 2
+
+
+def test_requests_with_other_threads_get_their_own_model(wav_file):
+    pool, loader = make_pool(max_models=3)
+    defaults = {**MODEL_DEFAULTS, "cpu_threads": 4, "num_workers": 1}
+    requests = [
+        {"v": 1, "id": "1", "op": "transcribe", "path": str(wav_file), "options": {"cpu_threads": 4}},
+        {"v": 1, "id": "2", "op": "transcribe", "path": str(wav_file), "options": {"cpu_threads": 0}},
+        {"v": 1, "id": "3", "op": "transcribe", "path": str(wav_file), "options": {"cpu_threads": 2}},
+        {"v": 1, "id": "4", "op": "transcribe", "path": str(wav_file), "options": {"num_workers": 2}},
+    ]
+    run_worker(FakeWhisperModel(texts=["default"]), requests, defaults=defaults, pool=pool)
+
+    # The worker's own settings (explicit or 0) reuse the startup model
+    assert loader.loaded == [("medium", "cpu", "int8", 2, 1), ("medium", "cpu", "int8", 4, 2)]
+
+
+def test_snapshot_shows_per_key_threads():
+    pool, _ = make_pool()
+    pool.put(("medium", "cpu", "int8"), FakeWhisperModel(), pinned=True)
+    pool.get(("medium", "cpu", "int8", 2, 1))
+
+    models = pool.snapshot()["models"]
+    assert [(m["cpu_threads"], m["num_workers"]) for m in models] == [(None, None), (2, 1)]
+
+
+@pytest.mark.parametrize("options", [{"device": "tpu"}, {"model": ""}])
+def test_bad_model_options_are_rejected(options):
+    from worker_protocol import ProtocolError, parse_request
+
+    with pytest.raises(ProtocolError):
+        parse_request(json.dumps({"v": 1, "id": "1", "op": "transcribe", "path": "a.wav", "options": options}))
@@ -0,0 +1,133 @@
+"""Tests for the parallel long-form CPU mode: chunk planning, seam stitching and the process pool."""
+import argparse
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import parallel_transcribe
+from audio_input import SAMPLE_RATE
+from conftest import FakeWhisperModel, write_wav
+from parallel_transcribe import ParallelTranscriber, merge_seam, plan_chunks
+from transcribe import parse_cpu_processes, transcribe_audio
+
+FRAME = SAMPLE_RATE // 10
+
+
+class ToneModel(FakeWhisperModel):
+    """
+    Decodes "tone speech": a word is a run of 100ms frames at amplitude
+    id/100, silence is zero. One segment per word, so transcripts depend on
+    where the audio was cut.
+    """
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append({"audio": None, **kwargs})
+        frames = len(audio) // FRAME
+        ids = np.rint(np.abs(audio[:frames * FRAME]).reshape(frames, FRAME).mean(axis=1) * 100).astype(int)
+        segments = []
+        start = 0
+        for i in range(1, frames + 1):
+            if i == frames or ids[i] != ids[start]:
+                # Single frames are a word cut in half by a frame edge
+                if ids[start] and i - start > 1:
+                    segments.append(SimpleNamespace(
+                        start=start / 10, end=i / 10, text=f" w{ids[start]}",
+                        avg_logprob=-0.2, no_speech_prob=0.01, compression_ratio=1.2,
+                    ))
+                start = i
+        info = SimpleNamespace(language=kwargs.get("language") or "en", language_probability=0.97)
+        return iter(segments), info
+
+
+def tone_model():
+    return ToneModel()
+
+
+def tone_speech(words: int) -> np.ndarray:
+    """Words w1..wN, 0.6s each with 0.4s pauses."""
+    samples = np.zeros(words * SAMPLE_RATE, dtype=np.float32)
+    for i in range(words):
+        samples[i * SAMPLE_RATE:i * SAMPLE_RATE + 6 * FRAME] = (i + 1) / 100
+    return samples
+
+
+def segment(start, text):
+    return {"start": start, "end": start + 0.5, "text": text}
+
+
+def test_chunks_are_cut_in_pauses_and_cover_the_audio():
+    samples = tone_speech(20)
+
+    chunks = plan_chunks(samples, chunk_s=5.0, overlap_s=1.0, search_s=2.0)
+
+    assert chunks[0][0] == 0
+    assert chunks[-1][1] == chunks[-1][2] == len(samples)
+    for (start, cut, end), following in zip(chunks, chunks[1:]):
+        assert following[0] == cut
+        assert end == cut + SAMPLE_RATE
+        # Inside a pause, not a word
+        assert samples[cut] == 0.0 and cut % SAMPLE_RATE >= 6 * FRAME
+
+
+def test_merge_seam_drops_the_next_chunks_segments_and_repeated_words():
+    previous = [segment(0.0, "we decided to"), segment(58.0, "ship it on Friday"), segment(60.5, "Then")]
+    following = [segment(59.8, "on Friday. Then we rested."), segment(62.0, "Done")]
+
+    kept, rest = merge_seam(previous, following, cut_s=60.0)
+
+    assert [s["text"] for s in kept] == ["we decided to", "ship it on Friday"]
+    assert [s["text"] for s in rest] == ["Then we rested.", "Done"]
+    # Nothing in common: both sides stay
+    assert merge_seam([segment(0.0, "alpha")], [segment(1.0, "beta")], 1.0) == (
+        [segment(0.0, "alpha")], [segment(1.0, "beta")]
+    )
+    # A fully repeated segment disappears
+    _, rest = merge_seam([segment(0.0, "one two")], [segment(0.9, "two"), segment(2.0, "x")], 1.0)
+    assert rest == [segment(2.0, "x")]
+
+
+def test_short_audio_is_not_split():
+    parallel = ParallelTranscriber(2, loader=tone_model, min_seconds=60.0)
+
+    assert not parallel.wants(tone_speech(30))
+    assert parallel.wants(tone_speech(60))
+    assert not ParallelTranscriber(1, min_seconds=0).wants(tone_speech(60))
+
+
+@pytest.mark.parametrize("as_wav", [False, True])
+def test_pool_transcript_matches_a_single_decode(tmp_path, as_wav):
+    samples = tone_speech(24)
+    audio = samples
+    if as_wav:
+        audio = write_wav(tmp_path / "long.wav", (samples * 32767).astype("<i2").tobytes())
+    single = transcribe_audio(samples, ToneModel())
+    parallel = ParallelTranscriber(2, loader=tone_model, min_seconds=0, chunk_s=5.0)
+    seen = []
+    try:
+        result = transcribe_audio(audio, ToneModel(), on_segment=seen.append, parallel=parallel)
+    finally:
+        parallel.close()
+
+    assert result["text"] == single["text"] == " ".join(f"w{i}" for i in range(1, 25))
+    assert result["segments"] == seen
+    assert [s["start"] for s in seen] == pytest.approx([s["start"] for s in single["segments"]], abs=0.11)
+    assert result["parallel"]["processes"] == 2
+    assert result["parallel"]["chunks"] == len(result["parallel"]["chunk_ms"]) >= 4
+    assert result["language"] == "en"
+    assert "parallel_decode" in result["timings"]
+
+
+def test_default_processes_leave_half_the_cores(monkeypatch):
+    monkeypatch.setattr("cpu_config.physical_cores", lambda: 16)
+    assert parallel_transcribe.default_processes() == parallel_transcribe.MAX_AUTO_PROCESSES
+    monkeypatch.setattr("cpu_config.physical_cores", lambda: 3)
+    assert parallel_transcribe.default_processes() == 1
+
+
+def test_cpu_processes_flag_is_opt_in():
+    assert parse_cpu_processes("auto") == parse_cpu_processes("0") == 0
+    assert parse_cpu_processes("3") == 3
+    for value in ("-1", "many"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_cpu_processes(value)
@@ -0,0 +1,85 @@
+"""Tests for the compiled transcript post-processing pipeline."""
+import json
+
+import pytest
+
+from conftest import DEFAULTS, FakeWhisperModel, run_worker
+from postprocess import TextPipeline, join_segments, load_rules, pipeline_for, validate_rules
+
+OPTIONS = {**DEFAULTS, "language_mode": "ua"}
+
+
+def test_letters_are_mapped_only_in_ukrainian_modes():
+    assert pipeline_for("ua")("Объём эха") == "Об'ем еха"
+    assert pipeline_for("bilingual")("ЁЖИК") == "ЕЖИК"
+    assert pipeline_for("auto")("Объём") == "Объём"
+    assert pipeline_for("ua", {"letters": False})("ы") == "ы"
+
+
+def test_whitespace_and_punctuation_are_normalized_in_one_pass():
+    pipeline = pipeline_for("auto")
+
+    assert pipeline("  Hello ,  world\t!  How   are you ?") == "Hello, world! How are you?"
+    # Line breaks the model produced stay
+    assert pipeline("line one\nline two") == "line one\nline two"
+    assert pipeline_for("auto", {"whitespace": False, "punctuation": False})(" a  , b ") == " a  , b "
+
+
+def test_replacements_match_whole_words_longest_first():
+    pipeline = TextPipeline("auto", {"replacements": {"open ai": "OpenAI", "open ai studio": "AI Studio", "ai": "AI"}})
+
+    assert pipeline("open ai studio and open ai, said ai") == "AI Studio and OpenAI, said AI"
+    # Case-insensitive matching on request
+    assert TextPipeline("auto", {"replacements": {"voice paste": "VoicePaste"}, "ignore_case": True})(
+        "Voice Paste works"
+    ) == "VoicePaste works"
+
+
+def test_replacements_see_mapped_letters():
+    pipeline = TextPipeline("ua", {"replacements": {"Объём": "обсяг"}})
+
+    assert pipeline("Объём файлу") == "обсяг файлу"
+
+
+def test_pipelines_are_compiled_once_per_mode_and_rules():
+    rules = {"replacements": {"a": "b"}}
+
+    assert pipeline_for("ua", rules) is pipeline_for("ua", {"replacements": {"a": "b"}})
+    assert pipeline_for("ua", rules) is not pipeline_for("en", rules)
+
+
+@pytest.mark.parametrize("rules, fragment", [
+    ({"colour": True}, "Unknown"),
+    ({"whitespace": "yes"}, "true or false"),
+    ({"replacements": {"": "x"}}, "replacements"),
+    ([], "object"),
+])
+def test_invalid_rules_are_rejected(rules, fragment):
+    with pytest.raises(ValueError, match=fragment):
+        validate_rules(rules)
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"replacements": {"kyiv": "Kyiv"}}), encoding="utf-8")
+
+    assert load_rules(path)["replacements"] == {"kyiv": "Kyiv"}
+    with pytest.raises(ValueError, match="Cannot read"):
+        load_rules(tmp_path / "missing.json")
+
+
+def test_join_segments_skips_empty_ones():
+    assert join_segments(["Hello,", "", "world."]) == "Hello, world."
+
+
+def test_segments_stream_out_post_processed_and_the_text_is_their_join(wav_file):
+    model = FakeWhisperModel(texts=[" Объём  ", "", "хэш ,  ok"])
+    defaults = {**OPTIONS, "postprocess_rules": {"replacements": {"ok": "OK"}}}
+    request = {"v": 1, "id": "1", "op": "transcribe", "path": str(wav_file), "options": {"segments": True}}
+
+    out = run_worker(model, [request], defaults=defaults)
+
+    segments = [m["text"] for m in out if m["type"] == "segment"]
+    result = next(m for m in out if m["type"] == "result")
+    assert segments == ["Об'ем", "", "хеш, OK"]
+    assert result["text"] == "Об'ем хеш, OK"
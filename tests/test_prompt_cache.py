@@ -0,0 +1,120 @@
+"""Tests for the prompt token cache and the previous-dictation context."""
+import gc
+
+import numpy as np
+
+import transcribe
+from conftest import DEFAULTS, FakeTokenizer, FakeWhisperModel, run_worker, write_wav
+from prompt_cache import MAX_PROMPT_TOKENS, DictationContext, PromptCache, build_prompt
+
+OPTIONS = {**DEFAULTS, "language_mode": "en", "initial_prompt": "Glossary: Kyiv"}
+
+
+def test_prompt_is_encoded_once_per_tokenizer():
+    cache = PromptCache()
+    tokenizer, other = FakeTokenizer([]), FakeTokenizer([])
+
+    first, hit = cache.encode(tokenizer, "Kyiv Lviv")
+    assert not hit and len(first) == 2
+    assert cache.encode(tokenizer, "Kyiv Lviv") == (first, True)
+    assert tokenizer.encode_calls == 1
+    # Another tokenizer may split the same text differently
+    assert cache.encode(other, "Kyiv Lviv")[1] is False
+    assert cache.snapshot() == {**cache.snapshot(), "entries": 2, "hits": 1, "misses": 2}
+
+
+def test_entries_go_away_with_their_tokenizer():
+    cache = PromptCache(max_entries=2)
+    tokenizer = FakeTokenizer([])
+    for text in ("one", "two", "three"):
+        cache.encode(tokenizer, text)
+    assert cache.snapshot()["entries"] == 2
+
+    del tokenizer
+    gc.collect()
+
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_context_is_encoded_without_the_cache():
+    cache = PromptCache()
+    tokenizer = FakeTokenizer([])
+
+    for context in ("first dictation", "second dictation"):
+        prompt = build_prompt(tokenizer, "Glossary: Kyiv", context, 10, cache)
+        assert prompt["cached"] is False
+
+    assert cache.snapshot() == {**cache.snapshot(), "entries": 1, "hits": 1, "misses": 1}
+
+
+def test_context_fills_the_token_budget_after_the_fixed_prompt():
+    cache = PromptCache()
+    tokenizer = FakeTokenizer([])
+
+    prompt = build_prompt(tokenizer, "Glossary: Kyiv", "one two three four five", 3, cache)
+
+    assert prompt["base_tokens"] == 2 and prompt["context_tokens"] == 3
+    assert prompt["text"] == "Glossary: Kyiv three four five"
+    assert len(prompt["tokens"]) == 5
+    # The fixed prompt is never pushed out of faster-whisper's prompt window
+    long_context = " ".join(f"w{i}" for i in range(400))
+    prompt = build_prompt(tokenizer, "Glossary: Kyiv", long_context, 1000, cache)
+    assert len(prompt["tokens"]) == MAX_PROMPT_TOKENS
+    assert prompt["tokens"][:2] == cache.encode(tokenizer, "Glossary: Kyiv")[0]
+    assert build_prompt(tokenizer, None, "", 50, cache) is None
+    assert build_prompt(tokenizer, None, "earlier text", 0, cache) is None
+
+
+def test_dictation_context_is_bounded_and_per_language_mode():
+    context = DictationContext(max_chars=20)
+    for text in ("first dictation", "second one", "third"):
+        context.add("en", text)
+    context.add("ua", "привіт")
+    context.add("en", "  ")
+
+    assert context.text("en") == "second one third"
+    assert context.text("ua") == "привіт"
+    assert context.text("bilingual") == ""
+    # Older dictations are dropped once the newer ones cover max_chars
+    context.add("en", "a much longer fourth dictation")
+    assert len(context._texts["en"]) == 1
+
+
+def test_cached_prompt_tokens_reach_the_model():
+    model = FakeWhisperModel()
+    audio = np.zeros(16000, dtype=np.float32)
+
+    first = transcribe.transcribe_audio(audio, model, language_mode="bilingual", custom_initial_prompt="Kyiv")
+    second = transcribe.transcribe_audio(audio, model, language_mode="bilingual", custom_initial_prompt="Kyiv")
+
+    tokens = model.calls[0]["initial_prompt"]
+    assert isinstance(tokens, list) and model.calls[1]["initial_prompt"] == tokens
+    assert first["prompt"] == {"tokens": len(tokens), "base_tokens": len(tokens), "context_tokens": 0, "cached": False}
+    assert second["prompt"]["cached"] is True
+    assert model.hf_tokenizer.encode_calls == 1
+    assert "prompt_encode" in first["timings"]
+    assert transcribe.transcribe_audio(audio, model, language_mode="en")["prompt"] is None
+
+
+def test_worker_carries_previous_dictations_into_the_prompt(tmp_path):
+    wav = write_wav(tmp_path / "rec.wav", b"\0\0" * 16000)
+    requests = [
+        {"id": "1", "op": "transcribe", "path": str(wav)},
+        {"id": "2", "op": "transcribe", "path": str(wav)},
+        {"id": "3", "op": "transcribe", "path": str(wav), "options": {"context": False}},
+        {"id": "m", "op": "metrics"},
+    ]
+    model = FakeWhisperModel(texts=("Hello", "Mykola"))
+
+    out = run_worker(model, requests, defaults={**OPTIONS, "context_tokens": 4})
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+    tokenizer = model.hf_tokenizer
+
+    assert tokenizer.decode(model.calls[0]["initial_prompt"]) == " Glossary: Kyiv"
+    # The first dictation's words follow the fixed prompt
+    assert tokenizer.decode(model.calls[1]["initial_prompt"]) == " Glossary: Kyiv Hello Mykola"
+    assert results["2"]["prompt"] == {"tokens": 4, "base_tokens": 2, "context_tokens": 2, "cached": False}
+    assert tokenizer.decode(model.calls[2]["initial_prompt"]) == " Glossary: Kyiv"
+    assert results["3"]["prompt"]["cached"] is True
+    metrics = next(m for m in out if m["type"] == "metrics")
+    assert metrics["prompt_cache"]["hits"] >= 1
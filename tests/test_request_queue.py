@@ -0,0 +1,216 @@
+"""Tests for the worker's request queue, cancellation and batched decoding."""
+import base64
+import io
+import json
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from conftest import DEFAULTS, FakeWhisperModel
+from request_queue import QueuedRequest, RequestQueue
+import batching
+import transcribe
+
+
+class BlockingModel(FakeWhisperModel):
+    """Fake model whose first transcription waits for `release` before decoding."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def transcribe(self, audio, **kwargs):
+        segments, info = super().transcribe(audio, **kwargs)
+        if self.started.is_set():
+            return segments, info
+        self.started.set()
+
+        def blocked():
+            assert self.release.wait(5)
+            yield from segments
+
+        return blocked(), info
+
+
+class ScriptedStdin:
+    """stdin that yields request lines, optionally waiting on an event first."""
+
+    def __init__(self, *steps):
+        self.steps = steps
+
+    def __iter__(self):
+        for step in self.steps:
+            if isinstance(step, threading.Event):
+                assert step.wait(5)
+            elif callable(step):
+                step()
+            else:
+                yield (json.dumps(step) + "\n").encode("utf-8")
+
+
+def run(worker, *steps) -> list:
+    worker.serve(ScriptedStdin(*steps))
+    return [json.loads(line) for line in worker.writer._stream.getvalue().splitlines()[1:]]
+
+
+def request(request_id, path, **options):
+    return {"v": 1, "id": request_id, "op": "transcribe", "path": str(path), "options": options}
+
+
+def queued(request_id, seconds, priority=0):
+    return QueuedRequest({"id": request_id, "audio": b"\0\0" * int(seconds * 16000), "options": {"priority": priority}})
+
+
+def test_queue_orders_by_priority_then_length_then_arrival():
+    queue = RequestQueue()
+    for item in (queued("long", 60), queued("short", 2), queued("short2", 2), queued("urgent", 90, priority=1)):
+        queue.put(item)
+    queue.close()
+
+    order = []
+    while (batch := queue.pop_batch()) is not None:
+        order += [item.id for item in batch]
+    assert order == ["urgent", "short", "short2", "long"]
+
+
+def test_pop_batch_takes_compatible_requests_only():
+    queue = RequestQueue()
+    for item in (queued("a", 1), queued("b", 2), queued("c", 40), queued("d", 3)):
+        queue.put(item)
+
+    batch = queue.pop_batch(3, lambda first, other: other.seconds <= 30)
+
+    assert [item.id for item in batch] == ["a", "b", "d"]
+    assert len(queue) == 1
+
+
+def test_ping_is_answered_while_a_request_is_decoding(wav_file):
+    model = BlockingModel()
+    worker = transcribe.Worker(model, DEFAULTS, io.StringIO())
+
+    out = run(worker, request("1", wav_file), model.started, {"v": 1, "id": "p", "op": "ping"}, model.release.set)
+
+    assert [m["type"] for m in out] == ["pong", "result", "end"]
+
+
+def test_ping_is_answered_while_a_stream_finishes():
+    model = BlockingModel()
+    worker = transcribe.Worker(model, DEFAULTS, io.StringIO())
+    audio = base64.b64encode(b"\0\0" * 16000).decode("ascii")
+
+    out = run(
+        worker,
+        {"v": 1, "id": "s", "op": "stream_start"},
+        {"v": 1, "id": "s", "op": "stream_audio", "audio": audio},
+        {"v": 1, "id": "s", "op": "stream_stop"},
+        model.started,
+        {"v": 1, "id": "p", "op": "ping"},
+        model.release.set,
+    )
+
+    assert [(m["id"], m["type"]) for m in out] == [("p", "pong"), ("s", "result"), ("s", "end")]
+    assert out[1]["status"] == "ok"
+
+
+def test_cancel_queued_and_running_requests(wav_file):
+    model = BlockingModel()
+    worker = transcribe.Worker(model, DEFAULTS, io.StringIO())
+
+    out = run(
+        worker,
+        request("running", wav_file),
+        model.started,
+        request("queued", wav_file),
+        {"v": 1, "id": "queued", "op": "cancel"},
+        {"v": 1, "id": "running", "op": "cancel"},
+        model.release.set,
+    )
+
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+    assert results["queued"]["status"] == "cancelled"
+    assert results["running"]["status"] == "cancelled"
+    assert sum(m["type"] == "end" for m in out) == 2
+    # The queued request never reached the model
+    assert len(model.calls) == 1
+
+
+def test_short_recent_request_overtakes_a_long_one(wav_file, tmp_path):
+    from conftest import write_wav
+
+    long_wav = write_wav(tmp_path / "long.wav", b"\0\0" * 16000 * 20)
+    model = BlockingModel()
+    worker = transcribe.Worker(model, DEFAULTS, io.StringIO())
+
+    out = run(
+        worker,
+        request("first", wav_file),
+        model.started,
+        request("long", long_wav),
+        request("short", wav_file),
+        model.release.set,
+    )
+
+    assert [m["id"] for m in out if m["type"] == "result"] == ["first", "short", "long"]
+
+
+def test_compatible_requests_are_decoded_in_one_batch(wav_file):
+    model = BlockingModel(texts=["solo"])
+    batches = []
+
+    def fake_batch_decoder(model, audios, plan, beam_size, batch_size):
+        batches.append((len(audios), plan["language"], beam_size, batch_size))
+        return [[SimpleNamespace(text=f" clip {i} ", start=0.0, end=1.0, avg_logprob=-0.1,
+                                 no_speech_prob=0.0, compression_ratio=1.0)] for i in range(len(audios))]
+
+    worker = transcribe.Worker(model, DEFAULTS, io.StringIO(), batch_size=8, batch_decoder=fake_batch_decoder)
+    out = run(
+        worker,
+        request("1", wav_file),
+        model.started,
+        request("2", wav_file),
+        request("3", wav_file),
+        request("4", wav_file, beam_size=2),
+        request("5", wav_file, vad=True),
+        model.release.set,
+    )
+
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+    assert results["1"]["text"] == "solo"
+    assert batches == [(2, "en", 5, 8)]
+    assert results["2"]["text"] == "clip 0" and results["3"]["text"] == "clip 1"
+    assert results["2"]["batch_size"] == 2 and "batch_decode" in results["2"]["timings"]
+    # Different beam size: planned with the batch, decoded on its own; VAD never batches
+    assert results["4"]["text"] == "solo" and "batch_size" not in results["4"]
+    assert results["5"]["status"] == "ok"
+
+
+def test_decode_batch_maps_segments_back_to_their_clips(monkeypatch):
+    seen = {}
+
+    class FakePipeline:
+        def __init__(self, model):
+            pass
+
+        def transcribe(self, audio, clip_timestamps, **kwargs):
+            seen.update(kwargs, samples=len(audio), clips=clip_timestamps)
+            segments = [
+                SimpleNamespace(text=f"clip{i}", start=clip["start"], end=clip["end"],
+                                avg_logprob=-0.1, no_speech_prob=0.0, compression_ratio=1.0)
+                for i, clip in enumerate(clip_timestamps)
+            ]
+            return iter(segments), None
+
+    import faster_whisper
+
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", FakePipeline)
+    audios = [np.zeros(16000, np.float32), np.zeros(8000, np.float32), np.zeros(32000, np.float32)]
+    plan = {"language": "uk", "initial_prompt": None, "suppress_tokens": [1, 2]}
+
+    per_clip = batching.decode_batch(None, audios, plan, beam_size=5, batch_size=4)
+
+    assert seen["samples"] == 56000 and seen["language"] == "uk" and seen["batch_size"] == 4
+    assert seen["clips"] == [{"start": 0.0, "end": 1.0}, {"start": 1.0, "end": 1.5}, {"start": 1.5, "end": 3.5}]
+    assert [[s.text for s in clip] for clip in per_clip] == [["clip0"], ["clip1"], ["clip2"]]
+    assert [(s.start, s.end) for clip in per_clip for s in clip] == [(0.0, 1.0), (0.0, 0.5), (0.0, 2.0)]
@@ -0,0 +1,169 @@
+"""Tests for the worker's result cache (repeated audio without a decode)."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+import transcribe
+from conftest import MODEL_DEFAULTS, FakeWhisperModel, run_worker, write_wav
+from result_cache import ResultCache, cache_key, pcm_digest
+
+WORKER = Path(__file__).parent.parent / "src" / "transcribe" / "transcribe.py"
+PCM = bytes(range(256)) * 125
+
+
+def request(request_id, path, **options):
+    return {"v": 1, "id": request_id, "op": "transcribe", "path": str(path), "options": options}
+
+
+def test_wav_and_frame_with_the_same_samples_hash_alike(tmp_path):
+    wav = write_wav(tmp_path / "a.wav", PCM)
+    write_wav(tmp_path / "b.wav", PCM[:-2] + b"\1\0")
+
+    assert pcm_digest(wav) == pcm_digest(PCM) == pcm_digest(bytearray(PCM))
+    assert pcm_digest(tmp_path / "b.wav") != pcm_digest(wav)
+
+
+def test_key_covers_model_and_decode_options():
+    digest = pcm_digest(PCM)
+    key = cache_key(digest, ("medium", "cpu", "int8"), MODEL_DEFAULTS)
+
+    # Missing options mean their defaults; threads don't change the transcript
+    assert cache_key(digest, ("medium", "cpu", "int8", 2, 1), {"beam_size": 5}) == key
+    assert cache_key(digest, ("medium", "cpu", "int8"), {**MODEL_DEFAULTS, "beam_size": 1}) != key
+    assert cache_key(digest, ("medium", "cpu", "int8"), {**MODEL_DEFAULTS, "initial_prompt": "Kyiv"}) != key
+    assert cache_key(digest, ("small", "cpu", "int8"), MODEL_DEFAULTS) != key
+    # fast_path without a draft model decodes the same way
+    assert cache_key(digest, ("medium", "cpu", "int8"), {**MODEL_DEFAULTS, "fast_path": True}) == key
+    fast_path = {**MODEL_DEFAULTS, "fast_path": True, "fast_path_model": "base"}
+    assert cache_key(digest, ("medium", "cpu", "int8"), fast_path) != key
+    # Dictation context changes the prompt; a request opting out decodes without it
+    assert cache_key(digest, ("medium", "cpu", "int8"), {**MODEL_DEFAULTS, "context_tokens": 64}) != key
+    opted_out = {**MODEL_DEFAULTS, "context_tokens": 64, "context": False}
+    assert cache_key(digest, ("medium", "cpu", "int8"), opted_out) == key
+    # ...and so does its text: the same audio after other dictations is another entry
+    with_context = {**MODEL_DEFAULTS, "context_tokens": 64}
+    first = cache_key(digest, ("medium", "cpu", "int8"), with_context, "Hello world")
+    assert cache_key(digest, ("medium", "cpu", "int8"), with_context, "Goodbye") != first
+    assert cache_key(digest, ("medium", "cpu", "int8"), with_context, "Hello world") == first
+
+
+def test_repeated_audio_is_answered_from_the_cache(tmp_path):
+    wav = write_wav(tmp_path / "rec.wav", PCM)
+    model = FakeWhisperModel()
+    cache = ResultCache()
+
+    out = run_worker(model, [
+        request("1", wav),
+        request("2", wav, segments=True),
+        {"v": 1, "id": "3", "op": "transcribe", "bytes": len(PCM), "options": {}},
+        request("4", wav, beam_size=1),
+        request("5", wav, cache=False),
+    ], payloads={"3": PCM}, defaults=MODEL_DEFAULTS, result_cache=cache)
+
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+    assert len(model.calls) == 3  # 1, 4 (other beam size) and 5 (opted out)
+    assert [results[i]["cached"] for i in "12345"] == [False, True, True, False, False]
+    assert results["2"]["text"] == results["1"]["text"] == "Hello world"
+    assert results["2"]["timings"]["transcribe_ms"] == 0 and "cache_lookup" in results["2"]["timings"]
+    # Cached segments are replayed for clients that stream them
+    assert [m["text"] for m in out if m["type"] == "segment" and m["id"] == "2"] == ["Hello", "world"]
+    assert cache.snapshot()["hits"] == 2
+
+
+def test_other_dictation_context_misses_the_cache(tmp_path):
+    wav = write_wav(tmp_path / "rec.wav", PCM)
+    model = FakeWhisperModel()
+    results = run_worker(
+        model, [request(i, wav) for i in "12"], defaults={**MODEL_DEFAULTS, "context_tokens": 16},
+        result_cache=ResultCache(),
+    )
+
+    # The second request's prompt carries the first one's transcript
+    assert [m["cached"] for m in results if m["type"] == "result"] == [False, False]
+    assert len(model.calls) == 2
+    assert model.calls[0]["initial_prompt"] != model.calls[1]["initial_prompt"]
+
+
+def test_no_cache_means_no_cached_field(fake_model, wav_file):
+    out = run_worker(fake_model, [request("1", wav_file)], defaults=MODEL_DEFAULTS)
+
+    assert "cached" not in out[0]
+
+
+def test_lru_drops_the_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, {"text": key})
+    cache.get("a")
+    cache.put("c", {"text": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a")["text"] == "a"
+    assert cache.snapshot() == {"entries": 2, "hits": 2, "disk_hits": 0, "misses": 1, "disk": False}
+
+
+def test_disk_cache_survives_restart_and_is_pruned(tmp_path):
+    first = ResultCache(cache_dir=tmp_path, max_disk_entries=2)
+    first.put("a", {"text": "a", "segments": [], "timings": {"decode": 5}})
+    os.utime(tmp_path / "a.json", (0, 0))
+    first.put("b", {"text": "b"})
+    first.put("c", {"text": "c"})
+
+    second = ResultCache(cache_dir=tmp_path)
+    assert second.get("a") is None
+    assert second.get("c") == {"text": "c"}
+    assert second.snapshot()["disk_hits"] == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.json", "c.json"]
+
+
+def test_one_off_run_on_cached_audio_skips_the_model(tmp_path, cache_dir):
+    wav = write_wav(tmp_path / "rec.wav", PCM)
+    args = SimpleNamespace(
+        input=wav, model="not-a-real-model", language_mode="auto", beam_size=5, initial_prompt="", vad=False,
+        trim_silence=False, postprocess_rules=None, vocabulary=None, adaptive_beam=False,
+    )
+    ResultCache(cache_dir=cache_dir / "results").put(
+        transcribe.one_off_cache_key(args, "cpu", "int8"), {"text": "from the cache", "segments": []}
+    )
+
+    proc = subprocess.run(
+        [sys.executable, str(WORKER), "--device", "cpu", "--model", "not-a-real-model", "--input", str(wav),
+         "--result-cache-disk"],
+        capture_output=True, text=True, timeout=60, env={**os.environ, "HF_HUB_OFFLINE": "1"},
+    )
+
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == "from the cache"
+    assert "[Cache] Hit" in proc.stderr
+
+
+def test_one_off_result_is_stored_under_the_requested_device(tmp_path, cache_dir, monkeypatch, capfd):
+    wav = write_wav(tmp_path / "rec.wav", PCM)
+    loads = []
+
+    def load_settings_model(model_name, device, settings):
+        loads.append(device)
+        if device == "cuda":
+            raise RuntimeError("no CUDA here")
+        return FakeWhisperModel()
+
+    monkeypatch.setattr(transcribe, "load_settings_model", load_settings_model)
+    argv = ["transcribe.py", "--device", "cuda", "--model", "not-a-real-model", "--input", str(wav)]
+
+    # Without the disk cache the audio isn't hashed
+    monkeypatch.setattr(sys, "argv", argv)
+    with monkeypatch.context() as m:
+        m.setattr(transcribe, "pcm_digest", lambda path: pytest.fail("hashed without the disk cache"))
+        assert transcribe.main() == 0
+    # After the CUDA -> CPU fallback, the result goes under the key the next (CUDA) run looks up
+    monkeypatch.setattr(sys, "argv", [*argv, "--result-cache-disk"])
+    assert transcribe.main() == 0
+    assert loads == ["cuda", "cpu", "cuda", "cpu"]
+    capfd.readouterr()
+    assert transcribe.main() == 0
+    assert loads == ["cuda", "cpu", "cuda", "cpu"]
+    assert "[Cache] Hit" in capfd.readouterr().err
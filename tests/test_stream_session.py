@@ -0,0 +1,141 @@
+"""Tests for incremental transcription of an in-progress recording."""
+import base64
+import time
+
+import numpy as np
+import pytest
+
+from conftest import DEFAULTS, FakeWhisperModel, run_worker
+from streaming import SAMPLE_RATE, StreamingSession
+
+WORD_SECONDS = 1.5
+
+
+def make_dictation(words: int, pause_after: int = 10, pause_seconds: float = 5.0) -> bytes:
+    """Each 'word' is a run of one constant sample value; a silent pause sits in the middle."""
+    blocks = []
+    for k in range(1, words + 1):
+        blocks.append(np.full(int(WORD_SECONDS * SAMPLE_RATE), k * 100, dtype="<i2"))
+        if k == pause_after:
+            blocks.append(np.zeros(int(pause_seconds * SAMPLE_RATE), dtype="<i2"))
+    return np.concatenate(blocks).tobytes()
+
+
+def fake_decode(audio: np.ndarray, language):
+    """'Recognizes' each constant run as one segment; a run cut by the window end comes out garbled."""
+    values = np.round(audio * 32768).astype(np.int32)
+    edges = np.flatnonzero(np.diff(values)) + 1
+    starts = np.concatenate(([0], edges))
+    ends = np.concatenate((edges, [len(values)]))
+    segments = []
+    for start, end in zip(starts, ends):
+        value = values[start]
+        if value == 0:
+            continue
+        cut = end == len(values) and end - start < int(WORD_SECONDS * SAMPLE_RATE)
+        text = f"w{value // 100}" + ("-" if cut else "")
+        segments.append({"start": start / SAMPLE_RATE, "end": end / SAMPLE_RATE, "text": text})
+    return {"segments": segments, "language": "en"}
+
+
+def feed_in_real_time(session: StreamingSession, pcm: bytes, chunk_seconds: float = 0.5) -> None:
+    """Feed chunks, letting the background thread catch up as a live recording would."""
+    chunk = int(chunk_seconds * SAMPLE_RATE) * 2
+    for offset in range(0, len(pcm), chunk):
+        session.feed(pcm[offset:offset + chunk])
+        deadline = time.monotonic() + 5
+        while len(session._pcm) // 2 - session._decoded_until >= session._step and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+
+def test_streamed_text_matches_whole_recording():
+    pcm = make_dictation(40)
+    session = StreamingSession(fake_decode, window_s=12.0, step_s=2.0, overlap_s=1.0)
+
+    feed_in_real_time(session, pcm)
+    result = session.finish()
+
+    assert result["text"] == " ".join(f"w{k}" for k in range(1, 41))
+    assert result["language"] == "en"
+    starts = [s["start"] for s in result["segments"]]
+    assert starts == sorted(starts)
+
+
+def test_stop_only_decodes_the_tail():
+    pcm = make_dictation(60)  # 95 s of audio
+    session = StreamingSession(fake_decode, window_s=12.0, step_s=2.0, overlap_s=1.0)
+
+    feed_in_real_time(session, pcm)
+    result = session.finish()
+
+    assert result["windows_decoded"] > 10
+    # Tail is bounded by step + overlap + one unfinished word, not by the recording length
+    assert result["tail_seconds"] <= 2.0 + 1.0 + 2 * WORD_SECONDS
+
+
+def test_unstable_tail_is_not_committed_early():
+    session = StreamingSession(fake_decode, window_s=30.0, step_s=1.0, overlap_s=1.0)
+    # Word 1 complete, word 2 still being spoken when the first pass runs
+    session.feed(make_dictation(2)[: int(2.0 * SAMPLE_RATE) * 2])
+    deadline = time.monotonic() + 5
+    while session.windows_decoded == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert session._committed == []
+    session.feed(make_dictation(2)[int(2.0 * SAMPLE_RATE) * 2:])
+    assert session.finish()["text"] == "w1 w2"
+
+
+def test_background_error_surfaces_on_finish():
+    def failing_decode(audio, language):
+        raise RuntimeError("decoder crashed")
+
+    session = StreamingSession(failing_decode, step_s=0.5)
+    session.feed(make_dictation(1))
+    session._thread.join(timeout=5)
+
+    with pytest.raises(RuntimeError, match="decoder crashed"):
+        session.finish()
+
+
+def test_streamed_result_matches_the_batch_result():
+    pcm = make_dictation(1)
+    model = FakeWhisperModel(texts=[" Объём  ", "", "хэш ,  ok"])
+    requests = [
+        {"id": "b", "op": "transcribe", "bytes": len(pcm)},
+        {"id": "s", "op": "stream_start"},
+        {"id": "s", "op": "stream_audio", "audio": base64.b64encode(pcm).decode("ascii")},
+        {"id": "s", "op": "stream_stop"},
+    ]
+    defaults = {**DEFAULTS, "language_mode": "ua", "postprocess_rules": {"replacements": {"ok": "OK"}}}
+
+    out = run_worker(model, requests, payloads={"b": pcm}, defaults=defaults)
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+
+    assert results["b"]["text"] == "Об'ем хеш, OK"
+    assert results["s"]["text"] == results["b"]["text"]
+
+
+def test_stream_ops_over_worker_protocol(fake_model):
+    pcm = make_dictation(1)
+    requests = [
+        {"id": "s1", "op": "stream_start", "options": {"language_mode": "en"}},
+        {"id": "s1", "op": "stream_audio", "audio": base64.b64encode(pcm).decode("ascii")},
+        {"id": "s1", "op": "stream_stop"},
+        {"id": "s2", "op": "stream_start"},
+        {"id": "s2", "op": "stream_cancel"},
+        {"id": "s3", "op": "stream_stop"},
+    ]
+    lines = run_worker(fake_model, requests)
+    # The stop is answered from the dispatcher, so it may come after the later streams' replies
+    out = {request_id: [m for m in lines if m["id"] == request_id] for request_id in ("s1", "s2", "s3")}
+
+    assert out["s1"][0]["status"] == "ok"
+    assert out["s1"][0]["text"] == "Hello world"
+    assert set(out["s1"][0]["timings"]) == {"background_ms", "tail_ms", "stop_to_result_ms"}
+    assert out["s1"][1] == {"v": 1, "id": "s1", "type": "end"}
+    assert out["s2"] == [{"v": 1, "id": "s2", "type": "end"}]
+    assert "No open stream" in out["s3"][0]["error"]
+    assert out["s3"][1]["type"] == "end"
+    assert isinstance(fake_model.calls[0]["audio"], np.ndarray)
+    assert fake_model.calls[0]["language"] == "en"
@@ -0,0 +1,87 @@
+"""Tests for the Russian suppress-token cache."""
+import gc
+import json
+
+import pytest
+
+import transcribe
+from conftest import FakeTokenizer
+
+
+@pytest.fixture(autouse=True)
+def clear_memo():
+    transcribe._suppress_tokens_memo.clear()
+    yield
+    transcribe._suppress_tokens_memo.clear()
+
+
+def test_scan_selects_tokens_with_russian_only_letters(cache_dir):
+    tokenizer = FakeTokenizer(["a", "ы", "ї", "Ёж", "і"])
+
+    assert transcribe.get_russian_suppress_tokens(tokenizer) == [1, 3]
+
+
+def test_warm_call_does_not_touch_tokenizer_or_disk(cache_dir):
+    tokenizer = FakeTokenizer(["a", "ы", "b"])
+    first = transcribe.get_russian_suppress_tokens(tokenizer)
+    decode_calls = tokenizer.decode_calls
+
+    for cache_file in cache_dir.rglob("*.json"):
+        cache_file.unlink()
+    second = transcribe.get_russian_suppress_tokens(tokenizer)
+
+    assert second == first
+    assert tokenizer.decode_calls == decode_calls
+
+
+def test_cold_start_reads_disk_cache_without_scanning(cache_dir):
+    vocab = ["a", "ы", "b", "э"]
+    expected = transcribe.get_russian_suppress_tokens(FakeTokenizer(vocab))
+    transcribe._suppress_tokens_memo.clear()
+
+    fresh = FakeTokenizer(vocab)
+    assert transcribe.get_russian_suppress_tokens(fresh) == expected
+    assert fresh.decode_calls == 0
+
+
+def test_cache_is_keyed_by_tokenizer_fingerprint(cache_dir):
+    transcribe.get_russian_suppress_tokens(FakeTokenizer(["a", "ы"]))
+    transcribe.get_russian_suppress_tokens(FakeTokenizer(["ы", "a", "b"]))
+
+    files = list((cache_dir / "suppress_tokens").glob("*.json"))
+    assert len(files) == 2
+
+
+def test_corrupt_or_stale_cache_is_rebuilt(cache_dir):
+    tokenizer = FakeTokenizer(["a", "ы"])
+    path = cache_dir / "suppress_tokens" / f"{transcribe.tokenizer_fingerprint(tokenizer)}.json"
+    path.parent.mkdir(parents=True)
+    path.write_text(json.dumps({"version": -1, "tokens": [0]}), encoding="utf-8")
+
+    assert transcribe.get_russian_suppress_tokens(tokenizer) == [1]
+    assert json.loads(path.read_text(encoding="utf-8"))["tokens"] == [1]
+
+
+def test_bilingual_guard_builds_suppress_list_once(cache_dir, wav_file, fake_model, monkeypatch):
+    fake_model.language = "ru"
+    scans = []
+    real_scan = transcribe._scan_russian_suppress_tokens
+    monkeypatch.setattr(
+        transcribe, "_scan_russian_suppress_tokens", lambda tok: scans.append(tok) or real_scan(tok)
+    )
+
+    for _ in range(3):
+        transcribe.transcribe_audio(wav_file, fake_model, language_mode="bilingual")
+
+    assert len(scans) == 1
+
+
+def test_memo_does_not_keep_tokenizers_alive(cache_dir):
+    tokenizer = FakeTokenizer(["a", "ы"])
+    transcribe.get_russian_suppress_tokens(tokenizer)
+    assert len(transcribe._suppress_tokens_memo) == 1
+
+    del tokenizer
+    gc.collect()
+
+    assert len(transcribe._suppress_tokens_memo) == 0
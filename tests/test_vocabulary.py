@@ -0,0 +1,125 @@
+"""Tests for the compiled vocabulary: corrections, hotwords and their use in requests."""
+import json
+import time
+
+import numpy as np
+import pytest
+
+import transcribe
+from conftest import DEFAULTS, FakeWhisperModel, run_worker, write_wav
+from postprocess import TextPipeline
+from result_cache import cache_key
+from vocabulary import Vocabulary, load_vocabulary, validate_vocabulary
+
+OPTIONS = {**DEFAULTS, "language_mode": "en"}
+
+
+def compile_terms(terms, hotwords=True, **kwargs) -> Vocabulary:
+    return Vocabulary(*validate_vocabulary({"terms": terms, "hotwords": hotwords}), **kwargs)
+
+
+def test_spoken_forms_become_terms_leftmost_longest():
+    vocabulary = compile_terms([
+        "VoicePaste",
+        {"term": "kubectl", "spoken": ["cube control", "kube cuddle"]},
+        {"term": "Node.js", "spoken": ["node js"]},
+        {"term": "Kubernetes", "spoken": ["cube"]},
+    ])
+
+    text, count = vocabulary.correct("Run cube control in voicepaste, then cube. Node JS too")
+    assert text == "Run kubectl in VoicePaste, then Kubernetes. Node.js too"
+    assert count == 4
+    # Terms spelled right already are not corrections
+    assert vocabulary.correct("VoicePaste and node.js") == ("VoicePaste and Node.js", 1)
+    # Whole tokens only, and punctuation between the words must match
+    assert vocabulary.correct("cubed cube, control") == ("cubed Kubernetes, control", 1)
+    assert vocabulary.correct("") == ("", 0)
+
+
+def test_the_first_term_listed_keeps_a_shared_spoken_form():
+    vocabulary = compile_terms([{"term": "GitHub", "spoken": ["git hub"]}, {"term": "GitLab", "spoken": ["git hub"]}])
+
+    assert vocabulary.correct("push to git hub") == ("push to GitHub", 1)
+    assert vocabulary.spoken_forms == 3
+
+
+def test_hotwords_are_the_first_terms_that_fit():
+    vocabulary = compile_terms(["VoicePaste", "kubectl", "Kubernetes"], hotword_chars=20)
+
+    assert vocabulary.hotwords == "VoicePaste, kubectl"
+    assert vocabulary.hotword_terms == 2
+    assert compile_terms(["VoicePaste"], hotwords=False).hotwords is None
+    assert compile_terms(["a"]).digest != compile_terms(["b"]).digest
+
+
+@pytest.mark.parametrize("data, fragment", [
+    ([], "object"),
+    ({"words": []}, "Unknown"),
+    ({"hotwords": "yes"}, "true or false"),
+    ({"terms": [""]}, "non-empty"),
+    ({"terms": [{"term": "x", "spoken": "y"}]}, "spoken"),
+    ({"terms": [{"term": "x", "sounds": []}]}, "Invalid"),
+])
+def test_invalid_vocabulary_is_rejected(data, fragment):
+    with pytest.raises(ValueError, match=fragment):
+        validate_vocabulary(data)
+
+
+def test_load_vocabulary(tmp_path):
+    path = tmp_path / "vocabulary.json"
+    path.write_text(json.dumps({"terms": [{"term": "kubectl", "spoken": ["cube control"]}]}), encoding="utf-8")
+
+    assert load_vocabulary(path).correct("cube control") == ("kubectl", 1)
+    with pytest.raises(ValueError, match="Cannot read"):
+        load_vocabulary(tmp_path / "missing.json")
+
+
+def test_correction_cost_does_not_grow_with_the_vocabulary():
+    terms = [{"term": f"Term{i}", "spoken": [f"term {i}", f"word{i} form"]} for i in range(30000)]
+    vocabulary = compile_terms(terms)
+    words = " ".join(f"word{i % 50} term {i}" for i in range(5000))  # 15,000 words, 5,000 matches
+
+    start = time.perf_counter()
+    text, count = vocabulary.correct(words)
+    elapsed = time.perf_counter() - start
+
+    assert count == 5000 and text.startswith("word0 Term0 word1 Term1")
+    # One trie walk: a few lookups per word, not one pattern per term
+    assert elapsed < 0.5
+
+
+def test_vocabulary_biases_decoding_and_corrects_segments():
+    model = FakeWhisperModel(texts=("Hello", "world"))
+    vocabulary = compile_terms([{"term": "Hallo", "spoken": ["hello"]}])
+
+    result = transcribe.transcribe_audio(
+        np.zeros(16000, dtype=np.float32), model, language_mode="en", postprocess=TextPipeline("en", None, vocabulary)
+    )
+
+    assert model.calls[0]["hotwords"] == "Hallo"
+    assert result["text"] == "Hallo world"
+    assert result["vocabulary"] == {"corrections": 1, "hotword_terms": 1, "hotword_tokens": 1}
+    assert "vocabulary" in result["timings"]
+    assert transcribe.transcribe_audio(np.zeros(16000, dtype=np.float32), model)["vocabulary"] is None
+
+
+def test_worker_requests_can_turn_the_vocabulary_off(tmp_path):
+    wav = write_wav(tmp_path / "rec.wav", b"\0\0" * 16000)
+    vocabulary = compile_terms([{"term": "Hallo", "spoken": ["hello"]}])
+    defaults = {**OPTIONS, "vocabulary_terms": vocabulary}
+    requests = [
+        {"id": "1", "op": "transcribe", "path": str(wav)},
+        {"id": "2", "op": "transcribe", "path": str(wav), "options": {"vocabulary": False}},
+    ]
+    model = FakeWhisperModel()
+
+    out = run_worker(model, requests, defaults=defaults)
+    results = {m["id"]: m for m in out if m["type"] == "result"}
+
+    assert results["1"]["text"] == "Hallo world" and results["1"]["vocabulary"]["corrections"] == 1
+    assert results["2"]["text"] == "Hello world" and "vocabulary" not in results["2"]
+    assert [call["hotwords"] for call in model.calls] == ["Hallo", None]
+    # A changed or disabled vocabulary is another cache entry
+    key = cache_key("digest", ("medium", "cpu", "int8"), defaults)
+    assert cache_key("digest", ("medium", "cpu", "int8"), {**defaults, "vocabulary": False}) != key
+    assert cache_key("digest", ("medium", "cpu", "int8"), {**defaults, "vocabulary_terms": compile_terms(["x"])}) != key
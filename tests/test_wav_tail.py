@@ -0,0 +1,147 @@
+"""Tests for speculative decoding of a WAV file that is still being written."""
+import struct
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from audio_input import SAMPLE_RATE
+from conftest import run_worker
+from wav_tail import TailSession
+
+WORD_SECONDS = 0.8
+PAUSE_SECONDS = 0.4
+
+
+def make_dictation(words: int) -> bytes:
+    """Each 'word' is a run of one constant sample value, followed by a pause."""
+    blocks = []
+    for k in range(1, words + 1):
+        blocks.append(np.full(int(WORD_SECONDS * SAMPLE_RATE), k * 100, dtype="<i2"))
+        blocks.append(np.zeros(int(PAUSE_SECONDS * SAMPLE_RATE), dtype="<i2"))
+    return np.concatenate(blocks).tobytes()
+
+
+def wav_header(data_size: int) -> bytes:
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+class SyntheticRecorder(threading.Thread):
+    """Writes a WAV like AudioRecorder: sizes left at 0 while recording, filled in on close."""
+
+    def __init__(self, path, pcm: bytes, chunk_seconds: float = 0.5, delay_s: float = 0.005):
+        super().__init__(daemon=True)
+        self.path = path
+        self.pcm = pcm
+        self.chunk = int(chunk_seconds * SAMPLE_RATE) * 2
+        self.delay_s = delay_s
+
+    def run(self):
+        with open(self.path, "wb") as f:
+            f.write(wav_header(0))
+            for offset in range(0, len(self.pcm), self.chunk):
+                f.write(self.pcm[offset:offset + self.chunk])
+                f.flush()
+                time.sleep(self.delay_s)
+            f.seek(0)
+            f.write(wav_header(len(self.pcm)))
+
+
+class FakeDecoder:
+    """'Recognizes' each constant run as one segment; a run cut by a window edge comes out garbled."""
+
+    def __init__(self):
+        self.windows = []
+
+    def __call__(self, audio: np.ndarray, language):
+        self.windows.append((len(audio) / SAMPLE_RATE, language))
+        values = np.round(audio * 32768).astype(np.int32)
+        edges = np.flatnonzero(np.diff(values)) + 1
+        starts = np.concatenate(([0], edges))
+        ends = np.concatenate((edges, [len(values)]))
+        segments = []
+        for start, end in zip(starts, ends):
+            if values[start] == 0:
+                continue
+            cut = end - start < int(WORD_SECONDS * SAMPLE_RATE)
+            text = f"w{values[start] // 100}" + ("-" if cut else "")
+            segments.append({"start": start / SAMPLE_RATE, "end": end / SAMPLE_RATE, "text": text})
+        return {"segments": segments, "language": "en"}
+
+
+def test_complete_windows_are_decoded_while_recording(tmp_path):
+    path = tmp_path / "rec.wav"
+    decoder = FakeDecoder()
+    # The recorder starts after the session: the file doesn't exist yet
+    session = TailSession(path, decoder, window_s=3.0, poll_s=0.005, search_s=1.0)
+    recorder = SyntheticRecorder(path, make_dictation(40))  # 48 s of audio
+    recorder.start()
+    recorder.join(timeout=30)
+    # Let the background thread catch up with the last complete window
+    deadline = time.monotonic() + 5
+    while session.received_seconds * SAMPLE_RATE - session._decoded_samples >= session._window:
+        if time.monotonic() > deadline:
+            break
+        time.sleep(0.005)
+
+    result = session.finish()
+
+    assert result["text"] == " ".join(f"w{k}" for k in range(1, 41))
+    assert result["windows_decoded"] >= 16
+    # Stop only decodes what is left after the last complete window
+    assert result["tail_seconds"] < 3.0
+    assert all(seconds <= 3.0 for seconds, _ in decoder.windows)
+    # The first window's language is kept for the rest
+    assert [language for _, language in decoder.windows[1:]] == ["en"] * (len(decoder.windows) - 1)
+    starts = [s["start"] for s in result["segments"]]
+    assert starts == sorted(starts)
+    assert session.received_seconds == pytest.approx(48.0)
+
+
+def test_backlog_is_decoded_in_windows_on_stop(tmp_path):
+    path = tmp_path / "rec.wav"
+    decoder = FakeDecoder()
+    session = TailSession(path, decoder, window_s=3.0, poll_s=10.0, search_s=1.0)
+    # Written after the first (and, with this poll interval, only) background check
+    time.sleep(0.05)
+    path.write_bytes(wav_header(0) + make_dictation(10))  # 12 s
+
+    result = session.finish()
+
+    assert result["text"] == " ".join(f"w{k}" for k in range(1, 11))
+    assert result["tail_seconds"] == pytest.approx(12.0)
+    assert all(seconds <= 3.0 for seconds, _ in decoder.windows)
+
+
+def test_missing_or_foreign_file_fails_on_stop(tmp_path):
+    session = TailSession(tmp_path / "never-written.wav", FakeDecoder(), poll_s=0.001)
+    with pytest.raises(ValueError, match="Not a 16kHz"):
+        session.finish()
+
+
+def test_tail_stream_over_worker_protocol(fake_model, tmp_path):
+    path = tmp_path / "rec.wav"
+    path.write_bytes(wav_header(0) + make_dictation(2))
+    requests = [
+        {"id": "t1", "op": "stream_start", "path": str(path), "options": {"language_mode": "en"}},
+        {"id": "t1", "op": "stream_audio", "audio": ""},
+        {"id": "t2", "op": "stream_start", "path": str(path)},
+        {"id": "t2", "op": "stream_stop"},
+        {"id": "t3", "op": "stream_start", "path": ""},
+    ]
+    lines = run_worker(fake_model, requests)
+    # The stop is answered from the dispatcher, so t3's error may come before t2's result
+    out = {request_id: [m for m in lines if m["id"] == request_id] for request_id in ("t1", "t2", "t3")}
+
+    assert "takes no audio" in out["t1"][0]["error"]
+    assert out["t1"][1] == {"v": 1, "id": "t1", "type": "end"}
+    assert out["t2"][0]["status"] == "ok"
+    assert out["t2"][0]["text"] == "Hello world"
+    assert out["t2"][0]["tail_seconds"] == pytest.approx(2.4)
+    assert out["t2"][1] == {"v": 1, "id": "t2", "type": "end"}
+    assert "non-empty" in out["t3"][0]["error"]
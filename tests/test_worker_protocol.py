@@ -0,0 +1,147 @@
+"""Tests for the resident worker's JSON-lines protocol."""
+import io
+import json
+
+import pytest
+
+import worker_protocol
+from conftest import FakeWhisperModel, run_worker
+from worker_protocol import ProtocolError, parse_request
+
+
+def transcribe_request(request_id, path, **options):
+    return {"v": 1, "id": request_id, "op": "transcribe", "path": str(path), "options": options}
+
+
+def test_ready_then_result_and_end_marker(fake_model, wav_file):
+    out = run_worker(fake_model, [transcribe_request("1", wav_file)])
+
+    result, end = out
+    assert result["type"] == "result" and result["id"] == "1" and result["v"] == 1
+    assert result["status"] == "ok"
+    assert result["text"] == "Hello world"
+    assert result["language"] == "en"
+    assert set(result["timings"]) >= {"transcribe_ms", "total_ms"}
+    assert end == {"v": 1, "id": "1", "type": "end"}
+
+
+def test_many_requests_share_one_model(fake_model, wav_file):
+    out = run_worker(fake_model, [transcribe_request(str(i), wav_file) for i in range(5)])
+
+    results = [m for m in out if m["type"] == "result"]
+    assert [m["id"] for m in results] == ["0", "1", "2", "3", "4"]
+    assert len(fake_model.calls) == 5
+
+
+def test_multiline_transcript_stays_in_one_frame(wav_file):
+    model = FakeWhisperModel(texts=["line one\nline two"])
+    out = run_worker(model, [transcribe_request("ml", wav_file)])
+
+    assert out[0]["text"] == "line one\nline two"
+    assert out[1]["type"] == "end"
+
+
+def test_per_request_options_override_defaults(fake_model, wav_file):
+    run_worker(fake_model, [transcribe_request("a", wav_file, language_mode="en", beam_size=2)])
+
+    call = fake_model.calls[0]
+    assert call["language"] == "en"
+    assert call["beam_size"] == 2
+
+
+def test_segments_are_sent_as_they_are_decoded(wav_file):
+    stdout = io.StringIO()
+    written_before = []
+
+    class RecordingModel(FakeWhisperModel):
+        def transcribe(self, audio, **kwargs):
+            segments, info = super().transcribe(audio, **kwargs)
+
+            def watched():
+                for seg in segments:
+                    written_before.append(len(stdout.getvalue().splitlines()))
+                    yield seg
+
+            return watched(), info
+
+    out = run_worker(
+        RecordingModel(texts=["one", "two", "three"]), [transcribe_request("s", wav_file, segments=True)], stdout=stdout
+    )
+
+    assert [m["type"] for m in out] == ["segment", "segment", "segment", "result", "end"]
+    assert [(m["index"], m["start"], m["end"], m["text"]) for m in out[:3]] == [
+        (0, 0.0, 1.0, "one"), (1, 1.0, 2.0, "two"), (2, 2.0, 3.0, "three"),
+    ]
+    assert out[3]["segment_count"] == 3 and out[3]["text"] == "one two three"
+    # Each segment was written before the next one was decoded
+    assert written_before == [1, 2, 3]
+
+
+def test_segments_are_opt_in(fake_model, wav_file):
+    out = run_worker(fake_model, [transcribe_request("1", wav_file)])
+
+    assert [m["type"] for m in out] == ["result", "end"]
+    assert out[0]["segment_count"] == 2
+
+
+def test_error_result_keeps_worker_alive(fake_model, wav_file, tmp_path):
+    out = run_worker(fake_model, [
+        transcribe_request("missing", tmp_path / "nope.wav"),
+        transcribe_request("ok", wav_file),
+    ])
+
+    assert out[0]["status"] == "error" and "not found" in out[0]["error"]
+    assert out[1] == {"v": 1, "id": "missing", "type": "end"}
+    assert out[2]["status"] == "ok"
+
+
+def test_bad_request_gets_error_frame(fake_model):
+    out = run_worker(fake_model, ["{not json", {"v": 99, "id": "x", "op": "ping"}])
+
+    assert out[0]["status"] == "error" and out[1]["type"] == "end"
+    assert out[2]["id"] == "x" and "version" in out[2]["error"]
+
+
+def test_non_utf8_request_gets_an_error_and_keeps_worker_alive(fake_model, tmp_path):
+    out = run_worker(fake_model, [
+        b'{"v": 1, "id": "1", "op": "transcribe", "path": "' + str(tmp_path).encode("utf-8") + b'/\xff.wav"}\n',
+        b'{"v": 1, "id": "2", "op": "ping"\xff}\n',
+        {"v": 1, "id": "p", "op": "ping"},
+    ])
+    by_id = {m["id"]: m for m in out if m["type"] != "end"}
+
+    assert by_id["1"]["status"] == "error" and "not found" in by_id["1"]["error"]
+    assert by_id[None]["status"] == "error"
+    assert by_id["p"]["type"] == "pong"
+
+
+def test_ping_and_quit(fake_model, wav_file):
+    out = run_worker(fake_model, [
+        {"id": "p", "op": "ping"},
+        {"id": "q", "op": "quit"},
+        transcribe_request("never", wav_file),
+    ])
+
+    assert out[0] == {"v": 1, "id": "p", "type": "pong", "protocol": worker_protocol.PROTOCOL_VERSION}
+    assert out[1] == {"v": 1, "id": "q", "type": "end"}
+    assert len(out) == 2
+    assert fake_model.calls == []
+
+
+def test_legacy_path_protocol_still_works(fake_model, wav_file, tmp_path):
+    out = run_worker(fake_model, [str(wav_file), str(tmp_path / "nope.wav"), "QUIT", str(wav_file)])
+
+    assert out == ["Hello world", ""]
+
+
+@pytest.mark.parametrize("options, fragment", [
+    ({"beam_size": True}, "beam_size"),
+    ({"beam_size": 0}, "beam_size"),
+    ({"language_mode": "ru"}, "language_mode"),
+    ({"cpu_threads": -1}, "cpu_threads"),
+    ({"num_workers": 0}, "num_workers"),
+    ({"temperature": 0.5}, "Unknown option"),
+])
+def test_invalid_options_are_rejected(options, fragment):
+    with pytest.raises(ProtocolError, match=fragment):
+        parse_request(json.dumps({"id": "1", "op": "transcribe", "path": "a.wav", "options": options}))